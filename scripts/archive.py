@@ -1,19 +1,26 @@
 from __future__ import annotations
 
-import pprint
+import json
+import posixpath
 from argparse import ArgumentParser
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager, suppress
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+import asdf
 from git import Remote, Repo
+from git_reader import SYMLINK_MODE, GitReader
 
-from rad._parser import diff, dump
+from rad._parser import TABLE_FORMATS, column_changes, dump
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Generator, Iterator
+    from typing import Any
 
-    from deepdiff import DeepDiff
+    from rad._parser._diff import ColumnChange
 
 _RAD_URLS = (
     "https://github.com/spacetelescope/rad",
@@ -45,55 +52,102 @@ def _repo(path: Path) -> tuple[Repo, Remote]:
     )
 
 
-@contextmanager
-def _repo_branch(repo: Repo, hexsha: str) -> Generator[None, None, None]:
+# Where the resources are kept in the repository -> the URI prefix they are served under
+_RESOURCE_PREFIXES = {
+    "src/rad/resources/schemas/": "asdf://stsci.edu/datamodels/roman/schemas/",
+    "src/rad/resources/manifests/": "asdf://stsci.edu/datamodels/roman/manifests/",
+}
+_RESOURCE_PATHS = ("src/rad/resources", "latest")
+
+_MAX_SYMLINKS = 40
+
+
+class GitResourceMapping(Mapping):
     """
-    Get the latest commit hash for the specified branch from the remote.
+    A resource mapping serving the RAD resources (including the SSC schemas) as they
+    are in a commit, straight from the git objects rather than the working tree.
+
+    The tree is listed and every resource blob is read up front, so the mapping is
+    served from memory. The symbolic links (e.g. the ``latest`` schemas) are stored
+    as blobs holding their target, so they are followed within the tree.
+
+    Parameters
+    ----------
+    repo
+        The git repository object to use for RAD.
+    hexsha
+        The commit hash to serve the resources of.
     """
-    if repo.index.diff(None):
-        raise RuntimeError("Unstaged changes in the working directory, please commit or stash them before running this.")
 
-    file_diffs = repo.index.diff("HEAD")
-    changed_latest = []
+    def __init__(self, repo: Repo, hexsha: str) -> None:
+        # path -> (mode, blob sha) of every YAML file which could be a resource or the target of one
+        with GitReader(repo.working_dir) as reader:
+            tree = {entry.path: (entry.mode, entry.sha) for entry in reader.tree(hexsha, *_RESOURCE_PATHS, suffix=".yaml")}
+            self._blobs = dict(reader.blobs(dict.fromkeys(sha for _, sha in tree.values())))
+
+        self._shas = {}
+        for path in tree:
+            for directory, prefix in _RESOURCE_PREFIXES.items():
+                if path.startswith(directory) and (sha := self._resolve(tree, path)) is not None:
+                    self._shas[f"{prefix}{path.removeprefix(directory).removesuffix('.yaml')}"] = sha
+
+    def _resolve(self, tree: dict[str, tuple[str, str]], path: str) -> str | None:
+        """
+        Find the blob holding the content of a path, following any symbolic links.
+            -> None if a link leads outside of the files read from the tree
+        """
+        for _ in range(_MAX_SYMLINKS):
+            if (entry := tree.get(path)) is None:
+                return None
 
-    if file_diffs:
-        for file_diff in file_diffs:
-            if file_diff.a_path.startswith("latest/") or file_diff.a_path.startswith("src/rad/resources/"):
-                changed_latest.append(file_diff.a_path)
+            mode, sha = entry
+            if mode != SYMLINK_MODE:
+                return sha
 
-        # Only want to change the latest files during this context the other changes should be preserved
-        # so we stash them separately
-        if changed_latest:
-            repo.git.stash("push", *changed_latest)
+            path = posixpath.normpath(posixpath.join(posixpath.dirname(path), self._blobs[sha].decode()))
 
-        # Now stash any other changes
-        repo.git.stash("push")
+        return None
 
-    # Checkout checkout the latest files from hexshaw in the primary repo.
-    repo.git.checkout(hexsha, "--", "latest")
-    repo.git.checkout(hexsha, "--", "src/rad/resources")
+    def __getitem__(self, uri: str) -> bytes:
+        return self._blobs[self._shas[uri]]
 
-    # Apply the stashed changes back to the working directory
-    if file_diffs:
-        repo.git.stash("apply")
+    def __len__(self) -> int:
+        return len(self._shas)
 
-    yield
+    def __iter__(self) -> Iterator[str]:
+        yield from self._shas
+
+    def __contains__(self, uri: object) -> bool:
+        return uri in self._shas
+
+
+@contextmanager
+def _git_config(repo: Repo, hexsha: str) -> Generator[asdf.config.AsdfConfig, None, None]:
+    """
+    Serve the RAD resources as they are in a commit, in place of the installed ones.
 
-    # Reset the repo to the last committed state
-    repo.git.reset("--hard")
+    ASDF configuration contexts are local to the thread, so this has no effect
+    on any other thread.
+    """
+    with asdf.config_context() as config:
+        config.remove_resource_mapping(package="rad")
+        config.add_resource_mapping(GitResourceMapping(repo, hexsha))
 
-    # We had some staged changes so we need to restore those
-    if file_diffs:
-        # Drop the stash missing the latest changes as we will just pop the first stash
-        if changed_latest:
-            repo.git.stash("drop")
+        yield config
 
-        # Now pop the stash with the latest changes
-        repo.git.stash("pop")
 
-        # Restage all the files that were staged before
-        for file_diff in file_diffs:
-            repo.git.add(file_diff.a_path)
+def _commit_archive_schemas(repo: Repo, hexsha: str, base_dir: Path) -> dict[str, dict[str, Any]]:
+    """
+    Generate the archive schemas for a commit, without writing any files.
+    """
+    with _git_config(repo, hexsha):
+        return dump(
+            base_dir,
+            super_schema=False,
+            archive_json=False,
+            archive_txt=False,
+            archive_yaml=False,
+        )["archive_schemas"]
 
 
 def _diff_repo(
@@ -104,8 +158,11 @@ def _diff_repo(
     archive_json: bool = True,
     archive_yaml: bool = True,
     archive_txt: bool = True,
-) -> DeepDiff:
-    """Get differences between the current staged files and those in the specified commit hash.
+    workers: int | None = None,
+    force: bool = False,
+    archive_table: str | None = None,
+) -> Generator[ColumnChange, None, None]:
+    """Get the archive columns which differ between the current files and those in the specified commit hash.
 
     Parameters
     ----------
@@ -113,29 +170,49 @@ def _diff_repo(
         The git repository object to use for RAD.
     hexsha
         The commit hash to compare against.
+    workers
+        The number of worker processes to dump the current archive files with.
+    force
+        Rebuild all the archive files for the current state, rather than only those
+        affected by changes since they were last dumped into base_dir.
+    archive_table
+        The format to also write the archive information as a columnar table in, if any.
 
     Returns
     -------
-    DeepDiff
-        The differences between the current staged files and those in the specified commit hash.
+    Generator[ColumnChange, None, None]
+        The changes to each archive column, produced as they are found.
     """
-    print("Generating archive files for the current staged state...")
-    current_schemas = dump(
+    print("Generating archive files for the current state and the main branch...")
+    current = partial(
+        dump,
         base_dir,
         super_schema=super_schema,
         archive_json=archive_json,
         archive_yaml=archive_yaml,
         archive_txt=archive_txt,
         verbose=True,
-    )["archive_schemas"]
+        workers=workers,
+        force=force,
+        archive_table=archive_table,
+    )
 
-    print("Generating archive files for the main branch...")
-    with _repo_branch(repo, hexsha):
-        main_schemas = dump(
-            base_dir, super_schema=False, archive_json=False, archive_txt=False, archive_yaml=False, verbose=True
-        )["archive_schemas"]
+    # Forking the worker processes while another thread may hold a lock (e.g. of ASDF,
+    # the super schema cache, or the git reader) can deadlock them, so with workers the
+    # commit is only generated once they have all finished
+    if workers is not None and workers > 1:
+        current_schemas = current()["archive_schemas"]
+        main_schemas = _commit_archive_schemas(repo, hexsha, base_dir)
 
-    return diff(current_schemas, main_schemas)
+    # Otherwise the commit is read from the git objects within its own thread, so it is
+    # generated alongside the current state without touching the working tree
+    else:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            main_future = executor.submit(_commit_archive_schemas, repo, hexsha, base_dir)
+            current_schemas = current()["archive_schemas"]
+            main_schemas = main_future.result()
+
+    return column_changes(current_schemas, main_schemas)
 
 
 def _argparser() -> ArgumentParser:
@@ -178,6 +255,27 @@ def _argparser() -> ArgumentParser:
         action="store_false",
         help="Do not save the archive entries in TXT format.",
     )
+    parser.add_argument(
+        "--workers",
+        "-j",
+        default=None,
+        type=int,
+        help="Number of worker processes to use. Defaults to processing everything in a single process.",
+    )
+    parser.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Rebuild all the archive files, rather than only those affected by changes since the last dump.",
+    )
+
+    parser.add_argument(
+        "--archive_table",
+        "-t",
+        default=None,
+        choices=TABLE_FORMATS,
+        help="Also save the archive information as a columnar table in this format (parquet and arrow need pyarrow).",
+    )
 
     return parser
 
@@ -191,17 +289,26 @@ if __name__ == "__main__":
     hexsha = remote.refs[args.diff].commit.hexsha
 
     differences = _diff_repo(
-        repo, hexsha, save_dir, args.no_super_schema, args.no_archive_json, args.no_archive_yaml, args.no_archive_txt
+        repo,
+        hexsha,
+        save_dir,
+        args.no_super_schema,
+        args.no_archive_json,
+        args.no_archive_yaml,
+        args.no_archive_txt,
+        args.workers,
+        args.force,
+        args.archive_table,
     )
 
     print("-------------------- DIFF RESULTS ------------------")
-    with (save_dir / "diff.txt").open("w") as f:
-        if differences:
-            pp = pprint.PrettyPrinter(stream=f)
-            pp.pprint(differences)
-            pp = pprint.PrettyPrinter()
-            pp.pprint(differences)
-
-        else:
-            f.write("No differences found.")
-            print("No differences found.")
+    # One JSON record per changed archive column, written (and printed) as each is found
+    count = 0
+    with (save_dir / "diff.jsonl").open("w") as f:
+        for change in differences:
+            line = json.dumps(change)
+            f.write(f"{line}\n")
+            print(line)
+            count += 1
+
+    print(f"{count} archive columns changed, see {save_dir / 'diff.jsonl'}" if count else "No differences found.")
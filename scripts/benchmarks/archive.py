@@ -0,0 +1,151 @@
+"""
+Benchmark producing the archive information of all the latest archive schemas from
+their super schemas, against the former implementations.
+
+Run from the root of the RAD repository:
+
+    python scripts/benchmarks/archive.py
+"""
+
+from __future__ import annotations
+
+import copy
+from argparse import ArgumentParser
+from collections import abc
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+from rad._parser import SuperSchemaBuilder, archive_entries, archive_schema, asdf_ssc_config, super_schema
+from rad._parser._process import _get_latest_uris
+
+if TYPE_CHECKING:
+    from typing import Any
+
+
+def _copying_archive_schema(schema: dict[str, Any]) -> dict[str, Any]:
+    """
+    The former archive_schema, which deep copies every mapping before pruning it.
+    """
+    if isinstance(schema, abc.Mapping):
+        new_schema = copy.deepcopy(schema)
+        for key in schema:
+            if key not in ("properties", "archive_catalog", "archive_meta"):
+                new_schema.pop(key)
+
+        schema = new_schema
+
+    if isinstance(schema, abc.Mapping) and "properties" in schema:
+        properties = {}
+        for key, sub_node in schema["properties"].items():
+            if new_node := _copying_archive_schema(sub_node):
+                properties[key] = new_node
+
+        if properties:
+            schema["properties"] = properties
+            return schema
+        else:
+            return {}
+
+    if isinstance(schema, abc.Mapping):
+        if "archive_catalog" in schema:
+            return {"archive_catalog": schema["archive_catalog"]}
+        else:
+            return None
+
+    return schema
+
+
+def _flatten_dict(data: dict[str, Any], parent_key: str | None = None) -> dict[str, Any]:
+    """
+    The former flattening of the archive schema, into joined key paths -> values.
+    """
+    parent_key = parent_key or ""
+
+    items = []
+    for key, value in data.items():
+        new_key = f"{parent_key}.{key}" if parent_key else key
+
+        if isinstance(value, abc.Mapping):
+            items.extend(_flatten_dict(value, new_key).items())
+        else:
+            items.append((new_key, value))
+
+    return dict(items)
+
+
+def _flattening_archive_entries(schema: dict[str, Any]) -> list[str]:
+    """
+    The former archive_entries, which flattens the archive schema into joined key
+    paths and then splits them up again (pruning in a single pass, as both do now).
+    """
+    archive_meta = schema.get("archive_meta")
+    archive_filter = archive_schema(schema)
+    archive_filter.pop("archive_meta")
+
+    path_info = {}
+    for key_path, value in _flatten_dict(archive_filter).items():
+        base_path, archive_key = key_path.rsplit(".", 1)
+        path = ".".join(item for item in base_path.split(".") if item not in ("properties", "archive_catalog", "meta"))
+        path_info.setdefault(path, {})[archive_key] = value
+
+    archive_strings = []
+    for path, archive_info in path_info.items():
+        parts = path.split(".")
+        if len(parts) == 1:
+            parts = ["top", *parts]
+
+        schema_path = f"meta.{'.'.join(parts)}|"
+        archive_path = "|".join(parts[-2:][::-1])
+        if (datatype := archive_info["datatype"]) is not None:
+            schema_path = f"{1 if 'char' in datatype.lower() or 'str' in datatype.lower() else 0}||{schema_path}"
+
+        lines = ["|".join([archive_path, *(dest.split(".")), schema_path]) for dest in archive_info["destination"]]
+        archive_strings.extend([f"{archive_meta}|{line}" for line in lines])
+
+    return archive_strings
+
+
+def _time(function, schemas: dict[str, dict[str, Any]], repeat: int) -> tuple[float, list[Any]]:
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        results = [function(schema) for schema in schemas.values()]
+        times.append(perf_counter() - start)
+
+    return min(times), results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("archive", description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", "-r", default=5, type=int, help="Number of repeats, the best time is reported.")
+    args = parser.parse_args()
+
+    with asdf_ssc_config():
+        builder = SuperSchemaBuilder()
+        schemas = {uri: schema for uri in _get_latest_uris() if "archive_meta" in (schema := super_schema(uri, builder=builder))}
+
+    print(f"Archive information of {len(schemas)} latest archive schemas")
+
+    for title, functions in (
+        (
+            "archive_schema",
+            (
+                ("deep copying", _copying_archive_schema),
+                ("single pass", archive_schema),
+            ),
+        ),
+        (
+            "archive_entries",
+            (
+                ("flattening", _flattening_archive_entries),
+                ("streaming", archive_entries),
+            ),
+        ),
+    ):
+        print(f"  {title}")
+        results = {name: _time(function, schemas, args.repeat) for name, function in functions}
+
+        baseline, expected = next(iter(results.values()))
+        for name, (elapsed, output) in results.items():
+            check = "" if output == expected else "  MISMATCH"
+            print(f"    {name:<14} {elapsed * 1000:9.2f} ms  ({baseline / elapsed:5.1f}x){check}")
@@ -0,0 +1,86 @@
+"""
+Benchmark loading the resources of the helper's manager, parsing the yaml of every
+file serially (as the manager used to) against scanning the id lines on a thread pool.
+
+Run from the root of the RAD repository:
+
+    python scripts/benchmarks/helper_load.py
+"""
+
+from __future__ import annotations
+
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+
+from yaml import safe_load
+
+_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(_ROOT / "scripts"))
+
+from helper._manager import _Manager
+from helper._resource import Resource, read_resource
+
+
+def _paths() -> list[Path]:
+    return list((_ROOT / "latest").glob("**/*.yaml"))
+
+
+def _serial(paths: list[Path]) -> dict[str, Resource]:
+    resources = {}
+    for path in paths:
+        body = path.read_text()
+        uri = safe_load(body)["id"]
+        resources[uri] = Resource(uri, path, _ROOT, body, False)
+
+    return resources
+
+
+def _scanned(paths: list[Path]) -> dict[str, Resource]:
+    with ThreadPoolExecutor() as executor:
+        return {
+            uri: Resource(uri, path, _ROOT, body, False)
+            for path, (uri, body) in zip(paths, executor.map(read_resource, paths), strict=True)
+        }
+
+
+def _manager(paths: list[Path], frozen: frozenset[str]) -> dict[str, Resource]:
+    # The frozen URIs are given (which ones does not matter here), so that only
+    # the loading of the resources is timed rather than the search of the git history
+    return _Manager(_ROOT, frozen=frozen)._resources
+
+
+def _time(function, paths: list[Path], repeat: int) -> tuple[float, set[str]]:
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        resources = function(paths)
+        times.append(perf_counter() - start)
+
+    return min(times), set(resources)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("helper_load", description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", "-r", default=5, type=int, help="Number of repeats, the best time is reported.")
+    args = parser.parse_args()
+
+    paths = _paths()
+    print(f"Loading {len(paths)} resources")
+
+    results = {
+        name: _time(function, paths, args.repeat)
+        for name, function in (
+            ("serial yaml", _serial),
+            ("scanned ids", _scanned),
+            ("manager", partial(_manager, frozen=frozenset(_serial(paths)))),
+        )
+    }
+
+    baseline, expected = results["serial yaml"]
+    for name, (elapsed, uris) in results.items():
+        check = "" if uris == expected else "  MISMATCH"
+        print(f"    {name:<14} {elapsed * 1000:9.2f} ms  ({baseline / elapsed:5.1f}x){check}")
@@ -0,0 +1,103 @@
+"""
+Benchmark finding the resource URIs of every release since the base release,
+reading each blob through GitPython against streaming them through a `GitReader`.
+
+Run from the root of the RAD repository (with the release tags fetched):
+
+    python scripts/benchmarks/release_history.py
+"""
+
+from __future__ import annotations
+
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from re import findall
+from time import perf_counter
+from tomllib import load
+
+from git import Repo
+from semantic_version import Version
+from yaml import safe_load
+
+_ROOT = Path(__file__).parent.parent.parent
+sys.path.append(str(_ROOT / "scripts"))
+
+from git_reader import GitReader, resource_id
+
+
+def _releases(repo: Repo) -> list[str]:
+    with (_ROOT / "pyproject.toml").open("rb") as f:
+        base_release = Version(load(f)["tool"]["rad-versioning"]["base_release"])
+
+    versions = {Version(match[-1]) for tag in repo.tags if (match := findall(r"\d+\.\d+\.\d+$", tag.name))}
+
+    return [str(version) for version in sorted(versions) if version >= base_release]
+
+
+def _gitpython(repo: Repo, releases: list[str]) -> set[str]:
+    uris = set()
+    for release in releases:
+        for blob in repo.commit(release).tree.traverse(predicate=lambda item, _: item.path.endswith(".yaml")):
+            data = blob.data_stream.read().decode("utf-8")
+            if data.startswith("%YAML 1.1"):
+                uris.add(safe_load(data)["id"])
+
+    return uris
+
+
+def _batched(repo: Repo, releases: list[str], parse: bool = True, dedupe: bool = False) -> set[str]:
+    uris = set()
+    read: set[str] = set()
+    with GitReader(repo.working_dir) as reader:
+        for release in releases:
+            files = reader.files(release, suffix=".yaml")
+            for _, content in reader.blobs(entry.sha for entry in files if not (dedupe and entry.sha in read)):
+                if parse:
+                    if content.startswith(b"%YAML 1.1"):
+                        uris.add(safe_load(content)["id"])
+                elif (uri := resource_id(content)) is not None:
+                    uris.add(uri)
+
+            if dedupe:
+                read.update(entry.sha for entry in files)
+
+    return uris
+
+
+def _time(function, repo: Repo, releases: list[str], repeat: int) -> tuple[float, set[str]]:
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        uris = function(repo, releases)
+        times.append(perf_counter() - start)
+
+    return min(times), uris
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("release_history", description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", "-r", default=1, type=int, help="Number of repeats, the best time is reported.")
+    parser.add_argument(
+        "--commits", "-c", nargs="+", default=None, help="Commits to read instead of the releases since the base release."
+    )
+    args = parser.parse_args()
+
+    repo = Repo(_ROOT)
+    releases = args.commits or _releases(repo)
+    print(f"Resource URIs of {len(releases)} releases")
+
+    results = {
+        name: _time(function, repo, releases, args.repeat)
+        for name, function in (
+            ("GitPython", _gitpython),
+            ("batched", _batched),
+            ("batched (id only)", lambda repo, releases: _batched(repo, releases, parse=False)),
+            ("batched (id only, dedupe)", lambda repo, releases: _batched(repo, releases, parse=False, dedupe=True)),
+        )
+    }
+
+    baseline, expected = results["GitPython"]
+    for name, (elapsed, uris) in results.items():
+        check = "" if uris == expected else "  MISMATCH"
+        print(f"    {name:<28} {elapsed * 1000:9.2f} ms  ({baseline / elapsed:5.1f}x){check}")
@@ -0,0 +1,64 @@
+"""
+Benchmark building the super schemas of all the latest schemas top-down (each on
+its own) against building them bottom-up over the ``$ref`` dependency graph.
+
+Run from the root of the RAD repository:
+
+    python scripts/benchmarks/super_schema.py
+"""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from time import perf_counter
+
+from rad._parser import SuperSchemaBuilder, asdf_ssc_config
+from rad._parser._process import _get_latest_uris
+from rad._parser._super_schema import _build_super_schema
+
+
+def _top_down(uris: list[str]) -> None:
+    for uri in uris:
+        _build_super_schema(uri)
+
+
+def _bottom_up(uris: list[str]) -> None:
+    SuperSchemaBuilder().build_all(uris)
+
+
+def _time(function, uris: list[str], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function(uris)
+        times.append(perf_counter() - start)
+
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser("super_schema", description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", "-r", default=3, type=int, help="Number of repeats, the best time is reported.")
+    parser.add_argument("--slowest", "-s", default=10, type=int, help="Number of the slowest graph nodes to report.")
+    args = parser.parse_args()
+
+    with asdf_ssc_config():
+        uris = list(_get_latest_uris())
+        print(f"Super schemas of {len(uris)} latest schemas")
+
+        results = {
+            name: _time(function, uris, args.repeat)
+            for name, function in (
+                ("top-down", _top_down),
+                ("bottom-up", _bottom_up),
+            )
+        }
+        for name, elapsed in results.items():
+            print(f"    {name:<14} {elapsed * 1000:9.2f} ms  ({results['top-down'] / elapsed:5.1f}x)")
+
+        builder = SuperSchemaBuilder()
+        builder.build_all(uris)
+
+    print(f"\nSlowest of the {len(builder.timings)} graph nodes:")
+    for (uri, fragment), elapsed in sorted(builder.timings.items(), key=lambda item: item[1], reverse=True)[: args.slowest]:
+        print(f"    {elapsed * 1000:9.2f} ms  {uri}{f'#{fragment}' if fragment else ''}")
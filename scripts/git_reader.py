@@ -0,0 +1,207 @@
+"""
+Read files straight out of the object store of a git repository.
+
+Scanning the release history of RAD (e.g. for the frozen resources of every
+release) means reading thousands of blobs. Rather than asking git for each blob
+separately, a `GitReader` keeps a single ``git cat-file --batch`` process open
+and streams every requested blob through it.
+"""
+
+from __future__ import annotations
+
+import re
+import subprocess
+import threading
+from contextlib import suppress
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+    from os import PathLike
+    from typing import Self
+
+
+__all__ = ["SYMLINK_MODE", "GitReader", "TreeEntry", "resource_id"]
+
+# The mode git stores symbolic links under, the blob holds the link target
+SYMLINK_MODE = "120000"
+
+# The header every RAD resource starts with
+_RESOURCE_HEADER = b"%YAML 1.1"
+
+# The top-level id of a resource
+_ID_PATTERN = re.compile(rb"^id:[ \t]*(\S+)[ \t]*$", re.MULTILINE)
+
+
+class TreeEntry(NamedTuple):
+    mode: str
+    sha: str
+    path: str
+
+    @property
+    def is_symlink(self) -> bool:
+        return self.mode == SYMLINK_MODE
+
+
+def resource_id(content: bytes) -> str | None:
+    """
+    Find the URI of a RAD resource without parsing all of its YAML.
+
+    Parameters
+    ----------
+    content : bytes
+        The content of the file.
+
+    Returns
+    -------
+    str | None
+        The ``id`` of the resource, None if the file is not a RAD resource.
+    """
+    if not content.startswith(_RESOURCE_HEADER):
+        return None
+
+    if (match := _ID_PATTERN.search(content)) is not None:
+        return match.group(1).decode().strip("'\"")
+
+    # Only an unusually written id gets here
+    import yaml
+
+    return yaml.safe_load(content).get("id")
+
+
+class GitReader:
+    """
+    Read trees and blobs out of a git repository through one persistent
+    ``git cat-file --batch`` process.
+
+    Parameters
+    ----------
+    path : str | PathLike
+        The working directory of the repository.
+    """
+
+    def __init__(self, path: str | PathLike) -> None:
+        self._path = path
+        self._process: subprocess.Popen | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop the batch process, it is restarted if anything else is read.
+        """
+        if (process := self._process) is not None:
+            self._process = None
+            # Stopping the process first fails any write still blocked on the full pipe
+            process.kill()
+            process.wait()
+            with suppress(OSError):
+                process.stdin.close()
+            process.stdout.close()
+
+    def _git(self, *args: str) -> bytes:
+        return subprocess.run(  # noqa: S603
+            ["git", *args],  # noqa: S607
+            cwd=self._path,
+            capture_output=True,
+            check=True,
+        ).stdout
+
+    def _batch(self) -> subprocess.Popen:
+        if self._process is None:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", "--batch"],  # noqa: S607
+                cwd=self._path,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+
+        return self._process
+
+    def tree(self, commit: str, *paths: str, suffix: str | None = None) -> list[TreeEntry]:
+        """
+        List the files (including symbolic links) in a commit.
+
+        Parameters
+        ----------
+        commit : str
+            Anything git resolves to a commit (sha, tag, branch, ...).
+        *paths : str
+            Only list the files under these paths, by default the whole tree.
+        suffix : str, optional
+            Only list the files with this suffix, by default all of them.
+
+        Returns
+        -------
+        list[TreeEntry]
+            The (mode, blob sha, path) of the files.
+        """
+        entries = []
+        for line in self._git("ls-tree", "-r", "-z", "--full-tree", commit, "--", *paths).split(b"\0"):
+            if not line:
+                continue
+
+            info, path = line.decode().split("\t", 1)
+            mode, kind, sha = info.split()
+            if kind == "blob" and (suffix is None or path.endswith(suffix)):
+                entries.append(TreeEntry(mode, sha, path))
+
+        return entries
+
+    def files(self, commit: str, *paths: str, suffix: str | None = None) -> list[TreeEntry]:
+        """
+        List the regular files (not symbolic links) in a commit, see `tree`.
+        """
+        return [entry for entry in self.tree(commit, *paths, suffix=suffix) if not entry.is_symlink]
+
+    def blobs(self, shas: Iterable[str]) -> Generator[tuple[str, bytes], None, None]:
+        """
+        Stream the content of blobs, in the order they are requested.
+
+        Parameters
+        ----------
+        shas : Iterable[str]
+            The shas of the blobs.
+
+        Yields
+        ------
+        tuple[str, bytes]
+            The sha and content of each blob.
+        """
+        shas = list(shas)
+        process = self._batch()
+
+        # The requests are written from another thread so that neither pipe fills up
+        def request() -> None:
+            try:
+                process.stdin.write(b"".join(f"{sha}\n".encode() for sha in shas))
+                process.stdin.flush()
+            except (BrokenPipeError, ValueError):
+                # The reader was closed before everything was read
+                pass
+
+        writer = threading.Thread(target=request, daemon=True)
+        writer.start()
+
+        read = 0
+        try:
+            for sha in shas:
+                # Each blob is output as "<sha> <type> <size>\n<content>\n"
+                header = process.stdout.readline().split()
+                if len(header) != 3:
+                    raise ValueError(f"Unable to read git object {sha}: {b' '.join(header).decode()}")
+
+                content = process.stdout.read(int(header[2]))
+                process.stdout.read(1)
+                read += 1
+
+                yield sha, content
+        finally:
+            # The responses not read would be taken as the responses to later requests
+            if read != len(shas):
+                self.close()
+            writer.join()
@@ -1,3 +1,4 @@
 from ._app import RadApp
+from ._batch import BatchBump, batch_bump
 
-__all__ = ("RadApp",)
+__all__ = ("BatchBump", "RadApp", "batch_bump")
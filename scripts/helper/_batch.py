@@ -0,0 +1,325 @@
+"""
+This module provides a non-interactive (headless) engine for bumping many RAD resources at once
+--> This is intended for release preparation, where dozens of resources are bumped together,
+    rather than going through the app's BumpScreen one resource at a time.
+--> The union of the cascades of all the bumps is planned once, then all the URI updates
+    are applied in memory. Only then is every changed file and symlink written, in a single
+    flush that either fully succeeds or leaves the repository as it was.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+from pathlib import Path
+from re import findall
+from time import perf_counter
+
+from semantic_version import Version
+
+from ._bump import BumpPlan
+from ._manager import _Manager
+from ._resource import Resource, rewrite_uris, tag_uri
+
+__all__ = ("BatchBump", "batch_bump")
+
+_DEFAULT_BUMPS = {
+    "major": Version.next_major,
+    "minor": Version.next_minor,
+    "patch": Version.next_patch,
+}
+
+
+@dataclass(frozen=True)
+class _Change:
+    """
+    The state a path should have after the flush.
+    --> A file with the given text, or a symlink to the given target.
+    """
+
+    text: str | None = None
+    target: str | None = None
+
+    def describe(self) -> str:
+        return f"write ({len(self.text)} characters)" if self.target is None else f"symlink -> {self.target}"
+
+
+def _current_state(path: Path) -> _Change | None:
+    """
+    Record the current state of a path, None if there is nothing there.
+    """
+    if path.is_symlink():
+        return _Change(target=os.readlink(path))
+    if path.exists():
+        return _Change(text=path.read_text())
+
+    return None
+
+
+def _write(path: Path, change: _Change | None) -> None:
+    """
+    Put a path into the given state.
+        -> the new state is created next to the path and then moved over it, so the
+           path is never left partially written
+    """
+    if change is None:
+        path.unlink(missing_ok=True)
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        if change.target is None:
+            tmp.write_text(change.text)
+        else:
+            tmp.symlink_to(change.target)
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _flush(changes: dict[Path, _Change]) -> None:
+    """
+    Write all the changes, or none of them.
+        -> if any change fails, every path is restored to the state it was in before,
+           each on its own so that one failing to be restored does not stop the others
+
+    Parameters
+    ----------
+    changes : dict[Path, _Change]
+        The state each path should be in after the flush.
+    """
+    originals = {path: _current_state(path) for path in changes}
+
+    try:
+        for path, change in changes.items():
+            _write(path, change)
+    except BaseException as error:
+        failures = []
+        for path, original in originals.items():
+            try:
+                _write(path, original)
+            except OSError as restore_error:
+                failures.append(f"{path}: {restore_error!r}")
+
+        if failures:
+            error.add_note("Failed to restore:\n    " + "\n    ".join(failures))
+        raise
+
+
+class BatchBump:
+    """
+    Plan and apply the bumps of many RAD resources at once, without the app.
+
+    This performs several tasks:
+    1. It plans the bumps: the union of the resources which need to be bumped along with
+       the requested ones (the BumpPlan), and the order to bump them in.
+    2. It applies the bumps in memory, with the same result as the app applying them
+       one at a time in that order:
+        - The current body of each bumped resource replaces its symlink, freezing it.
+        - A symlink for the new version is created.
+        - The old URIs and tag URIs are replaced by the new ones in every resource
+          referencing them (including the manifests), in a single pass over each.
+    3. It writes every change in a single all-or-nothing flush (apply).
+
+    Parameters
+    ----------
+    manager : _Manager
+        The manager of the RAD resources to bump.
+    versions : Iterable[tuple[Path | str, str]]
+        The (path or URI of the resource, new version) for each resource to bump.
+    default : str, optional
+        How to bump the version of the resources that need to be bumped along with
+        them, but are not listed in versions: "major", "minor" (default) or "patch".
+
+    Attributes
+    ----------
+    plan : BumpPlan
+        The dependency graph of all the resources to bump.
+    versions : dict[str, str]
+        URI -> the new version of each resource to bump.
+    order : tuple[str, ...]
+        The URIs of the resources in the order they are bumped in.
+    uris : dict[str, str]
+        URI -> the URI each resource will have after the bump.
+    changes : dict[Path, _Change]
+        The state each path written will have after the bump.
+    timings : dict[str, float]
+        The time (in seconds) taken by each stage.
+    """
+
+    def __init__(self, manager: _Manager, versions: Iterable[tuple[Path | str, str]], default: str = "minor") -> None:
+        self._manager = manager
+        self.timings: dict[str, float] = {}
+
+        start = perf_counter()
+
+        targets: dict[str, tuple[Resource, str]] = {}
+        for item, version in versions:
+            resource = manager[item]
+            self._validate(resource, version)
+
+            if resource.uri in targets and targets[resource.uri][1] != version:
+                raise ValueError(f"Conflicting versions requested for {resource.uri}")
+            targets[resource.uri] = (resource, version)
+
+        if not targets:
+            raise ValueError("No resources to bump")
+
+        resources = [resource for resource, _ in targets.values()]
+        self.plan = BumpPlan(resources[0], manager._resources_to_update)
+        self.plan.extend(resources[1:])
+
+        self.versions = {
+            uri: targets[uri][1] if uri in targets else str(_DEFAULT_BUMPS[default](Version(resource.version)))
+            for uri, resource in self.plan.resources.items()
+        }
+        self._requested = set(targets)
+        self.order = tuple(TopologicalSorter(self.plan.graph).static_order())
+
+        self.timings["plan"] = perf_counter() - start
+        start = perf_counter()
+
+        self.uris, self.changes = self._apply()
+
+        self.timings["rewrite"] = perf_counter() - start
+
+    @staticmethod
+    def _validate(resource: Resource, version: str) -> None:
+        """
+        Check a version is valid to bump to, see `Resource.VersionValidator`.
+        """
+        if not findall(r"^\d+\.\d+\.\d+$", version):
+            raise ValueError(f"Invalid version {version} for {resource.uri}. Must be x.y.z")
+
+        if Version(version) <= Version(resource.version):
+            raise ValueError(f"Version {version} for {resource.uri} must be greater than current version {resource.version}")
+
+    def _apply(self) -> tuple[dict[str, str], dict[Path, _Change]]:
+        """
+        Apply all the bumps in memory.
+
+        Returns
+        -------
+        tuple[dict[str, str], dict[Path, _Change]]
+            URI -> new URI of each bumped resource, and the state each path will have.
+        """
+        manager = self._manager
+
+        uris = {}
+        rewrites = {}
+        changes: dict[Path, _Change] = {}
+        for uri in self.order:
+            resource = self.plan.resources[uri]
+            new_uri, new_symlink = resource.bump_target(self.versions[uri])
+
+            symlink = resource.symlink
+            if not symlink.is_symlink():
+                raise ValueError(f"Symlink {symlink} does not exist or is not a symlink")
+            if new_symlink.exists() or new_symlink.is_symlink() or new_symlink in changes:
+                raise ValueError(f"Symlink {new_symlink} for {new_uri} already exists")
+
+            # Freeze the current version in place of its symlink, and move the symlink to the new version
+            # --> A resource is bumped before any of the resources it references (it is one of their
+            #     dependents), so its body has not been updated yet when it is frozen
+            changes[symlink] = _Change(text=resource.body)
+            changes[new_symlink] = _Change(target=os.readlink(symlink))
+
+            uris[uri] = new_uri
+            rewrites[resource.uri] = new_uri
+            rewrites[resource.tag_uri] = tag_uri(new_uri)
+
+        # Update the references throughout the resources (the manager's _update_uris), including
+        # the ids of the bumped resources themselves, all in one pass over each body
+        referrers = {resource.uri: resource for current in rewrites for resource in manager._referring_resources(current)}
+        referrers.update(self.plan.resources)
+        for referrer in referrers.values():
+            # The frozen referrers have to be bumped as well
+            if referrer.frozen and referrer.uri not in uris:
+                raise RuntimeError(f"Attempting to update the frozen resource {referrer.uri}.")
+
+            if (text := rewrite_uris(referrer.body, rewrites)) != referrer.body:
+                changes[referrer.path] = _Change(text=text)
+
+        return uris, changes
+
+    def report(self) -> str:
+        """
+        Describe the plan, the changes and the time taken.
+        """
+        lines = [f"Bumping {len(self.order)} resources ({len(self._requested)} requested), {self.plan!r}:"]
+        for uri in self.order[::-1]:
+            reason = "requested" if uri in self._requested else "dependent"
+            lines.append(f"    {uri} -> {self.uris[uri]} ({reason})")
+
+        lines.append(f"Writing {len(self.changes)} files and symlinks:")
+        repository = self._manager.repository
+        for path, change in sorted(self.changes.items()):
+            lines.append(f"    {path.relative_to(repository) if path.is_relative_to(repository) else path}: {change.describe()}")
+
+        lines.append("Timings:")
+        lines.extend(f"    {stage:<10} {elapsed * 1000:9.2f} ms" for stage, elapsed in self.timings.items())
+
+        return "\n".join(lines)
+
+    def apply(self) -> None:
+        """
+        Write all the changes to the repository and update the manager with them.
+
+        Effects
+        -------
+        - Writes every changed file and symlink, or none of them if any write fails.
+        - Replaces the changed resources in the manager with the written ones.
+        """
+        start = perf_counter()
+
+        _flush(self.changes)
+
+        manager = self._manager
+        for path in self.changes:
+            if path in manager._key_map:
+                manager._remove_resource(manager[path])
+                manager._add_resource(path)
+
+        self.timings["flush"] = perf_counter() - start
+
+
+def batch_bump(
+    repository: Path, versions: Iterable[tuple[Path | str, str]], default: str = "minor", dry_run: bool = False
+) -> BatchBump:
+    """
+    Bump many RAD resources at once, printing the plan and the time taken.
+
+    Parameters
+    ----------
+    repository : Path
+        The path to the RAD repository.
+    versions : Iterable[tuple[Path | str, str]]
+        The (path or URI of the resource, new version) for each resource to bump.
+    default : str, optional
+        How to bump the versions of the other resources that need bumping, by default "minor".
+    dry_run : bool, optional
+        Only print the plan, without writing anything, by default False.
+
+    Returns
+    -------
+    BatchBump
+        The bump that was planned (and applied unless dry_run).
+    """
+    start = perf_counter()
+    manager = _Manager(repository)
+    load = perf_counter() - start
+
+    bump = BatchBump(manager, versions, default)
+    bump.timings = {"load": load, **bump.timings}
+
+    if not dry_run:
+        bump.apply()
+
+    print(bump.report())
+    if dry_run:
+        print("Dry run, nothing was written.")
+
+    return bump
@@ -11,7 +11,7 @@ This module provides the app's functionality for bumping RAD resource versions
 
 from __future__ import annotations
 
-from collections.abc import Generator
+from collections.abc import Callable, Generator, Iterable
 from graphlib import TopologicalSorter
 
 from astropy.utils import lazyproperty
@@ -21,7 +21,84 @@ from textual.messages import Message
 
 from ._resource import Resource
 
-__all__ = ("Bump",)
+__all__ = ("Bump", "BumpPlan")
+
+
+class BumpPlan:
+    """
+    The dependency graph (DAG) of the resources affected by bumping a given RAD resource.
+
+    --> The graph is built once by walking out from the resource through the resources
+        depending on it. Each resource is only visited once, however many paths lead to
+        it (e.g. every product schema references meta/common which references meta/basic),
+        so each resource is one node in the graph and its dependents are only found once.
+
+    Parameters
+    ----------
+    resource : Resource
+        The resource that is the target of the bump updates.
+    dependents : Callable[[Resource], Iterable[Resource]]
+        A function that returns the resources which need a bump update when the passed
+        resource is bumped (the resources which directly reference it).
+
+    Attributes
+    ----------
+    resources : dict[str, Resource]
+        URI -> the resource for each resource that will have a bump update, starting
+        with the target resource.
+    graph : dict[str, set[str]]
+        The dependency graph for updating the resource.
+        --> Graph format
+            vertex (uri) -> set of vertices (uri) that depend on it
+    edges : int
+        The number of edges (dependencies) visited while building the graph.
+    """
+
+    def __init__(self, resource: Resource, dependents: Callable[[Resource], Iterable[Resource]]) -> None:
+        self.resource = resource
+        self.resources: dict[str, Resource] = {}
+        self.graph: dict[str, set[str]] = {}
+        self.edges = 0
+
+        self._dependents = dependents
+        self.extend([resource])
+
+    def extend(self, resources: Iterable[Resource]) -> None:
+        """
+        Add the resources affected by bumping more resources to the graph.
+        --> This is used to plan bumping several resources at once, the resources
+            affected by more than one of them are still only visited once.
+
+        Parameters
+        ----------
+        resources : Iterable[Resource]
+            The additional resources that are targets of bump updates.
+        """
+        dependents = self._dependents
+
+        stack = list(resources)
+        while stack:
+            current = stack.pop()
+            if current.uri in self.graph:
+                continue
+
+            self.resources[current.uri] = current
+            self.graph[current.uri] = edges = set()
+            for dependent in dependents(current):
+                if dependent.uri != current.uri:
+                    edges.add(dependent.uri)
+                    stack.append(dependent)
+                    self.edges += 1
+
+    @property
+    def nodes(self) -> int:
+        """
+        The number of nodes (resources) visited while building the graph.
+        """
+        return len(self.graph)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.resource.uri}, nodes={self.nodes}, edges={self.edges})"
 
 
 class _Bump:
@@ -29,14 +106,10 @@ class _Bump:
     This class handles the data needed to bump a given RAD resource
 
     This performs several tasks:
-    1. It builds a dependency graph for the resource and its bump updates.
+    1. It holds the dependency graph (BumpPlan) for the resource and its bump updates.
         - This is done to ensure that when the resource bumps occur, there is only
           one update per managed resource (otherwise, the managed resources may
           loose their updates).
-        - This is done via recursing through all the bump updates for the resource
-          rather than just immediately working out the full collection of bump updates.
-          This is done so that the graph can be established using the subgraphs of
-          each bump update.
     2. It provides the generator through which the updates can be applied in the
        order determined by the dependency graph.
 
@@ -44,54 +117,29 @@ class _Bump:
     ----------
     resource : Resource
         The resource that is the target of the bump updates.
-    generator : Generator[_Bump, None, None]
-        A generator that yields the _Bump instance for each direct update that
-        needs to be applied to the resource.
+    plan : BumpPlan
+        The dependency graph of the resources affected by bumping the resource.
     """
 
-    def __init__(self, resource: Resource, generator: Generator[_Bump, None, None]) -> None:
+    def __init__(self, resource: Resource, plan: BumpPlan) -> None:
         self.resource = resource
-        self._generator = generator
+        self.plan = plan
 
-    @lazyproperty
-    def _bumps(self) -> dict[str, _Bump]:
-        """
-        Store the results from the generator so that they can be reused.
-        """
-        return {update.resource.uri: update for update in self._generator}
-
-    @lazyproperty
+    @property
     def resources(self) -> dict[str, Resource]:
         """
-        This flushes out the actual resource objects that will have bump updates
+        The actual resource objects that will have bump updates
         """
-        # Start with the target resource
-        resources = {
-            self.resource.uri: self.resource,
-        }
+        return self.plan.resources
 
-        # Add in resources derived from each of the bumps
-        for bump in self._bumps.values():
-            resources.update(bump.resources)
-
-        return resources
-
-    @lazyproperty
+    @property
     def graph(self) -> dict[str, set[str]]:
         """
-        Build the dependency graph for updating the resource.
+        The dependency graph for updating the resource.
         --> Graph format
             vertex (uri) -> set of vertices (uri) that depend on it
         """
-        graph = {self.resource.uri: set(self._bumps.keys())}
-        for bump in self._bumps.values():
-            for vertex, edge in bump.graph.items():
-                if vertex in graph:
-                    graph[vertex].update(edge)
-                else:
-                    graph[vertex] = edge
-
-        return graph
+        return self.plan.graph
 
     @lazyproperty
     def _order(self) -> tuple[str]:
@@ -162,8 +210,8 @@ class Bump(_Bump, VerticalScroll):
             super().__init__()
             self.bump = bump
 
-    def __init__(self, resource: Resource, generator: Generator[_Bump, None, None], *args, **kwargs) -> None:
-        super().__init__(resource, generator)
+    def __init__(self, resource: Resource, plan: BumpPlan, *args, **kwargs) -> None:
+        super().__init__(resource, plan)
         super(_Bump, self).__init__(*args, **kwargs)
 
         # Do some initial setup
@@ -1,19 +1,24 @@
 """
 Helper functions to deduce the frozen URIs from the RAD repository's release history.
+    -> The URIs found for each release are cached in the repository's git directory,
+       keyed by the release tag and its commit, so only newly published releases
+       need to be read out of the git history.
 """
 
 from __future__ import annotations
 
+import json
+import os
 from collections.abc import Generator
 from contextlib import suppress
-from io import BytesIO
 from pathlib import Path
 from re import findall
 from tomllib import load
+from typing import TypedDict
 
 from git import Commit, Repo
+from git_reader import GitReader, resource_id
 from semantic_version import Version
-from yaml import safe_load
 
 _RAD_URLS = (
     "https://github.com/spacetelescope/rad.git",
@@ -22,8 +27,24 @@ _RAD_URLS = (
 
 __all__ = ("frozen_uris",)
 
+CACHE_FILENAME = "rad_frozen_uris.json"
+_CACHE_FORMAT = 1
 
-def frozen_uris(path: Path, base_release: Version | None = None) -> frozenset[str]:
+
+class _Release(TypedDict):
+    commit: str
+    uris: list[str]
+
+
+class _Cache(TypedDict):
+    format: int
+    # release tag -> the commit it was read from and its URIs
+    releases: dict[str, _Release]
+    # blob sha -> the URI of the resource it holds, None if it is not a resource
+    blobs: dict[str, str | None]
+
+
+def frozen_uris(path: Path, base_release: Version | None = None, cache: bool = True) -> frozenset[str]:
     """
     Get a frozenset containing all the resource URIs that are frozen by a
     rad release starting from the base release.
@@ -37,18 +58,68 @@ def frozen_uris(path: Path, base_release: Version | None = None) -> frozenset[st
         The base release version from which to start looking for frozen resources.
         If None (default), it will be read from the `pyproject.toml` file in the
         RAD repository.
+
+    cache : bool, optional
+        Reuse (and update) the URIs cached for the releases that have already been
+        read, by default True. If False, all the releases are read again and the
+        cache is rewritten.
     """
     if base_release is None:
         with (path / "pyproject.toml").open("rb") as f:
             base_release = Version(load(f)["tool"]["rad-versioning"]["base_release"])
 
+    repo = _repo(path)
+    cache_path = Path(repo.git_dir) / CACHE_FILENAME
+    cached = _load_cache(cache_path) if cache else _empty_cache()
+
     uris = set()
-    for commit in _versions(base_release, _repo(path)):
-        uris |= set(_frozen_resource_uris(commit))
+    changed = False
+    with GitReader(repo.working_dir) as reader:
+        for name, commit in _versions(base_release, repo):
+            # A release is only read if it is new, or its tag has been moved to another commit
+            if (release := cached["releases"].get(name)) is None or release["commit"] != commit.hexsha:
+                release = cached["releases"][name] = {
+                    "commit": commit.hexsha,
+                    "uris": sorted(set(_frozen_resource_uris(reader, commit, cached["blobs"]))),
+                }
+                changed = True
+
+            uris.update(release["uris"])
+
+    if changed or not cache:
+        _write_cache(cache_path, cached)
 
     return frozenset(uris)
 
 
+def _empty_cache() -> _Cache:
+    return {"format": _CACHE_FORMAT, "releases": {}, "blobs": {}}
+
+
+def _load_cache(path: Path) -> _Cache:
+    """
+    Read the cache, an empty one is returned if it is missing or unreadable.
+    """
+    try:
+        with path.open() as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return _empty_cache()
+
+    if not isinstance(cached, dict) or cached.get("format") != _CACHE_FORMAT:
+        return _empty_cache()
+
+    return cached
+
+
+def _write_cache(path: Path, cached: _Cache) -> None:
+    # Write then move so that a concurrent launch never reads a partial cache
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with tmp.open("w") as f:
+        json.dump(cached, f)
+    tmp.replace(path)
+
+
 def _repo(path: Path) -> Repo:
     """
     Pull all the tags from the RAD Repository.
@@ -67,7 +138,7 @@ def _repo(path: Path) -> Repo:
     )
 
 
-def _versions(base_release: Version, repo: Repo) -> Generator[Commit, None, None]:
+def _versions(base_release: Version, repo: Repo) -> Generator[tuple[str, Commit], None, None]:
     pattern = r"\d+\.\d+\.\d+$"
 
     versions: set[Version] = set()
@@ -79,34 +150,38 @@ def _versions(base_release: Version, repo: Repo) -> Generator[Commit, None, None
                 versions.add(version)
 
     for version in sorted(versions):
-        yield repo.commit(str(version))
+        yield str(version), repo.commit(str(version))
 
 
-def _frozen_resource_uris(release: Commit) -> Generator[str, None, None]:
+def _frozen_resource_uris(reader: GitReader, release: Commit, blobs: dict[str, str | None]) -> Generator[str, None, None]:
     """
     Generate the URIs that are in the passed release commit of the RAD repository.
+        -> Most files are unchanged between releases, so the URI found in each blob
+           is recorded in blobs, so that each blob is only read once.
+        -> The symbolic links (stored by git as blobs holding the link target) only
+           duplicate the resources they link to, so they are skipped.
 
     Parameters
     ----------
+    reader : GitReader
+        The reader for the RAD repository.
     release : Commit
         The commit object from the RAD repository.
+    blobs : dict[str, str | None]
+        The URIs of the blobs which have already been read, by their sha, which
+        is updated with the blobs read for this release.
 
     Yields
     -------
     str
         The URIs of the frozen resources in the RAD repository.
     """
+    files = reader.files(release.hexsha, suffix=".yaml")
+
+    # Only the id of each resource is needed, so the files are not fully parsed
+    for sha, content in reader.blobs(dict.fromkeys(entry.sha for entry in files if entry.sha not in blobs)):
+        blobs[sha] = resource_id(content)
 
-    def predicate(i, d):
-        """
-        Determines if a file should be included in
-        """
-        pattern = r".*\.yaml"
-        if findall(pattern, i.path):
-            return True
-        return False
-
-    for blob in release.tree.traverse(predicate=predicate):
-        data = BytesIO(blob.data_stream.read()).read().decode("utf-8")
-        if data.startswith("%YAML 1.1"):
-            yield safe_load(data)["id"]
+    for entry in files:
+        if (uri := blobs[entry.sha]) is not None:
+            yield uri
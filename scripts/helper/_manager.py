@@ -6,8 +6,10 @@ This module define's the app's handling of the collection of RAD resources
 
 from __future__ import annotations
 
-from collections.abc import Generator, Iterable
+from collections.abc import Generator, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from re import compile, escape
 from typing import Protocol
 
 from rich.style import Style
@@ -15,13 +17,19 @@ from rich.text import Text
 from textual.messages import Message
 from textual.widgets import DirectoryTree
 
-from ._bump import Bump
+from ._bump import Bump, BumpPlan
 from ._frozen import frozen_uris
-from ._resource import Resource
+from ._resource import URI_CHARACTER, URI_END, Resource, resource_uri
 from ._screen import BumpScreen, NewScreen
+from ._snapshot import ResourceEntry, git_state, load_snapshot, scan_entry, write_snapshot
 
 __all__ = ("Manager",)
 
+# A RAD URI referenced within the body of a resource
+# --> Ends at the fragment (#), anything that cannot be part of a URI in the yaml, or
+#     punctuation ending a sentence
+_REFERENCE_PATTERN = compile(rf"{escape(Resource.URI_PREFIX)}{URI_CHARACTER}+?{URI_END}")
+
 
 class _Manager:
     """
@@ -38,11 +46,22 @@ class _Manager:
         variable, which maps Paths or strings (URIs) to a resource URI. Which is used so that
         the manager can find a resource by its path or URI without needing to have a different
         access path for each type of key.
+    ---> The manager keeps an inverted index of the references between resources in the
+            _referrers: dict[str, set[str]]
+        variable, which maps each URI (or tag URI) referenced in the body of a resource
+        to the URIs of the resources referencing it, along with
+            _references: dict[str, frozenset[str]]
+        which maps each resource URI to the URIs its body references, so that the index
+        can be updated as resources are added, removed, or updated. This way finding the
+        resources which reference a given resource only touches those resources.
     ---> The manager also holds a set of URI strings that are correspond to the "frozen/locked"
         Resources which are those that cannot be updated or changed due to their public release
         status. Hence the need for "version bumping" in the first place. This set should not
         change throughout the lifetime of the manager, as it is assumed that no release will
         occur while the manager is in use.
+    ---> When the manager finds the frozen resources itself, it keeps a snapshot of them along
+        with the URI and references of each resource file (see `_snapshot`), so that the next
+        manager for the repository only needs to rescan the files which have changed.
 
     Parameters
     ----------
@@ -58,6 +77,9 @@ class _Manager:
         from the Git repository located at `path`. This process is quite slow because
         it requires going through the Git history and reading files out of it and then
         finding the URIs in those files. Hence, it should only be created once.
+    snapshot : bool, optional
+        Restore from (and update) the snapshot of the repository, by default True. The
+        snapshot is only used when neither resources nor frozen are given.
     """
 
     def __init__(
@@ -67,13 +89,41 @@ class _Manager:
         resources: dict[str, Resource] | None = None,
         key_map: dict[str | Path, str] | None = None,
         frozen: frozenset[str] | None = None,
+        snapshot: bool = True,
     ) -> None:
         self._repository = path
         self._resources = resources or {}
         self._key_map = key_map or {}
-
-        self._frozen = frozen or frozen_uris(path)
-        self._walk_resources()
+        self._referrers: dict[str, set[str]] = {}
+        self._references: dict[str, frozenset[str]] = {}
+
+        state = git_state(path) if snapshot and not resources and not frozen else None
+        if state is None:
+            self._frozen = frozen or frozen_uris(path)
+            self._walk_resources()
+            return
+
+        # The frozen URIs only need to be found again if the HEAD commit or any tag
+        # (e.g. a newly fetched release) has changed
+        saved = load_snapshot(state.path)
+        current = saved is not None and saved["head"] == state.head and saved["tags"] == state.tags
+        if current:
+            self._frozen = frozenset(saved["frozen"])
+        else:
+            self._frozen = frozen_uris(path)
+
+        try:
+            entries = self._walk_resources(None if saved is None else saved["resources"])
+        except (KeyError, TypeError, ValueError):
+            if saved is None:
+                raise
+
+            # The snapshot is inconsistent with the repository, so everything is rebuilt
+            self._resources, self._key_map, self._referrers, self._references = {}, {}, {}, {}
+            entries = self._walk_resources({})
+
+        if not current or saved["resources"] != entries:
+            write_snapshot(state, self._frozen, entries)
 
     def __getitem__(self, item: Path | str) -> Resource:
         """
@@ -97,9 +147,11 @@ class _Manager:
         Returns
         -------
         Bump
-            A Bump object that contains the resource and a generator for the resources
+            A Bump object that contains the resource and the plan of the resources
+            which need to be bumped along with it
         """
-        return Bump(self[path], self._resources_to_update(path))
+        resource = self[path]
+        return Bump(resource, BumpPlan(resource, self._resources_to_update))
 
     def bump(self, generator: Generator[Resource | None, None, None]) -> None:
         """
@@ -174,7 +226,7 @@ class _Manager:
 
         return manifests[0]
 
-    def _add_resource(self, item: Path | Resource) -> None:
+    def _add_resource(self, item: Path | Resource, references: frozenset[str] | None = None) -> None:
         """
         Add a resource to the manager.
         --> It can be either a Resource object itself or a Path to a resource, which
@@ -184,6 +236,9 @@ class _Manager:
         ----------
         item : Path | Resource
             The resource to add, either as a Resource object or a Path to a resource file.
+        references : frozenset[str] | None, optional
+            The URIs referenced by the resource's body if they are already known, by
+            default they are found from the body.
 
         Effect
         ------
@@ -205,6 +260,59 @@ class _Manager:
         self._key_map[resource.uri] = resource.uri
         self._key_map[resource.path] = resource.uri
 
+        self._index_resource(resource, references)
+
+    def _index_resource(self, resource: Resource, references: frozenset[str] | None = None) -> None:
+        """
+        Add (or refresh) the references made by the resource's body in the inverted index.
+
+        Parameters
+        ----------
+        resource : Resource
+            The resource to index, which is under management.
+        references : frozenset[str] | None, optional
+            The URIs referenced by the resource's body if they are already known, by
+            default they are found from the body.
+        """
+        self._unindex_resource(resource.uri)
+
+        if references is None:
+            references = frozenset(_REFERENCE_PATTERN.findall(resource.body))
+        self._references[resource.uri] = references
+        for reference in references:
+            self._referrers.setdefault(reference, set()).add(resource.uri)
+
+    def _unindex_resource(self, uri: str) -> None:
+        """
+        Remove the references made by a resource from the inverted index.
+
+        Parameters
+        ----------
+        uri : str
+            The URI of the resource to remove from the index.
+        """
+        for reference in self._references.pop(uri, ()):
+            referrers = self._referrers[reference]
+            referrers.discard(uri)
+            if not referrers:
+                del self._referrers[reference]
+
+    def _referring_resources(self, uri: str) -> list[Resource]:
+        """
+        Get the resources whose body references the given URI.
+
+        Parameters
+        ----------
+        uri : str
+            The URI (or tag URI) to find the references to.
+
+        Returns
+        -------
+        list[Resource]
+            The referencing resources, in URI order.
+        """
+        return [self._resources[referrer] for referrer in sorted(self._referrers.get(uri, ()))]
+
     def _get_path(self, item: Path | str) -> str:
         """
         Turn a Path or URI into a resource URI.
@@ -245,6 +353,8 @@ class _Manager:
         del self._key_map[resource.path]
         del self._resources[resource.uri]
 
+        self._unindex_resource(resource.uri)
+
     def _update_resource(self, new_resource: Resource) -> None:
         """
         Update an existing resource in the manager with a new version of it
@@ -276,45 +386,51 @@ class _Manager:
         self._add_resource(new_resource)
 
         # Update the URIs related to the new resource throughout the manager
-        self._update_uri(current_resource.uri, new_resource.uri)
-        self._update_uri(current_resource.tag_uri, new_resource.tag_uri)
+        self._update_uris(
+            {
+                current_resource.uri: new_resource.uri,
+                current_resource.tag_uri: new_resource.tag_uri,
+            }
+        )
 
-    def _update_uri(self, current_uri: str, new_uri: str) -> None:
+    def _update_uris(self, uris: Mapping[str, str]) -> None:
         """
         Performs an update to the resources in the manager that have a reference
-        to the current URI and replaces it with the new URI.
+        to any of the current URIs and replaces them with the new URIs.
+        --> Each resource referencing any of the URIs is only rewritten once, so this
+            can be used to update the URIs for many resources across the manager at once.
 
         Parameters
         ----------
-        current_uri : str
-            The current URI to update from.
-        new_uri : str
-            The new URI to update to.
+        uris : Mapping[str, str]
+            Current URI -> new URI, for each URI (or tag URI) to update.
 
         Effect
         ------
-        Updates all resources in the manager that reference the current URI to the new one.
-        """
-        for resource in self._resources.values():
-            # Only update the resources that currently reference the URI in their body
-            if current_uri in resource.body:
-                # Check to make sure that the resource is not frozen
-                # --> Something has gone wrong if we are trying to update a frozen resource
-                if resource.frozen:
-                    raise RuntimeError("Attempting to update a frozen resource.")
-
-                # Run the update on the resource
-                new_resource = resource.update_uri(current_uri, new_uri)
-
-                # Check that we have not changed the URI between new_resource
-                # and the old one. This change should be happening prior to this
-                # method being called. Meaning that something has gone wrong
-                # if the URIs do not match
-                if new_resource.uri != resource.uri:
-                    raise RuntimeError("This method should not be used to change the URI of a resource.")
-
-                # Update the resource in the manager
-                self._resources[new_resource.uri] = new_resource
+        Updates all resources in the manager that reference the current URIs to the new ones.
+        """
+        # Only update the resources that currently reference the URIs in their body
+        # --> The index is updated during the loop, hence the resources are found first
+        referrers = {resource.uri: resource for current_uri in uris for resource in self._referring_resources(current_uri)}
+        for resource in referrers.values():
+            # Check to make sure that the resource is not frozen
+            # --> Something has gone wrong if we are trying to update a frozen resource
+            if resource.frozen:
+                raise RuntimeError("Attempting to update a frozen resource.")
+
+            # Run the update on the resource
+            new_resource = resource.update_uris(uris)
+
+            # Check that we have not changed the URI between new_resource
+            # and the old one. This change should be happening prior to this
+            # method being called. Meaning that something has gone wrong
+            # if the URIs do not match
+            if new_resource.uri != resource.uri:
+                raise RuntimeError("This method should not be used to change the URI of a resource.")
+
+            # Update the resource in the manager
+            self._resources[new_resource.uri] = new_resource
+            self._index_resource(new_resource)
 
     def add_tag_entry(self, entry: str) -> None:
         """
@@ -334,42 +450,85 @@ class _Manager:
 
         # Update the resource in the manager
         self._resources[new_manifest.uri] = new_manifest
+        self._index_resource(new_manifest)
 
-    def _resources_to_update(self, path: Path | str) -> Generator[Bump, None, None]:
+    def _resources_to_update(self, update: Resource) -> Generator[Resource, None, None]:
         """
-        Generator for all the resources that need to be updated when the given path
-        is updated.
+        Generator for the resources that need to be updated directly when the given
+        resource is updated.
 
-        --> This works through the cascade of resources that need to be updated
-            if a schema is updated via a recursive search through the resources
+        --> The full cascade of resources that need to be updated is worked out by
+            the BumpPlan, which follows this through the resources
 
         Parameters
         ----------
-        path : Path | str
-            The path to the resource that is being updated.
+        update : Resource
+            The resource that is being updated.
 
         Yields
         ------
-        Bump
-            A Bump object for a resource that directly references the resource
-            being bumped.
+        Resource
+            A frozen resource that directly references the resource being bumped.
         """
-        update = self[path]
-
-        for resource in self._resources.values():
+        referrers = {
+            resource.uri: resource
+            for resource in (*self._referring_resources(update.uri), *self._referring_resources(update.tag_uri))
+        }
+        for resource in referrers.values():
             if resource is update:
                 continue
 
-            if (update.uri in resource.body or update.tag_uri in resource.body) and resource.frozen:
-                yield Bump(resource, self._resources_to_update(resource.path))
+            if resource.frozen:
+                yield resource
+
+    @staticmethod
+    def _scan_body(body: str) -> tuple[str, list[str]]:
+        """
+        Find the URI of a resource and the URIs its body references.
+        """
+        return resource_uri(body), sorted(set(_REFERENCE_PATTERN.findall(body)))
 
-    def _walk_resources(self) -> None:
+    def _walk_resources(self, snapshot: dict[str, ResourceEntry] | None = None) -> dict[str, ResourceEntry]:
         """
         Walk through the resources in the repository and add them to the manager.
         --> This is used to initialize the manager with the resources in the repository.
+        --> Any resources the manager was created with are indexed first, the ones
+            added from the repository are indexed as they are added.
+        --> The files are read (and their ids found) on a thread pool, only the id
+            line of each is scanned as the yaml is parsed lazily by the resources.
+        --> The URI and references recorded in the snapshot are reused for the files
+            which have not changed since.
+
+        Parameters
+        ----------
+        snapshot : dict[str, ResourceEntry] | None, optional
+            What the snapshot recorded for each resource file, by default nothing.
+
+        Returns
+        -------
+        dict[str, ResourceEntry]
+            What was found for each resource file, for the next snapshot.
         """
-        for path in (self._repository / "latest").glob("**/*.yaml"):
-            self._add_resource(path)
+        for resource in self._resources.values():
+            self._index_resource(resource)
+
+        snapshot = snapshot or {}
+        paths = {path.relative_to(self._repository).as_posix(): path for path in (self._repository / "latest").glob("**/*.yaml")}
+
+        def scan(key: str) -> tuple[str, ResourceEntry]:
+            return scan_entry(paths[key], snapshot.get(key), self._scan_body)
+
+        entries = {}
+        with ThreadPoolExecutor() as executor:
+            for key, (body, entry) in zip(paths, executor.map(scan, paths), strict=True):
+                uri = entry["uri"]
+                if snapshot and uri in self._resources:
+                    raise ValueError(f"Resource {uri} found in more than one file")
+
+                self._add_resource(Resource(uri, paths[key], self._repository, body, False), frozenset(entry["references"]))
+                entries[key] = entry
+
+        return entries
 
 
 class Manager(_Manager, DirectoryTree):
@@ -525,9 +684,12 @@ class Manager(_Manager, DirectoryTree):
         uri = edited_resource.uri
         tag_uri = edited_resource.tag_uri
 
-        edited_resource = (
-            edited_resource.update_uri(uri, current_resource.uri).update_uri(tag_uri, current_resource.tag_uri).overwrite()
-        )
+        edited_resource = edited_resource.update_uris(
+            {
+                uri: current_resource.uri,
+                tag_uri: current_resource.tag_uri,
+            }
+        ).overwrite()
 
         # Remove the current resource from the manager and add the new one
         self._remove_resource(current_resource)
@@ -7,14 +7,15 @@ This module defines the app's handling of individual RAD resources.
 from __future__ import annotations
 
 from collections.abc import Mapping
+from functools import lru_cache
 from pathlib import Path
-from re import findall, sub
+from re import Pattern, compile, escape, findall, sub
 from shutil import copyfile
 from textwrap import dedent, indent
 from typing import Any, Self
 
-from asdf.treeutil import walk_and_modify
 from astropy.utils import lazyproperty
+from git_reader import resource_id
 from rich.style import NULL_STYLE
 from rich.text import Text
 from semantic_version import Version
@@ -25,16 +26,88 @@ from textual.validation import ValidationResult, Validator
 from textual.widgets import Input, Label
 from yaml import safe_load
 
-__all__ = ("Resource",)
+from rad._fingerprint import Fingerprint, fingerprint
 
-_IGNORED_KEYWORDS = (
-    "archive_meta",
-    "archive_catalog",
-    "sdf",
-    "title",
-    "description",
-    "propertyOrder",
-)
+__all__ = ("URI_CHARACTER", "URI_END", "Resource", "read_resource", "resource_uri", "rewrite_uris", "tag_uri")
+
+# A character which can be part of a URI in the yaml, anything else ends it
+# --> e.g. the fragment (#), whitespace, quotes, parentheses, or the flow delimiters
+URI_CHARACTER = r"[^\s'\"#,\[\]{}()]"
+
+# The end of a URI, which can be followed by punctuation ending a sentence in prose (e.g. in
+# a description), but not by anything more of a URI
+# --> so that e.g. "common-1.1.0." ends at "common-1.1.0", but "common-1.1.0.1" does not
+URI_END = rf"(?=[.:;!?]*(?!{URI_CHARACTER}))"
+
+
+@lru_cache(maxsize=64)
+def _uris_pattern(uris: frozenset[str]) -> Pattern:
+    """
+    Compile a single pattern matching any of the URIs, but only as a whole URI.
+    --> The longest URIs are tried first, and the lookarounds make sure that a URI is
+        never matched as part of a longer one, e.g. common-1.1.0 inside common-1.1.01
+    """
+    alternatives = "|".join(escape(uri) for uri in sorted(uris, key=len, reverse=True))
+    return compile(rf"(?<!{URI_CHARACTER})(?:{alternatives}){URI_END}")
+
+
+def rewrite_uris(body: str, uris: Mapping[str, str]) -> str:
+    """
+    Replace every (whole) occurrence of any of the URIs in a body, in a single pass.
+
+    Parameters
+    ----------
+    body : str
+        The body (text) to rewrite.
+    uris : Mapping[str, str]
+        Current URI -> new URI, for each URI (or tag URI) to replace.
+
+    Returns
+    -------
+    str
+        The rewritten body.
+    """
+    if not (uris := {current: new for current, new in uris.items() if current != new}):
+        return body
+
+    return _uris_pattern(frozenset(uris)).sub(lambda match: uris[match.group(0)], body)
+
+
+def resource_uri(body: str) -> str:
+    """
+    Get the URI ("id:") of a resource from its body.
+    --> The id line is found without parsing the yaml, which is only done if the
+        id cannot be found that way
+    """
+    if (uri := resource_id(body.encode())) is None:
+        uri = safe_load(body)["id"]
+
+    return uri
+
+
+def read_resource(path: Path) -> tuple[str, str]:
+    """
+    Read the URI and body of the resource at a path, without parsing its yaml.
+
+    Parameters
+    ----------
+    path : Path
+        The path to the resource.
+
+    Returns
+    -------
+    tuple[str, str]
+        The URI and the body of the resource.
+    """
+    body = path.read_text()
+    return resource_uri(body), body
+
+
+def tag_uri(uri: str) -> str:
+    """
+    Get the tag URI for a resource URI, see `_Resource.tag_uri`.
+    """
+    return sub(r"manifests", r"extensions", sub(r"schemas", r"tags", "".join(uri.split("/tagged_scalars"))))
 
 
 class _Resource:
@@ -50,7 +123,7 @@ class _Resource:
         - (computes) the symlink for the resource
 
     2. It provides methods to update the resource:
-        - update_uri: finds and replaces a given uri with a new one
+        - update_uri(s): finds and replaces given uri(s) with new one(s)
             - Used to update any URI reference in the resource to some new URI
         - bump: bumps the version of the resource
             - Updates the symlink's filename to reflect the new version
@@ -87,10 +160,9 @@ class _Resource:
     def from_path(cls, path: Path, repository: Path, *args, **kwargs) -> Self:
         """
         Construct the information about the resource from a path to the resource.
+        --> Only the id line is read, the yaml is parsed if and when it is needed
         """
-        body = path.read_text()
-        yaml = safe_load(body)
-        uri = yaml["id"]
+        uri, body = read_resource(path)
 
         return cls(uri, path, repository, body, False, *args, **kwargs)
 
@@ -99,8 +171,7 @@ class _Resource:
         """
         Construct the information about the resource from a body of text.
         """
-        yaml = safe_load(body)
-        uri = yaml["id"]
+        uri = resource_uri(body)
 
         # The URI is expected to be prefixed with either SCHEMA_URI_PREFIX or MANIFEST_URI_PREFIX
         # --> Remove each of those prefixes to get the correct uri_suffix
@@ -243,7 +314,7 @@ class _Resource:
             --> Pattern is replace `manifests` with `extensions`
 
         """
-        return sub(r"manifests", r"extensions", sub(r"schemas", r"tags", "".join(self.uri.split("/tagged_scalars"))))
+        return tag_uri(self.uri)
 
     @lazyproperty
     def version(self) -> str:
@@ -345,6 +416,14 @@ class _Resource:
         """
         return safe_load(self.body)
 
+    @lazyproperty
+    def fingerprint(self) -> Fingerprint:
+        """
+        Get the structural fingerprint of the yaml body, ignoring the keywords
+        which do not matter for versioning.
+        """
+        return fingerprint(self.yaml)
+
     @lazyproperty
     def title(self) -> str | None:
         """
@@ -405,12 +484,51 @@ class _Resource:
         ----
         - Modifies the resource file in place on disk.
         """
-        new_body = self.body.replace(current_uri, new_uri)
+        return self.update_uris({current_uri: new_uri})
+
+    def update_uris(self, uris: Mapping[str, str]) -> _Resource:
+        """
+        Update all instances of each of the passed URIs in the resource to the new ones,
+        in a single pass over the body.
+
+        Parameters
+        ----------
+        uris : Mapping[str, str]
+            Current URI -> new URI, for each URI (or tag URI) to update.
+
+        Returns
+        -------
+        _Resource
+            The updated resource.
+
+        Note
+        ----
+        - Modifies the resource file in place on disk.
+        - Only whole URIs are updated, never a URI which is part of a longer one.
+        """
+        new_body = rewrite_uris(self.body, uris)
         with self.path.open("w") as f:
             f.write(new_body)
 
         return type(self).from_path(self.path, self.repository)
 
+    def bump_target(self, version: str) -> tuple[str, Path]:
+        """
+        Find the URI and symlink path the resource will have once bumped to a version.
+
+        Parameters
+        ----------
+        version : str
+            The version to bump the resource to.
+
+        Returns
+        -------
+        tuple[str, Path]
+            The bumped URI and the path of the bumped symlink.
+        """
+        uri = self.uri.replace(self.version, version)
+        return uri, self._find_symlink_path(self.path, version, uri)
+
     def bump(self, version: str) -> _Resource:
         """
         Bump the version of the resource.
@@ -421,8 +539,7 @@ class _Resource:
             3. Update the resource's URI to the new version
         """
         # Find the new uri and path for the bumped version
-        uri = self.uri.replace(self.version, version)
-        path = self._find_symlink_path(self.path, version, uri)
+        uri, path = self.bump_target(version)
 
         symlink = self.symlink
         if not symlink.exists():
@@ -542,41 +659,6 @@ class _Resource:
 
         return resource
 
-    @staticmethod
-    def _filter_ignored_keys(tree: dict[str, Any]):
-        """
-        Filter out the ignored keys from the dictionary.
-
-        Parameters
-        ----------
-        tree :
-            The tree to filter
-
-        Returns
-        -------
-        The filtered tree
-        """
-
-        def filter_ignored_keys(node: Any) -> Any:
-            """
-            Filter out the ignored keys from the dictionary.
-
-            Parameters
-            ----------
-            node : Any
-                node to filter
-
-            Returns
-            -------
-            dict
-                The filtered dictionary
-            """
-            if isinstance(node, Mapping):
-                return {key: value for key, value in node.items() if key not in _IGNORED_KEYWORDS}
-            return node
-
-        return walk_and_modify(tree, callback=filter_ignored_keys)
-
     def bump_required(self, body: str) -> bool:
         """
         Check if the body of the resource will require a bump in version if
@@ -593,7 +675,7 @@ class _Resource:
             True if the body requires a bump, False otherwise.
         """
 
-        return self._filter_ignored_keys(self.yaml) != self._filter_ignored_keys(safe_load(body))
+        return self.fingerprint != fingerprint(safe_load(body))
 
 
 class Resource(_Resource, HorizontalGroup):
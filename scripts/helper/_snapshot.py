@@ -0,0 +1,162 @@
+"""
+Snapshots of the state of the app's manager, so that relaunching the app neither
+searches the git history for the frozen URIs nor rescans the unchanged resources.
+    -> The snapshot is kept in the repository's git directory. The frozen URIs in it
+       are keyed by the HEAD commit and the tags (the releases they are found from),
+       and the URI and references of each resource by the stat and hash of its file,
+       so only the files which changed are rescanned.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Callable
+from hashlib import sha256
+from pathlib import Path
+from typing import NamedTuple, TypedDict
+
+from git import GitCommandError, InvalidGitRepositoryError, NoSuchPathError, Repo
+
+__all__ = ("GitState", "ResourceEntry", "Snapshot", "git_state", "load_snapshot", "scan_entry", "write_snapshot")
+
+SNAPSHOT_FILENAME = "rad_helper_snapshot.json"
+_SNAPSHOT_FORMAT = 3
+
+
+class ResourceEntry(TypedDict):
+    uri: str
+    sha256: str
+    mtime_ns: int
+    size: int
+    # The URIs (and tag URIs) referenced by the body of the resource
+    references: list[str]
+
+
+class Snapshot(TypedDict):
+    format: int
+    # The HEAD commit and the tags the frozen URIs were found for
+    head: str
+    tags: str
+    frozen: list[str]
+    # path (relative to the repository) -> what was found in the resource file
+    resources: dict[str, ResourceEntry]
+
+
+class GitState(NamedTuple):
+    path: Path
+    head: str
+    # The hash of every tag and the object it points to
+    tags: str
+
+
+def git_state(repository: Path) -> GitState | None:
+    """
+    Find where the snapshot of a repository is kept, the commit it is checked out at,
+    and its tags.
+        -> None if the repository is not a git repository (or has no commits), in which
+           case no snapshot can be kept
+    """
+    try:
+        repo = Repo(repository)
+        tags = repo.git.for_each_ref("refs/tags", format="%(refname) %(objectname)", sort="refname")
+        return GitState(Path(repo.git_dir) / SNAPSHOT_FILENAME, repo.head.commit.hexsha, sha256(tags.encode()).hexdigest())
+    except (InvalidGitRepositoryError, NoSuchPathError, GitCommandError, ValueError):
+        return None
+
+
+def _valid_entry(entry: object) -> bool:
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("uri"), str)
+        and isinstance(entry.get("sha256"), str)
+        and isinstance(entry.get("mtime_ns"), int)
+        and isinstance(entry.get("size"), int)
+        and isinstance(entry.get("references"), list)
+    )
+
+
+def load_snapshot(path: Path) -> Snapshot | None:
+    """
+    Read a snapshot, None if it is missing, unreadable, or not in the expected form.
+    """
+    try:
+        with path.open() as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        not isinstance(snapshot, dict)
+        or snapshot.get("format") != _SNAPSHOT_FORMAT
+        or not isinstance(snapshot.get("head"), str)
+        or not isinstance(snapshot.get("tags"), str)
+        or not isinstance(snapshot.get("frozen"), list)
+        or not isinstance(snapshot.get("resources"), dict)
+        or not all(_valid_entry(entry) for entry in snapshot["resources"].values())
+    ):
+        return None
+
+    return snapshot
+
+
+def write_snapshot(state: GitState, frozen: frozenset[str], resources: dict[str, ResourceEntry]) -> Snapshot:
+    """
+    Write the snapshot of a repository in the given state, returning what was written.
+    """
+    snapshot: Snapshot = {
+        "format": _SNAPSHOT_FORMAT,
+        "head": state.head,
+        "tags": state.tags,
+        "frozen": sorted(frozen),
+        "resources": resources,
+    }
+
+    # Write then move so that a concurrent launch never reads a partial snapshot
+    tmp = state.path.with_suffix(f".{os.getpid()}.tmp")
+    with tmp.open("w") as f:
+        json.dump(snapshot, f)
+    tmp.replace(state.path)
+
+    return snapshot
+
+
+def scan_entry(
+    path: Path, entry: ResourceEntry | None, scan: Callable[[str], tuple[str, list[str]]]
+) -> tuple[str, ResourceEntry]:
+    """
+    Read a resource file, reusing what the snapshot recorded for it if it is unchanged.
+        -> The file is unchanged if its stat matches the snapshot, or failing that its hash
+
+    Parameters
+    ----------
+    path : Path
+        The path to the resource file.
+    entry : ResourceEntry | None
+        What the snapshot recorded for the file, None if it is not in the snapshot.
+    scan : Callable[[str], tuple[str, list[str]]]
+        Find the URI and references of a resource from its body, for a changed file.
+
+    Returns
+    -------
+    tuple[str, ResourceEntry]
+        The body of the resource, and what is recorded for it.
+    """
+    stat = path.stat()
+    body = path.read_text()
+
+    if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return body, entry
+
+    digest = sha256(body.encode()).hexdigest()
+    if entry is not None and entry["sha256"] == digest:
+        return body, {**entry, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    uri, references = scan(body)
+    return body, {
+        "uri": uri,
+        "sha256": digest,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "references": references,
+    }
@@ -1,11 +1,58 @@
 from __future__ import annotations
 
+from argparse import ArgumentParser
 from pathlib import Path
 
 REPO_DIR = Path(__file__).parent.parent
 
+
+def _argparser() -> ArgumentParser:
+    """Create the argument parser for the helper script."""
+    parser = ArgumentParser("rad_helper", description="Manage the RAD resources, by default through the interactive app.")
+    commands = parser.add_subparsers(dest="command")
+
+    bump = commands.add_parser("bump", help="Bump the versions of many resources at once, without the app.")
+    bump.add_argument(
+        "versions",
+        nargs="+",
+        metavar="RESOURCE=VERSION",
+        help="The path (e.g. latest/meta/basic.yaml) or URI of a resource and the version to bump it to.",
+    )
+    bump.add_argument(
+        "--default",
+        choices=("major", "minor", "patch"),
+        default="minor",
+        help="How to bump the versions of the other resources that need bumping as a result. Defaults to minor.",
+    )
+    bump.add_argument(
+        "--dry-run",
+        "-n",
+        action="store_true",
+        help="Only print the plan for the bump, without writing anything.",
+    )
+
+    return parser
+
+
+def _version(item: str) -> tuple[Path | str, str]:
+    """Split a RESOURCE=VERSION argument."""
+    resource, _, version = item.rpartition("=")
+    if not resource:
+        raise ValueError(f"Expected RESOURCE=VERSION, got {item}")
+
+    return (resource if resource.startswith("asdf://") else Path(resource).resolve()), version
+
+
 if __name__ == "__main__":
-    from helper import RadApp
+    args = _argparser().parse_args()
+
+    if args.command == "bump":
+        from helper import batch_bump
+
+        batch_bump(REPO_DIR.resolve(), [_version(item) for item in args.versions], args.default, args.dry_run)
+
+    else:
+        from helper import RadApp
 
-    app = RadApp(REPO_DIR)
-    app.run()
+        app = RadApp(REPO_DIR)
+        app.run()
@@ -0,0 +1,44 @@
+"""
+Generate the index and fingerprints of the RAD resources when the package is built.
+    -> They are written next to the resources copied into the build, so they always
+       describe exactly the resources shipped with them, see `rad._index` and
+       `rad._fingerprint`.
+"""
+
+import sys
+from pathlib import Path
+
+from setuptools import setup
+from setuptools.command.build_py import build_py
+
+
+class BuildPy(build_py):
+    """
+    Build the package, then index and fingerprint the resources copied into it.
+    """
+
+    def run(self):
+        super().run()
+
+        # An editable install serves the resources from the source checkout, which
+        # is walked instead as its resources are edited
+        if getattr(self, "editable_mode", False):
+            return
+
+        # The package being built is the one imported
+        build_lib = str(Path(self.build_lib).absolute())
+        sys.path.insert(0, build_lib)
+        try:
+            from rad._fingerprint import write_fingerprints
+            from rad._index import write_index
+
+            root = Path(build_lib) / "rad" / "resources"
+            index = write_index(root)
+            write_fingerprints(root, index)
+        finally:
+            sys.path.remove(build_lib)
+
+        self.announce(f"indexed and fingerprinted {len(index['resources'])} RAD resources", level=2)
+
+
+setup(cmdclass={"build_py": BuildPy})
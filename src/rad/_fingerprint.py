@@ -0,0 +1,324 @@
+"""
+Structural fingerprints of the RAD schemas.
+
+Whether a schema has changed in a way that matters for versioning (e.g. whether a
+frozen schema has been modified) is decided by its structure, ignoring the keywords
+which are only documentation or archive information. Rather than filtering and
+comparing whole trees, each schema is fingerprinted once: every subtree is given a
+hash which does not depend on the order of the keys of its mappings, so comparing
+two schemas is a comparison of two hashes. When they differ, the hashes of the
+subtrees lead straight to the paths that changed.
+
+The fingerprints of all the resources are generated when the package is built (see
+``setup.py``) and shipped inside it as ``fingerprints.json``, recording the structure
+of each resource the release contains. The versioning checks do not use them: they
+fingerprint the resources of each release read out of the release history (the git
+tags), and compare the current resources against those.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Mapping
+from hashlib import blake2b
+from typing import TYPE_CHECKING
+
+from ._index import _resources_root, build_index
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+    from importlib.resources.abc import Traversable
+    from typing import Any, TypedDict
+
+    from ._index import ResourceIndex
+
+    class FingerprintManifest(TypedDict):
+        format: int
+        ignored: list[str]
+        fingerprints: dict[str, str]
+
+
+__all__ = [
+    "FINGERPRINTS_FILENAME",
+    "IGNORED_KEYWORDS",
+    "Fingerprint",
+    "build_fingerprints",
+    "fingerprint",
+    "load_fingerprints",
+    "read_fingerprints",
+    "write_fingerprints",
+]
+
+FINGERPRINTS_FILENAME = "fingerprints.json"
+# Changes whenever the fingerprints computed for the same trees would change
+FINGERPRINTS_FORMAT = 1
+
+# The keywords in the schemas that we claim don't matter for schema versioning
+IGNORED_KEYWORDS = (
+    "archive_meta",
+    "archive_catalog",
+    "sdf",
+    "title",
+    "description",
+    "propertyOrder",
+)
+
+_DIGEST_SIZE = 16
+
+
+def _digest(kind: bytes, parts: Iterable[bytes]) -> bytes:
+    digest = blake2b(kind, digest_size=_DIGEST_SIZE)
+    for part in parts:
+        digest.update(part)
+
+    return digest.digest()
+
+
+def _scalar(node: Any) -> bytes:
+    # The type is included, so that e.g. 1 and "1" or True are told apart
+    return _digest(b"S", (f"{type(node).__name__}:{node!r}".encode(),))
+
+
+def _pointer(path: str, key: Any) -> str:
+    """
+    Extend a JSON pointer with a key.
+    """
+    return f"{path}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+class Fingerprint:
+    """
+    The structural hash of a (sub)tree, along with those of its children.
+
+    Two fingerprints are equal if, and only if, the trees they were made from are
+    the same other than for the order of the keys in their mappings.
+
+    Parameters
+    ----------
+    digest : bytes
+        The hash of the tree.
+    children : dict[Any, Fingerprint] | list[Fingerprint] | None, optional
+        The fingerprints of the values of a mapping or the items of a list, by
+        default None for a scalar.
+    """
+
+    __slots__ = ("children", "digest")
+
+    def __init__(self, digest: bytes, children: dict[Any, Fingerprint] | list[Fingerprint] | None = None) -> None:
+        self.digest = digest
+        self.children = children
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Fingerprint):
+            return NotImplemented
+
+        return self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"Fingerprint({self.hexdigest})"
+
+    @classmethod
+    def fromhex(cls, hexdigest: str) -> Fingerprint:
+        """
+        Recreate a fingerprint from its hash alone, e.g. as recorded in a manifest.
+            -> It has no children, so any change is reported at its root
+        """
+        return cls(bytes.fromhex(hexdigest))
+
+    @property
+    def hexdigest(self) -> str:
+        return self.digest.hex()
+
+    def changed_paths(self, other: Fingerprint, path: str = "") -> Generator[str, None, None]:
+        """
+        Find where the tree of another fingerprint differs from this one.
+            -> Only the subtrees whose hashes differ are descended into
+
+        Parameters
+        ----------
+        other : Fingerprint
+            The fingerprint to compare against.
+        path : str, optional
+            The JSON pointer to this tree, by default the root.
+
+        Yields
+        ------
+        str
+            The JSON pointer to each value which was added, removed, or changed.
+        """
+        if self.digest == other.digest:
+            return
+
+        if isinstance(self.children, dict) and isinstance(other.children, dict):
+            for key in {**self.children, **other.children}:
+                if key in self.children and key in other.children:
+                    yield from self.children[key].changed_paths(other.children[key], _pointer(path, key))
+                else:
+                    yield _pointer(path, key)
+
+        elif isinstance(self.children, list) and isinstance(other.children, list) and len(self.children) == len(other.children):
+            for index, (child, other_child) in enumerate(zip(self.children, other.children, strict=True)):
+                yield from child.changed_paths(other_child, _pointer(path, index))
+
+        else:
+            yield path
+
+
+def fingerprint(tree: Any, ignored: Iterable[str] = IGNORED_KEYWORDS, ordered: bool = True) -> Fingerprint:
+    """
+    Fingerprint the structure of a tree (e.g. a schema).
+
+    Parameters
+    ----------
+    tree : Any
+        The tree, made of mappings, lists and scalars.
+    ignored : Iterable[str], optional
+        The keys to leave out of every mapping in the tree, by default the
+        keywords that don't matter for schema versioning.
+    ordered : bool, optional
+        Whether the order of the items of the lists matters, by default True. If
+        False, the lists are compared as the sets of their items (neither their
+        order nor any repeats matter), in which case `Fingerprint.changed_paths`
+        should not be used.
+
+    Returns
+    -------
+    Fingerprint
+        The fingerprint of the tree.
+    """
+    ignored = frozenset(ignored)
+
+    def build(node: Any) -> Fingerprint:
+        if isinstance(node, Mapping):
+            children = {key: build(value) for key, value in node.items() if key not in ignored}
+            # The (fixed size) hashes of the entries are sorted, so the order of the keys does not matter
+            entries = sorted(_scalar(key) + child.digest for key, child in children.items())
+            return Fingerprint(_digest(b"M", entries), children)
+
+        if isinstance(node, list | tuple):
+            items = [build(item) for item in node]
+            digests = [item.digest for item in items] if ordered else sorted({item.digest for item in items})
+            return Fingerprint(_digest(b"L" if ordered else b"U", digests), items)
+
+        return Fingerprint(_scalar(node))
+
+    return build(tree)
+
+
+def _load_yaml(content: bytes) -> Any:
+    import yaml
+
+    # The libyaml loader is much faster, when it is available
+    return yaml.load(content, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))  # noqa: S506
+
+
+def build_fingerprints(root: Traversable | None = None, index: ResourceIndex | None = None) -> FingerprintManifest:
+    """
+    Build the manifest of the fingerprints of all the resources in the index.
+
+    Parameters
+    ----------
+    root : Traversable, optional
+        The resources directory, by default the ``rad.resources`` package directory.
+    index : ResourceIndex, optional
+        The index of the resources to fingerprint, by default it is built from ``root``.
+
+    Returns
+    -------
+    FingerprintManifest
+        URI -> hex digest of the fingerprint of every resource, along with the
+        format and the ignored keywords they were computed with.
+    """
+    root = _resources_root() if root is None else root
+    index = build_index(root) if index is None else index
+
+    return {
+        "format": FINGERPRINTS_FORMAT,
+        "ignored": list(IGNORED_KEYWORDS),
+        "fingerprints": {
+            uri: fingerprint(_load_yaml((root / entry["path"]).read_bytes())).hexdigest
+            for uri, entry in index["resources"].items()
+        },
+    }
+
+
+def write_fingerprints(root: Traversable | None = None, index: ResourceIndex | None = None) -> FingerprintManifest:
+    """
+    Build the fingerprint manifest and write it into the resources directory.
+
+    Parameters
+    ----------
+    root : Traversable, optional
+        The resources directory, by default the ``rad.resources`` package directory.
+    index : ResourceIndex, optional
+        The index of the resources to fingerprint, by default it is built from ``root``.
+
+    Returns
+    -------
+    FingerprintManifest
+        The manifest that was written.
+    """
+    root = _resources_root() if root is None else root
+    manifest = build_fingerprints(root, index)
+
+    with (root / FINGERPRINTS_FILENAME).open("w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+    return manifest
+
+
+def read_fingerprints(content: bytes) -> FingerprintManifest | None:
+    """
+    Read a fingerprint manifest, e.g. one shipped with a past release.
+
+    Parameters
+    ----------
+    content : bytes
+        The content of the manifest file.
+
+    Returns
+    -------
+    FingerprintManifest | None
+        The manifest, or None if it is unreadable or its fingerprints were not
+        computed the same way as they are now.
+    """
+    try:
+        manifest = json.loads(content)
+    except ValueError:
+        return None
+
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("format") != FINGERPRINTS_FORMAT
+        or manifest.get("ignored") != list(IGNORED_KEYWORDS)
+        or not isinstance(manifest.get("fingerprints"), dict)
+    ):
+        return None
+
+    return manifest
+
+
+def load_fingerprints(root: Traversable | None = None) -> FingerprintManifest | None:
+    """
+    Read the fingerprint manifest shipped with the resources.
+
+    Parameters
+    ----------
+    root : Traversable, optional
+        The resources directory, by default the ``rad.resources`` package directory.
+
+    Returns
+    -------
+    FingerprintManifest | None
+        The manifest, or None if it is missing or unusable, see `read_fingerprints`.
+    """
+    root = _resources_root() if root is None else root
+
+    try:
+        return read_fingerprints((root / FINGERPRINTS_FILENAME).read_bytes())
+    except OSError:
+        return None
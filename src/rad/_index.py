@@ -0,0 +1,352 @@
+"""
+Build and read the prebuilt index of the RAD resources.
+
+The index maps every resource URI shipped in ``rad.resources`` to the file that
+holds it (relative to the resources directory) along with the size and a content
+hash of that file. It is generated from the resources copied into the package when
+it is built (see ``setup.py``), so that the ASDF resource mappings do not need to
+walk the resources directory tree every time ASDF is initialized. A source checkout
+has no index, so its resources directory is always walked.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+from importlib.resources import files
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Generator, Iterable
+    from importlib.resources.abc import Traversable
+    from typing import Any, TypedDict
+
+    class IndexEntry(TypedDict):
+        path: str
+        size: int
+        sha256: str
+        references: list[str]
+
+    class ResourceIndex(TypedDict):
+        format: int
+        directories: list[str]
+        resources: dict[str, IndexEntry]
+
+
+__all__ = ["INDEX_FILENAME", "build_index", "closure", "latest_manifest_uris", "load_index", "resource_uri", "write_index"]
+
+INDEX_FILENAME = "index.json"
+INDEX_FORMAT = 2
+
+# The URI prefix for each top-level resources directory
+_URI_PREFIXES = {
+    "schemas": "asdf://stsci.edu/datamodels/roman/schemas/",
+    "manifests": "asdf://stsci.edu/datamodels/roman/manifests/",
+}
+_SUFFIX = ".yaml"
+
+
+def _resources_root() -> Traversable:
+    from . import resources
+
+    return files(resources)
+
+
+def _parse(content: bytes) -> Any:
+    """
+    Parse the content of a resource exactly as ASDF does.
+    """
+    import yaml
+    from asdf import yamlutil
+
+    # The following call to yaml.load is safe because we're
+    # using a loader that inherits from pyyaml's SafeLoader.
+    return yaml.load(content, Loader=yamlutil.AsdfLoader)  # noqa: S506
+
+
+def resource_uri(path: str) -> str:
+    """
+    Construct the URI for a resource file using the same scheme as
+    `asdf.resource.DirectoryResourceMapping`.
+
+    Parameters
+    ----------
+    path : str
+        The path (using ``/`` separators) of the resource file relative to the
+        resources directory, e.g. ``schemas/meta/basic-1.0.0.yaml``.
+
+    Returns
+    -------
+    str
+        The URI of the resource.
+    """
+    top, _, relative = path.partition("/")
+    return f"{_URI_PREFIXES[top]}{relative.removesuffix(_SUFFIX)}"
+
+
+def _walk(directory: Traversable, path: str) -> Generator[tuple[str, Traversable | None], None, None]:
+    """
+    Walk the directory yielding (relative path, file) for each resource file and
+    (relative path, None) for each directory.
+    """
+    yield path, None
+    for obj in sorted(directory.iterdir(), key=lambda obj: obj.name):
+        if obj.is_file() and obj.name.endswith(_SUFFIX):
+            yield f"{path}/{obj.name}", obj
+        elif obj.is_dir():
+            yield from _walk(obj, f"{path}/{obj.name}")
+
+
+def _references(schema: Any, uri: str, tag_schemas: dict[str, str]) -> list[str]:
+    """
+    Find the URIs of the resources directly referenced by a resource.
+        -> `$schema`, `$ref`, `tag` (via the schema_uri of the tag in the manifests)
+           and `schema_uri` (manifest entries)
+    """
+    from urllib.parse import urldefrag
+
+    from asdf.generic_io import resolve_uri
+
+    references = set()
+
+    def walk(node: Any, base: str) -> None:
+        if isinstance(node, Mapping):
+            base = node["id"] if isinstance(node.get("id"), str) else base
+
+            for key in ("$schema", "$ref"):
+                if isinstance(value := node.get(key), str):
+                    references.add(urldefrag(resolve_uri(base, value))[0])
+            if isinstance(tag := node.get("tag"), str) and tag in tag_schemas:
+                references.add(tag_schemas[tag])
+            if isinstance(schema_uri := node.get("schema_uri"), str):
+                references.add(schema_uri)
+
+            for value in node.values():
+                walk(value, base)
+
+        elif isinstance(node, list):
+            for value in node:
+                walk(value, base)
+
+    walk(schema, uri)
+    references.discard(uri)
+
+    return sorted(references)
+
+
+def build_index(root: Traversable | None = None) -> ResourceIndex:
+    """
+    Build the index of the resources by walking the resources directory.
+
+    Parameters
+    ----------
+    root : Traversable, optional
+        The resources directory, by default the ``rad.resources`` package directory.
+
+    Returns
+    -------
+    ResourceIndex
+        The index of all the resources found.
+    """
+    root = _resources_root() if root is None else root
+
+    directories = []
+    resources = {}
+    schemas = {}
+    for top in _URI_PREFIXES:
+        for path, file in _walk(root / top, top):
+            if file is None:
+                directories.append(path)
+                continue
+
+            uri = resource_uri(path)
+            content = file.read_bytes()
+            schemas[uri] = _parse(content)
+            resources[uri] = {
+                "path": path,
+                "size": len(content),
+                "sha256": hashlib.sha256(content).hexdigest(),
+            }
+
+    # Tags are referenced via the tag_uri so they need to be mapped to the schema_uri
+    tag_schemas = {
+        entry["tag_uri"]: entry["schema_uri"]
+        for uri, schema in schemas.items()
+        if uri.startswith(_URI_PREFIXES["manifests"])
+        for entry in schema.get("tags", ())
+    }
+    for uri, entry in resources.items():
+        entry["references"] = [reference for reference in _references(schemas[uri], uri, tag_schemas) if reference in resources]
+
+    return {
+        "format": INDEX_FORMAT,
+        "directories": directories,
+        "resources": dict(sorted(resources.items())),
+    }
+
+
+def write_index(root: Traversable | None = None) -> ResourceIndex:
+    """
+    Build the index for the resources and write it into the resources directory.
+
+    Parameters
+    ----------
+    root : Traversable, optional
+        The resources directory, by default the ``rad.resources`` package directory.
+
+    Returns
+    -------
+    ResourceIndex
+        The index that was written.
+    """
+    root = _resources_root() if root is None else root
+    index = build_index(root)
+
+    with (root / INDEX_FILENAME).open("w") as f:
+        json.dump(index, f, indent=2)
+        f.write("\n")
+
+    return index
+
+
+def _entries(directory: Traversable) -> Generator[tuple[str, bool, int | None], None, None]:
+    """
+    List the (name, is a directory, size) of the entries in a directory.
+        -> `os.scandir` is used for filesystem paths as it avoids creating a path object per entry
+        -> the size is only found for the resource files on the filesystem, the resources
+           in an archive cannot change once it is built
+    """
+    if isinstance(directory, os.PathLike):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    yield entry.name, True, None
+                else:
+                    yield entry.name, False, entry.stat().st_size if entry.name.endswith(_SUFFIX) else None
+        return
+
+    for obj in directory.iterdir():
+        yield obj.name, obj.is_dir(), None
+
+
+def _is_stale(root: Traversable, index: ResourceIndex) -> bool:
+    """
+    Check if the index no longer describes the files present in the resources directory.
+
+    Note
+    ----
+    This only lists the directories recorded in the index and ``stat`` s the resource
+    files, it does not read any of them. So an edit which changes the size of a file
+    makes the index stale, while one which keeps its size does not. The content itself
+    is always read from the file, which leaves only its hash and references out of date.
+    """
+    directories = set(index["directories"])
+
+    expected: dict[str, dict[str, int]] = {directory: {} for directory in directories}
+    for entry in index["resources"].values():
+        directory, _, name = entry["path"].rpartition("/")
+        expected[directory][name] = entry["size"]
+
+    for directory in directories:
+        sizes = expected[directory]
+
+        found = 0
+        for name, is_dir, size in _entries(root / directory):
+            if is_dir:
+                if f"{directory}/{name}" not in directories:
+                    # A new directory the index does not know about
+                    return True
+            elif name.endswith(_SUFFIX):
+                if name not in sizes or (size is not None and size != sizes[name]):
+                    return True
+                found += 1
+
+        if found != len(sizes):
+            return True
+
+    return False
+
+
+def load_index(root: Traversable | None = None) -> ResourceIndex | None:
+    """
+    Read the index shipped with the resources.
+
+    Parameters
+    ----------
+    root : Traversable, optional
+        The resources directory, by default the ``rad.resources`` package directory.
+
+    Returns
+    -------
+    ResourceIndex | None
+        The index, or None if the index is missing, unreadable, or stale.
+    """
+    root = _resources_root() if root is None else root
+
+    try:
+        index = json.loads((root / INDEX_FILENAME).read_bytes())
+        if index.get("format") != INDEX_FORMAT or _is_stale(root, index):
+            return None
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+    return index
+
+
+def closure(index: ResourceIndex, uris: Iterable[str]) -> set[str]:
+    """
+    Find all the resources reachable from the given resources through their references.
+
+    Parameters
+    ----------
+    index : ResourceIndex
+        The resource index.
+    uris : Iterable[str]
+        The URIs to start from.
+
+    Returns
+    -------
+    set[str]
+        The URIs of the given resources and everything they (indirectly) reference.
+    """
+    resources = index["resources"]
+
+    found = set()
+    queue = list(uris)
+    while queue:
+        if (uri := queue.pop()) in found:
+            continue
+
+        found.add(uri)
+        queue.extend(resources[uri]["references"])
+
+    return found
+
+
+def _version(uri: str) -> tuple[int, ...]:
+    # Compare as tuples of integers, which also handles the first manifest's bad semantic version "1.0"
+    return tuple(int(part) for part in uri.rsplit("-", 1)[-1].split("."))
+
+
+def latest_manifest_uris(index: ResourceIndex) -> list[str]:
+    """
+    Find the URIs of the newest ``datamodels`` and ``static`` manifests.
+
+    Parameters
+    ----------
+    index : ResourceIndex
+        The resource index.
+
+    Returns
+    -------
+    list[str]
+        The URIs of the newest version of each manifest.
+    """
+    latest = []
+    for name in ("datamodels", "static"):
+        prefix = f"{_URI_PREFIXES['manifests']}{name}-"
+        latest.append(max((uri for uri in index["resources"] if uri.startswith(prefix)), key=_version))
+
+    return latest
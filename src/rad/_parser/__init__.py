@@ -1,7 +1,24 @@
 from ._archive import archive_entries, archive_schema
-from ._diff import diff
+from ._builder import SuperSchemaBuilder
+from ._cache import SuperSchemaCache
+from ._diff import column_changes, diff
 from ._process import dump
 from ._ssc import asdf_ssc_config
-from ._super_schema import super_schema
+from ._super_schema import super_schema, super_schema_cache
+from ._table import TABLE_FORMATS, archive_table, write_archive_table
 
-__all__ = ["archive_entries", "archive_schema", "asdf_ssc_config", "diff", "dump", "super_schema"]
+__all__ = [
+    "TABLE_FORMATS",
+    "SuperSchemaBuilder",
+    "SuperSchemaCache",
+    "archive_entries",
+    "archive_schema",
+    "archive_table",
+    "asdf_ssc_config",
+    "column_changes",
+    "diff",
+    "dump",
+    "super_schema",
+    "super_schema_cache",
+    "write_archive_table",
+]
@@ -5,20 +5,24 @@ from collections import abc
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from typing import Any, TypedDict
-
-    class ArchiveInfo(TypedDict):
-        datatype: str
-        destination: list[str]
+    from collections.abc import Generator
+    from typing import Any
 
 
 __all__ = ["archive_entries", "archive_schema"]
 
 
+# The keywords kept in the archive schemas
+_ARCHIVE_KEYWORDS = ("properties", "archive_catalog", "archive_meta")
+
+
 def archive_schema(schema: dict[str, Any]) -> dict[str, Any]:
     """
     Process a schema for use by the MAST archive system.
 
+    The schema is walked once, building only the ``properties`` which lead to an
+    ``archive_catalog``, so none of the subtrees which are pruned are ever copied.
+
     Parameters
     ----------
     schema : dict[str, Any]
@@ -29,133 +33,121 @@ def archive_schema(schema: dict[str, Any]) -> dict[str, Any]:
     dict[str, Any]
         The processed schema.
     """
-    if isinstance(schema, abc.Mapping):
-        new_schema = copy.deepcopy(schema)
-        for key in schema:
-            if key not in ("properties", "archive_catalog", "archive_meta"):
-                new_schema.pop(key)
-
-        schema = new_schema
+    if not isinstance(schema, abc.Mapping):
+        return schema
 
-    if isinstance(schema, abc.Mapping) and "properties" in schema:
+    if "properties" in schema:
         properties = {}
         for key, sub_node in schema["properties"].items():
             if new_node := archive_schema(sub_node):
                 properties[key] = new_node
 
-        if properties:
-            schema["properties"] = properties
-            return schema
-        else:
+        if not properties:
             return {}
 
-    if isinstance(schema, abc.Mapping):
-        if "archive_catalog" in schema:
-            return {"archive_catalog": schema["archive_catalog"]}
-        else:
-            return None
+        # The archive information is copied, as the super schemas share their subtrees
+        return {
+            key: properties if key == "properties" else copy.deepcopy(value)
+            for key, value in schema.items()
+            if key in _ARCHIVE_KEYWORDS
+        }
 
-    return schema
+    if "archive_catalog" in schema:
+        return {"archive_catalog": copy.deepcopy(schema["archive_catalog"])}
 
+    return None
 
-def _flatten_dict(data: dict[str, Any], parent_key: str | None = None) -> dict[str, Any]:
-    """
-    Flatten a nested dictionary structure into a single-level dictionary.
 
-    Parameters
-    ----------
-    d : dict[str, Any]
-        The dictionary to flatten.
-    parent_key : str, optional
-        The parent key for the current recursion level, by default "".
+# The names left out of the data paths, as they are not part of the data's structure
+_NOT_IN_PATH = frozenset(("properties", "archive_catalog", "meta"))
 
-    Returns
-    -------
-    dict[str, Any]
-        A flattened dictionary where nested keys are joined with the separator.
-    """
-    parent_key = parent_key or ""
-
-    items = []
-    for key, value in data.items():
-        new_key = f"{parent_key}.{key}" if parent_key else key
-
-        if isinstance(value, abc.Mapping):
-            items.extend(_flatten_dict(value, new_key).items())
-        else:
-            items.append((new_key, value))
-
-    return dict(items)
 
-
-def _path_archive(schema: dict[str, Any]) -> dict[str, ArchiveInfo]:
+def _archive_columns(
+    archive: dict[str, Any], path: tuple[str, ...] = ()
+) -> Generator[tuple[tuple[str, ...], str | None, list[str]], None, None]:
     """
-    Produce a data path in schema to archive information mapping
+    Produce the archive information of every column of an archive schema.
+        -> The (already pruned, see `archive_schema`) schema is walked once, in order,
+           yielding each column as its ``archive_catalog`` is reached
 
     Parameters
     ----------
-    schema : dict[str, Any]
-        Schema to process
-
-    Returns
-    -------
-    dict[str, Any]
-        data-path: archive information
+    archive : dict[str, Any]
+        The archive schema to walk.
+    path : tuple[str, ...], optional
+        The data path to the archive schema, by default the root.
+
+    Yields
+    ------
+    tuple[tuple[str, ...], str | None, list[str]]
+        The data path, datatype, and destinations of each column.
     """
-    archive_filter = archive_schema(schema)
-    archive_filter.pop("archive_meta")
+    for key, value in archive.items():
+        if key == "archive_catalog":
+            yield path, value.get("datatype"), value["destination"]
+        elif key == "properties":
+            for name, node in value.items():
+                yield from _archive_columns(node, path if name in _NOT_IN_PATH else (*path, name))
 
-    flat_schema = _flatten_dict(archive_filter)
 
-    data = {}
-    for key_path, value in flat_schema.items():
-        base_path, archive_key = key_path.rsplit(".", 1)
-
-        path = ".".join(
-            item for item in base_path.split(".") if item != "properties" and item != "archive_catalog" and item != "meta"
-        )
+def _is_string(datatype: str) -> bool:
+    """
+    Whether an archive datatype holds strings (rather than numbers).
+    """
+    return "char" in datatype.lower() or "str" in datatype.lower()
 
-        if path not in data:
-            data[path] = {}
 
-        data[path][archive_key] = value
+def _schema_path(path: tuple[str, ...]) -> str:
+    """
+    The form of a data path used by the archive data.
+        -> meta is re appended to the front, along with top for a path of a single name
+    """
+    if len(path) == 1:
+        path = ("top", *path)
 
-    return data
+    return f"meta.{'.'.join(path)}"
 
 
-def _archive_string(path: str, datatype: str | None, destination: list[str]) -> list[str]:
+def _archive_string(path: tuple[str, ...], datatype: str | None, destination: list[str]) -> Generator[str, None, None]:
     """
-    Produce a string representation of an archive mapping
+    Produce the string representations of an archive mapping
 
     Parameters
     ----------
-    path : str
+    path : tuple[str, ...]
         Data path
     datatype : str | None
         Datatype of the data
     destination : list[str]
 
-    Returns
-    -------
+    Yields
+    ------
     str
-        String representation of the archive mapping
+        String representation of the archive mapping, one for each destination
     """
-    if len(path.split(".")) == 1:
-        path = f"top.{path}"
-
-    # Re append meta to the front of the path and add | to the end
-    schema_path = f"meta.{path}|"
+    schema_path = _schema_path(path)
 
     # Last two components of the path, reversed and joined by |
-    archive_path = "|".join(path.split(".")[-2:][::-1])
+    archive_path = "|".join(schema_path.split(".")[-2:][::-1])
+
+    # Add | to the end of the path
+    schema_path = f"{schema_path}|"
 
     if datatype is not None:
-        if "char" in datatype.lower() or "str" in datatype.lower():
-            schema_path = f"1||{schema_path}"
-        else:
-            schema_path = f"0||{schema_path}"
+        schema_path = f"{int(_is_string(datatype))}||{schema_path}"
 
-    return ["|".join([archive_path, *(dest.split(".")), schema_path]) for dest in destination]
+    for dest in destination:
+        yield "|".join([archive_path, *(dest.split(".")), schema_path])
+
+
+def _archive_lines(archive: dict[str, Any]) -> Generator[str, None, None]:
+    """
+    Produce the archive mapping strings of an archive schema, as they are reached.
+    """
+    archive_meta = archive.get("archive_meta")
+    for path, datatype, destination in _archive_columns(archive):
+        for line in _archive_string(path, datatype, destination):
+            yield f"{archive_meta}|{line}"
 
 
 def archive_entries(schema: dict[str, Any]) -> list[str]:
@@ -172,11 +164,4 @@ def archive_entries(schema: dict[str, Any]) -> list[str]:
     list[str]
         List of archive mapping strings
     """
-    archive_meta = schema.get("archive_meta")
-    path_info = _path_archive(schema)
-
-    archive_strings = []
-    for path, archive_info in path_info.items():
-        archive_strings.extend([f"{archive_meta}|{dest}" for dest in _archive_string(path, **archive_info)])
-
-    return archive_strings
+    return list(_archive_lines(archive_schema(schema) or {}))
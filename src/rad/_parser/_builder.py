@@ -0,0 +1,212 @@
+"""
+Bottom-up construction of super schemas.
+
+The super schema of a schema only depends on the super schema form of the
+fragments it references, so rather than building each super schema from its
+fully resolved tree, the schemas are processed in topological order of their
+``$ref`` dependencies. The super schema form of every referenced schema (e.g.
+``meta/common`` -> ``meta/basic``) is then computed once and reused by every
+schema that references it.
+"""
+
+from __future__ import annotations
+
+import copy
+from graphlib import TopologicalSorter
+from time import perf_counter
+from typing import TYPE_CHECKING
+from urllib.parse import urldefrag
+
+import asdf.reference
+import asdf.treeutil
+from asdf.generic_io import resolve_uri
+
+from ._super_schema import _load_schema, _merge_node
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from typing import Any
+
+
+__all__ = ["SuperSchemaBuilder"]
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _copy(node: Any) -> Any:
+    """
+    Copy a processed tree, so that shared fragments become independent copies.
+        -> much faster than `copy.deepcopy` as it only has to handle plain containers
+    """
+    if type(node) is dict:
+        return {key: _copy(value) for key, value in node.items()}
+    if type(node) is list:
+        return [_copy(value) for value in node]
+    if isinstance(node, _SCALARS):
+        return node
+
+    return copy.deepcopy(node)
+
+
+class SuperSchemaBuilder:
+    """
+    Build super schemas bottom-up, reusing the super schema form of every
+    referenced schema.
+
+    Attributes
+    ----------
+    timings : dict[tuple[str, str], float]
+        The time (in seconds) spent processing each (URI, fragment) node of the
+        dependency graph, not including the time spent on the nodes it references.
+
+    Note
+    ----
+    The schemas are read once, the builder should not be used across changes to
+    the content of the resources in the ASDF configuration.
+    """
+
+    def __init__(self) -> None:
+        self._schemas: dict[str, dict[str, Any]] = {}
+        self._nodes: dict[tuple[str, str], Any] = {}
+
+        self.timings: dict[tuple[str, str], float] = {}
+
+    def _schema(self, uri: str) -> dict[str, Any]:
+        if (schema := self._schemas.get(uri)) is None:
+            schema = self._schemas[uri] = _load_schema(uri)
+
+        return schema
+
+    def _node(self, uri: str, fragment: str) -> Any:
+        """
+        Get the unprocessed node for a schema fragment.
+        """
+        return asdf.reference.resolve_fragment(self._schema(uri), fragment)
+
+    def _reference(self, uri: str, json_id: str | None, ref: str) -> tuple[str, str]:
+        """
+        Turn a `$ref` within a schema into the (URI, fragment) it references.
+        """
+        suburl_base, suburl_fragment = urldefrag(resolve_uri(uri if json_id is None else json_id, ref))
+
+        # A local reference may be made through the schema's id
+        if suburl_base == self._schema(uri).get("id"):
+            suburl_base = uri
+
+        return suburl_base, suburl_fragment
+
+    def _references(self, uri: str, fragment: str) -> set[tuple[str, str]]:
+        """
+        Find the (URI, fragment) of everything referenced within a schema fragment.
+        """
+        references = set()
+
+        def walk(node: Any, json_id: str | None) -> None:
+            if isinstance(node, dict):
+                json_id = node["id"] if isinstance(node.get("id"), str) else json_id
+                if "$ref" in node:
+                    references.add(self._reference(uri, json_id, node["$ref"]))
+
+                for value in node.values():
+                    walk(value, json_id)
+
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value, json_id)
+
+        walk(self._node(uri, fragment), None)
+
+        return references
+
+    def graph(self, uris: Iterable[str]) -> dict[tuple[str, str], set[tuple[str, str]]]:
+        """
+        Find the ``$ref`` dependency graph of the schema fragments that still need
+        to be processed.
+
+        Parameters
+        ----------
+        uris : Iterable[str]
+            The URIs of the schemas to start from.
+
+        Returns
+        -------
+        dict[tuple[str, str], set[tuple[str, str]]]
+            (URI, fragment) -> (URI, fragment) of everything it references.
+        """
+        graph: dict[tuple[str, str], set[tuple[str, str]]] = {}
+
+        queue = [(uri, "") for uri in uris]
+        while queue:
+            if (key := queue.pop()) in graph or key in self._nodes:
+                continue
+
+            graph[key] = {reference for reference in self._references(*key) if reference not in self._nodes}
+            queue.extend(graph[key])
+
+        return graph
+
+    def _process(self, uri: str, fragment: str) -> None:
+        """
+        Turn a schema fragment, whose references have already been processed,
+        into its super schema form.
+        """
+
+        def callback(node, json_id):
+            if isinstance(node, dict) and "$ref" in node:
+                # The referenced fragment is already in its super schema form, and
+                # merging never modifies it, so it is shared until the final copy
+                return self._nodes[self._reference(uri, json_id, node["$ref"])]
+
+            return _merge_node(node)
+
+        self._nodes[(uri, fragment)] = asdf.treeutil.walk_and_modify(self._node(uri, fragment), callback)
+
+    def _super_schema(self, uri: str) -> dict[str, Any]:
+        schema = self._schema(uri)
+        processed = _copy(self._nodes[(uri, "")])
+
+        if id_ := schema.get("id"):
+            processed["id"] = id_
+        if meta_ := schema.get("$schema"):
+            processed["$schema"] = meta_
+
+        return processed
+
+    def build_all(self, uris: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """
+        Build the super schemas for many schemas at once.
+
+        Parameters
+        ----------
+        uris : Iterable[str]
+            The URIs of the schemas.
+
+        Returns
+        -------
+        dict[str, dict[str, Any]]
+            URI -> super schema, each of which can be freely modified.
+        """
+        uris = list(uris)
+
+        for key in TopologicalSorter(self.graph(uris)).static_order():
+            start = perf_counter()
+            self._process(*key)
+            self.timings[key] = perf_counter() - start
+
+        return {uri: self._super_schema(uri) for uri in uris}
+
+    def build(self, uri: str) -> dict[str, Any]:
+        """
+        Build the super schema for a schema.
+
+        Parameters
+        ----------
+        uri : str
+            The URI of the schema.
+
+        Returns
+        -------
+        dict[str, Any]
+            The super schema, which can be freely modified.
+        """
+        return self.build_all([uri])[uri]
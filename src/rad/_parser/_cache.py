@@ -0,0 +1,247 @@
+"""
+Content-addressed cache for super schemas.
+
+A super schema depends on the content of its schema and of every resource that
+schema (indirectly) references. So the cache key for a super schema is a hash of
+its URI together with the content hashes of all of those resources. Any edit to
+a referenced resource changes the key of every super schema depending on it,
+so stale entries are never returned, they are simply no longer looked up.
+
+Entries are stored as JSON (super schemas are plain JSON-compatible data), so each
+hit returns a new copy of the super schema which callers are free to modify, and
+reading a persisted entry never runs any code. The cache holds a bounded in-process LRU and can
+optionally persist entries to a directory so that they are reused across runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import cache
+from importlib.metadata import version
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+import asdf
+
+from rad._index import _parse, _references, load_index
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Any
+
+    from rad._index import ResourceIndex
+
+
+__all__ = ["CACHE_DIR_ENV", "SuperSchemaCache", "SuperSchemaCacheInfo"]
+
+# Environment variable to set the default persistent cache directory
+CACHE_DIR_ENV = "RAD_SUPER_SCHEMA_CACHE"
+
+# Bump this if the way super schemas are built changes, to invalidate persisted entries
+_CACHE_VERSION = 2
+
+
+class SuperSchemaCacheInfo(NamedTuple):
+    hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+@cache
+def _index() -> ResourceIndex | None:
+    return load_index()
+
+
+@cache
+def _environment() -> bytes:
+    """
+    Versions of the code, outside of RAD's resources, the super schemas depend on.
+    """
+    return f"{_CACHE_VERSION}|{version('asdf')}|{version('asdf-standard')}".encode()
+
+
+def dependencies(schema_uri: str) -> dict[str, str]:
+    """
+    Find the content hashes of the resource and all the resources it references.
+
+    The references recorded in the resource index are used when the content of a
+    resource matches the index, otherwise the resource is parsed to find them.
+
+    Parameters
+    ----------
+    schema_uri : str
+        The URI of the schema.
+
+    Returns
+    -------
+    dict[str, str]
+        URI -> sha256 of the content, for every resource found through the
+        ASDF resource manager.
+    """
+    resource_manager = asdf.get_config().resource_manager
+    resources = {} if (index := _index()) is None else index["resources"]
+
+    hashes = {}
+    queue = [schema_uri]
+    while queue:
+        if (uri := queue.pop()) in hashes or uri not in resource_manager:
+            continue
+
+        content = resource_manager[uri]
+        hashes[uri] = hashlib.sha256(content).hexdigest()
+
+        if (entry := resources.get(uri)) is not None and entry["sha256"] == hashes[uri]:
+            queue.extend(entry["references"])
+        else:
+            queue.extend(_references(_parse(content), uri, {}))
+
+    return hashes
+
+
+class SuperSchemaCache:
+    """
+    Memoize super schemas by the content they are built from.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of super schemas held in memory, by default 256.
+    directory : Path | str | None, optional
+        A directory to persist super schemas in across runs, by default the
+        ``RAD_SUPER_SCHEMA_CACHE`` environment variable, or no persistence if
+        that is not set.
+    """
+
+    def __init__(self, maxsize: int = 256, directory: Path | str | None = None) -> None:
+        if directory is None:
+            directory = os.environ.get(CACHE_DIR_ENV) or None
+
+        self.maxsize = maxsize
+        self.directory = None if directory is None else Path(directory)
+
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        # The same cache may be used by several threads (each with their own ASDF configuration)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def key(self, schema_uri: str) -> str:
+        """
+        Compute the cache key for the super schema of a URI.
+
+        Parameters
+        ----------
+        schema_uri : str
+            The URI of the schema.
+
+        Returns
+        -------
+        str
+            The key (a hex digest) for the super schema given the current resources.
+        """
+        key = hashlib.sha256(_environment())
+        key.update(schema_uri.encode())
+        for uri, sha256 in sorted(dependencies(schema_uri).items()):
+            key.update(f"|{uri}={sha256}".encode())
+
+        return key.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _read(self, key: str) -> bytes | None:
+        if self.directory is None:
+            return None
+
+        try:
+            return self._path(key).read_bytes()
+        except OSError:
+            return None
+
+    def _write(self, key: str, data: bytes) -> None:
+        if self.directory is None:
+            return
+
+        # Write then move so that concurrent runs never see a partial entry
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(key).with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(self._path(key))
+
+    def _store(self, key: str, data: bytes) -> None:
+        self._entries[key] = data
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def get(self, schema_uri: str, build: Callable[[str], dict[str, Any]]) -> dict[str, Any]:
+        """
+        Get the super schema for a URI, building it only if it is not cached.
+
+        Parameters
+        ----------
+        schema_uri : str
+            The URI of the schema.
+        build : Callable[[str], dict[str, Any]]
+            The function to build the super schema on a cache miss.
+
+        Returns
+        -------
+        dict[str, Any]
+            A new copy of the super schema.
+        """
+        key = self.key(schema_uri)
+
+        with self._lock:
+            if (data := self._entries.get(key)) is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+
+        if data is None and (data := self._read(key)) is not None:
+            try:
+                schema = json.loads(data)
+            except ValueError:
+                # A damaged entry is rebuilt
+                data = None
+            else:
+                with self._lock:
+                    self._disk_hits += 1
+                    self._store(key, data)
+                return schema
+
+        elif data is not None:
+            return json.loads(data)
+
+        schema = build(schema_uri)
+        data = json.dumps(schema).encode()
+        with self._lock:
+            self._misses += 1
+            self._store(key, data)
+        self._write(key, data)
+
+        return json.loads(data)
+
+    def info(self) -> SuperSchemaCacheInfo:
+        """
+        Report the cache statistics.
+        """
+        return SuperSchemaCacheInfo(self._hits, self._disk_hits, self._misses, self._evictions, self.maxsize, len(self._entries))
+
+    def clear(self) -> None:
+        """
+        Clear the in-memory entries and the statistics, persisted entries are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._disk_hits = self._misses = self._evictions = 0
@@ -1,18 +1,336 @@
+"""
+Find the differences between two sets of archive schemas.
+
+Every subtree of both sides is hashed once (see `rad._fingerprint`), so any subtree
+which is identical on both sides is skipped by comparing two hashes, and only the
+subtrees whose hashes differ are descended into. As for the archive the order of
+the items in a list (e.g. ``required``, ``enum`` or the ``destination`` of an archive
+entry) does not matter, the lists are compared as the sets of their items.
+
+The differences are reported under the same categories, and with the same paths,
+as ``DeepDiff(main, current, ignore_order=True)`` reports them.
+
+The differences can also be reported as they matter to the archive: one record per
+archive column (a data path of a schema) whose entries in the archive data changed.
+"""
+
 from __future__ import annotations
 
+from collections.abc import Mapping
 from typing import TYPE_CHECKING
 
-from deepdiff import DeepDiff
+from rad._fingerprint import fingerprint
+
+from ._archive import _archive_columns, _schema_path
 
 if TYPE_CHECKING:
-    from typing import Any
+    from collections.abc import Generator
+    from typing import Any, TypedDict
+
+    from rad._fingerprint import Fingerprint
+
+    class ArchiveInfo(TypedDict):
+        datatype: str | None
+        destination: list[str]
+
+    class ColumnChange(TypedDict):
+        uri: str
+        path: str
+        old_archive_meta: str | None
+        new_archive_meta: str | None
+        old_datatype: str | None
+        new_datatype: str | None
+        old_destination: list[str] | None
+        new_destination: list[str] | None
+
+
+__all__ = ["SchemaDiff", "column_changes", "diff"]
+
+# The categories of the changes which add, or remove, values
+_ADDED = ("dictionary_item_added", "iterable_item_added")
+_REMOVED = ("dictionary_item_removed", "iterable_item_removed")
+# The categories which only list the paths of the changes
+_KEYS = ("dictionary_item_added", "dictionary_item_removed")
+
+
+class SchemaDiff(dict):
+    """
+    The differences between two sets of schemas, category -> changes:
+        - ``dictionary_item_added``, ``dictionary_item_removed``: the paths of the keys
+          added to, or removed from, a mapping
+        - ``iterable_item_added``, ``iterable_item_removed``: path -> the item added to,
+          or removed from, a list
+        - ``values_changed``: path -> the old and new value
+        - ``type_changes``: path -> the old and new type and value
+
+    Only the categories with changes are present, so the diff is falsey if there
+    are no differences.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._uris: dict[str, dict[str, list[str]]] = {}
+
+    def _add(self, category: str, uri: str, path: str, change: Any = None) -> None:
+        if category in _KEYS:
+            self.setdefault(category, []).append(path)
+        else:
+            self.setdefault(category, {})[path] = change
+
+        kind = "added" if category in _ADDED else "removed" if category in _REMOVED else "changed"
+        self._uris.setdefault(uri, {"added": [], "removed": [], "changed": []})[kind].append(path)
+
+    def by_uri(self) -> dict[str, dict[str, list[str]]]:
+        """
+        Group the paths of the differences by the schema they are in.
+
+        Returns
+        -------
+        dict[str, dict[str, list[str]]]
+            URI -> "added", "removed", and "changed" -> the paths of those differences
+            (a schema added or removed as a whole is a single path).
+        """
+        return {uri: {kind: list(paths) for kind, paths in changes.items()} for uri, changes in self._uris.items()}
+
+
+def _path(path: str, key: Any) -> str:
+    return f"{path}[{key!r}]"
+
+
+def _is_container(node: Any) -> bool:
+    return isinstance(node, Mapping | list | tuple)
+
+
+def _shared(old: Any, new: Any, old_print: Fingerprint, new_print: Fingerprint) -> int | None:
+    """
+    How much two containers have in common, or None if they are not alike enough to
+    be one item having changed.
+        -> mappings are alike if they have a key in common, and then share the keys
+           whose values are identical, lists share the items they have in common
+    """
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        if not (keys := old.keys() & new.keys()):
+            return None
+
+        return sum(old_print.children[key].digest == new_print.children[key].digest for key in keys)
+
+    if isinstance(old, list | tuple) and isinstance(new, list | tuple):
+        return len({child.digest for child in old_print.children} & {child.digest for child in new_print.children})
+
+    return None
+
+
+def _diff_lists(
+    old: list[Any], new: list[Any], old_print: Fingerprint, new_print: Fingerprint, path: str, uri: str, result: SchemaDiff
+) -> None:
+    """
+    Compare two lists as the sets of their items.
+        -> the items are matched by their hashes, so only the unmatched ones are looked at
+    """
+    old_digests = {child.digest for child in old_print.children}
+    new_digests = {child.digest for child in new_print.children}
+
+    def unmatched(items: list[Any], prints: list[Fingerprint], others: set[bytes]) -> list[tuple[int, Any, Fingerprint]]:
+        seen = set()
+        found = []
+        for index, (item, child) in enumerate(zip(items, prints, strict=True)):
+            if child.digest not in others and child.digest not in seen:
+                seen.add(child.digest)
+                found.append((index, item, child))
+
+        return found
+
+    removed = unmatched(old, old_print.children, new_digests)
+    added = unmatched(new, new_print.children, old_digests)
+
+    # As for DeepDiff, the unmatched containers are paired up with the ones they have the
+    # most in common with (the closest in the lists first), and each pair is one item
+    # having changed, so the changes within it are reported
+    candidates = sorted(
+        (-shared, abs(old_index - new_index), old_index, new_index)
+        for old_index, old_item, old_child in removed
+        for new_index, new_item, new_child in added
+        if (shared := _shared(old_item, new_item, old_child, new_child)) is not None
+    )
+    pairs: dict[int, int] = {}
+    paired: set[int] = set()
+    for _, _, old_index, new_index in candidates:
+        if old_index not in pairs and new_index not in paired:
+            pairs[old_index] = new_index
+            paired.add(new_index)
+
+    if pairs:
+        new_entries = {index: (item, child) for index, item, child in added}
+        for index, item, child in removed:
+            if index in pairs:
+                new_item, new_child = new_entries[pairs[index]]
+                _diff(item, new_item, child, new_child, _path(path, index), uri, result)
+        removed = [entry for entry in removed if entry[0] not in pairs]
+        added = [entry for entry in added if entry[0] not in paired]
+
+    # A scalar replaced by another scalar in the same place is a changed value, which
+    # (as for DeepDiff) is not reported as a type change even if its type changed
+    replaced = {index: item for index, item, _ in added if not _is_container(item)}
+    replaced = {index: replaced[index] for index, item, _ in removed if not _is_container(item) and index in replaced}
+    for index, item, _ in removed:
+        if index in replaced:
+            result._add("values_changed", uri, _path(path, index), {"new_value": replaced[index], "old_value": item})
+    removed = [entry for entry in removed if entry[0] not in replaced]
+    added = [entry for entry in added if entry[0] not in replaced]
+
+    for index, item, _ in removed:
+        result._add("iterable_item_removed", uri, _path(path, index), item)
+    for index, item, _ in added:
+        result._add("iterable_item_added", uri, _path(path, index), item)
+
 
+def _diff(old: Any, new: Any, old_print: Fingerprint, new_print: Fingerprint, path: str, uri: str, result: SchemaDiff) -> None:
+    """
+    Compare two trees, only descending into the subtrees whose hashes differ.
+    """
+    if old_print.digest == new_print.digest:
+        return
+
+    if isinstance(old, Mapping) and isinstance(new, Mapping):
+        for key in old:
+            if key not in new:
+                result._add("dictionary_item_removed", uri, _path(path, key))
+        for key in new:
+            if key not in old:
+                result._add("dictionary_item_added", uri, _path(path, key))
+        for key in old:
+            if key in new:
+                _diff(old[key], new[key], old_print.children[key], new_print.children[key], _path(path, key), uri, result)
+
+    elif isinstance(old, list | tuple) and isinstance(new, list | tuple):
+        _diff_lists(old, new, old_print, new_print, path, uri, result)
+
+    elif type(old) is not type(new):
+        result._add(
+            "type_changes",
+            uri,
+            path,
+            {"old_type": type(old), "new_type": type(new), "old_value": old, "new_value": new},
+        )
 
-__all__ = ["diff"]
+    else:
+        result._add("values_changed", uri, path, {"new_value": new, "old_value": old})
 
 
-def diff(current_schemas: dict[str, dict[str, dict[str, Any]]], main_schemas: dict[str, dict[str, dict[str, Any]]]) -> DeepDiff:
+def diff(current_schemas: dict[str, dict[str, dict[str, Any]]], main_schemas: dict[str, dict[str, dict[str, Any]]]) -> SchemaDiff:
     """
     Find the differences between two sets of archive schemas.
+
+    Parameters
+    ----------
+    current_schemas : dict[str, dict[str, dict[str, Any]]]
+        URI -> archive schema, for the current state.
+    main_schemas : dict[str, dict[str, dict[str, Any]]]
+        URI -> archive schema, for the state being compared against.
+
+    Returns
+    -------
+    SchemaDiff
+        The changes from main_schemas to current_schemas.
     """
-    return DeepDiff(main_schemas, current_schemas, ignore_order=True)
+    result = SchemaDiff()
+
+    main_print = fingerprint(main_schemas, ignored=(), ordered=False)
+    current_print = fingerprint(current_schemas, ignored=(), ordered=False)
+    if main_print.digest == current_print.digest:
+        return result
+
+    # Each schema is compared separately, so that the differences are known by URI
+    for uri in main_schemas:
+        if uri not in current_schemas:
+            result._add("dictionary_item_removed", uri, _path("root", uri))
+    for uri in current_schemas:
+        if uri not in main_schemas:
+            result._add("dictionary_item_added", uri, _path("root", uri))
+    for uri, schema in main_schemas.items():
+        if uri in current_schemas:
+            _diff(
+                schema,
+                current_schemas[uri],
+                main_print.children[uri],
+                current_print.children[uri],
+                _path("root", uri),
+                uri,
+                result,
+            )
+
+    return result
+
+
+def _columns(schema: dict[str, Any] | None) -> tuple[str | None, dict[str, ArchiveInfo]]:
+    """
+    The archive_meta and data path -> archive information of an archive schema.
+    """
+    if schema is None:
+        return None, {}
+
+    return schema.get("archive_meta"), {
+        _schema_path(path): {"datatype": datatype, "destination": destination}
+        for path, datatype, destination in _archive_columns(schema)
+    }
+
+
+def _column_changed(old_meta: str | None, new_meta: str | None, old: ArchiveInfo | None, new: ArchiveInfo | None) -> bool:
+    if old is None or new is None or old_meta != new_meta:
+        return True
+
+    # As for the archive data, the order of the destinations does not matter
+    return old["datatype"] != new["datatype"] or set(old["destination"]) != set(new["destination"])
+
+
+def column_changes(
+    current_schemas: dict[str, dict[str, dict[str, Any]]], main_schemas: dict[str, dict[str, dict[str, Any]]]
+) -> Generator[ColumnChange, None, None]:
+    """
+    Find the archive columns which changed between two sets of archive schemas.
+        -> The schemas whose hashes are the same on both sides are skipped, and the
+           changes are produced one schema at a time, so they can be written as they
+           are found (e.g. as JSON Lines)
+
+    Every line of the archive data (see `archive_entries`) which differs between the
+    two sides belongs to one of the columns produced, as a line is made from the
+    archive_meta of the schema and the data path, datatype and destinations of the
+    column. A change to the datatype of a column is produced even if its lines are the
+    same (e.g. a change to the length of a string).
+
+    Parameters
+    ----------
+    current_schemas : dict[str, dict[str, dict[str, Any]]]
+        URI -> archive schema, for the current state.
+    main_schemas : dict[str, dict[str, dict[str, Any]]]
+        URI -> archive schema, for the state being compared against.
+
+    Yields
+    ------
+    ColumnChange
+        The URI, data path, and the old and new archive_meta, datatype and destination
+        of each changed column (None for the side the column, or schema, is not in).
+    """
+    for uri in {**main_schemas, **current_schemas}:
+        main, current = main_schemas.get(uri), current_schemas.get(uri)
+        if (
+            main is not None
+            and current is not None
+            and fingerprint(main, ignored=(), ordered=False) == fingerprint(current, ignored=(), ordered=False)
+        ):
+            continue
+
+        (old_meta, old_columns), (new_meta, new_columns) = _columns(main), _columns(current)
+        for path in {**old_columns, **new_columns}:
+            old, new = old_columns.get(path), new_columns.get(path)
+            if _column_changed(old_meta, new_meta, old, new):
+                yield {
+                    "uri": uri,
+                    "path": path,
+                    "old_archive_meta": None if old is None else old_meta,
+                    "new_archive_meta": None if new is None else new_meta,
+                    "old_datatype": None if old is None else old["datatype"],
+                    "new_datatype": None if new is None else new["datatype"],
+                    "old_destination": None if old is None else old["destination"],
+                    "new_destination": None if new is None else new["destination"],
+                }
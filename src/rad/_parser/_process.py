@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import json
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -8,21 +12,47 @@ import asdf
 import yaml
 from semantic_version import Version
 
-from ._archive import archive_entries, archive_schema
+from ._archive import _archive_lines, archive_schema
+from ._builder import SuperSchemaBuilder
+from ._cache import _environment, dependencies
 from ._ssc import asdf_ssc_config
-from ._super_schema import super_schema
+from ._super_schema import _load_schema, super_schema
+from ._table import TABLE_FORMATS, write_archive_table
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
-    from typing import Any, TypeDict
+    from collections.abc import Container, Generator, Iterator
+    from typing import Any, TypedDict
 
-    class ArchiveOutput(TypeDict):
-        super_schemas: dict[Path, dict[str, Any]]
+    class ArchiveOutput(TypedDict):
+        super_schemas: Mapping[Path, dict[str, Any]]
+        rebuilt_super_schemas: dict[Path, dict[str, Any]]
         archive_schemas: dict[str, dict[str, Any]]
         archive_data: list[str]
+        rebuilt: dict[str, str]
 
+    class DumpRecord(TypedDict):
+        dependencies: dict[str, str]
+        super_schema: str | None
+        super_schema_sha256: str | None
+        archive_schema: dict[str, Any] | None
+        archive_entries: list[str]
 
-def _get_latest_uris() -> Generator[str, None, None]:
+    class OutputRecord(TypedDict):
+        inputs: str
+        sha256: str | None
+
+    class DumpManifest(TypedDict):
+        format: int
+        code: str
+        schemas: dict[str, DumpRecord]
+        outputs: dict[str, OutputRecord]
+
+
+MANIFEST_FILENAME = "dump_manifest.json"
+MANIFEST_FORMAT = 2
+
+
+def _latest_datamodels_uri() -> str:
     # Find latest datamodels manifest URI
     latest_version = "0.0.0"
     for uri in asdf.get_config().resource_manager:
@@ -35,10 +65,14 @@ def _get_latest_uris() -> Generator[str, None, None]:
             if Version(version) > Version(latest_version):
                 latest_version = version
 
-    datamodels_uri = f"asdf://stsci.edu/datamodels/roman/manifests/datamodels-{latest_version}"
+    return f"asdf://stsci.edu/datamodels/roman/manifests/datamodels-{latest_version}"
 
+
+def _get_latest_uris() -> Generator[str, None, None]:
     # Only need to worry about the tagged objects so the manifest will tell us the latest schema URIs
-    for entry in asdf.schema.load_schema(datamodels_uri)["tags"]:
+    #   -> loaded from the content currently served, as ASDF caches schemas by URI alone,
+    #      which would serve a stale manifest after the resources in the configuration change
+    for entry in _load_schema(_latest_datamodels_uri())["tags"]:
         yield entry["schema_uri"]
 
     # Now find the latest SSC schema URIs
@@ -48,33 +82,286 @@ def _get_latest_uris() -> Generator[str, None, None]:
                 yield uri
 
 
-def _process(verbose: bool = False) -> ArchiveOutput:
+def _super_schema_path(uri: str) -> Path:
+    return Path(uri.replace("asdf://stsci.edu/datamodels/roman/schemas/", "")).with_suffix(".yaml")
+
+
+def _process_uri(
+    uri: str, schema: dict[str, Any], super_dir: Path | None = None
+) -> tuple[Path | None, dict[str, Any] | None, list[str]]:
+    """
+    Produce the outputs for a single super schema.
+        -> The super schema is written into ``super_dir`` if given, since it is
+           much cheaper to do this where the schema already is
+
+    Returns
+    -------
+    tuple[Path | None, dict[str, Any] | None, list[str]]
+        The path of the datamodel super schema, the archive schema, and the archive entries.
+    """
+    path = None
+    if "datamodel_name" in schema:
+        path = _super_schema_path(uri)
+
+        if super_dir is not None:
+            save_path = super_dir / path
+            save_path.parent.mkdir(parents=True, exist_ok=True)
+
+            with save_path.open("w") as f:
+                yaml.dump(schema, f, sort_keys=True)
+
+    if "archive_meta" in schema:
+        archive = archive_schema(schema)
+        return path, archive, list(_archive_lines(archive or {}))
+
+    return path, None, []
+
+
+# The super schemas (and where to write them) shared with the worker processes
+_WORKER_STATE: tuple[dict[str, dict[str, Any]], Path | None] = ({}, None)
+
+
+def _init_worker(schemas: dict[str, dict[str, Any]], super_dir: Path | None) -> None:
+    global _WORKER_STATE
+    _WORKER_STATE = (schemas, super_dir)
+
+
+def _worker(uri: str) -> tuple[Path | None, dict[str, Any] | None, list[str]]:
+    schemas, super_dir = _WORKER_STATE
+    return _process_uri(uri, schemas[uri], super_dir)
+
+
+def _records(
+    verbose: bool = False, workers: int | None = None, super_dir: Path | None = None, uris: Container[str] | None = None
+) -> Generator[tuple[str, dict[str, Any], Path | None, dict[str, Any] | None, list[str]], None, None]:
+    """
+    Produce the outputs for each of the latest schemas, in the order of the URIs.
+        -> (URI, super schema, super schema path, archive schema, archive entries)
+    """
+    # Share the super schema form of the referenced schemas between all the schemas
+    builder = SuperSchemaBuilder()
+
+    # The super schemas are all built up front, both because this is cheap when
+    # done together and so that they are ready before any worker process starts
+    schemas = {uri: super_schema(uri, builder=builder) for uri in _get_latest_uris() if uris is None or uri in uris}
+
+    if workers is None or workers <= 1:
+        results = (_process_uri(uri, schema, super_dir) for uri, schema in schemas.items())
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schemas, super_dir))
+        # Results are streamed back in the order of the URIs, whatever order they complete in
+        results = pool.map(_worker, schemas)
+
+    try:
+        for (uri, schema), (path, archive, entries) in zip(schemas.items(), results, strict=True):
+            if verbose:
+                print(f"    processing {uri}")
+                if path is not None:
+                    print("        -> datamodel super_schema")
+                if archive is not None:
+                    print("        -> archive information")
+
+            yield uri, schema, path, archive, entries
+    finally:
+        if workers is not None and workers > 1:
+            pool.shutdown(cancel_futures=True)
+
+
+class _SuperSchemas(Mapping):
+    """
+    The datamodel super schemas of all the latest schemas, by path.
+        -> Those which were not rebuilt by the dump are only read (from the super schemas
+           written by an earlier dump) or built (if none were written) if they are looked up
+
+    Parameters
+    ----------
+    uris : dict[Path, str]
+        The path -> URI of every datamodel super schema.
+    built : dict[Path, dict[str, Any]]
+        The super schemas already built, by path.
+    super_dir : Path, optional
+        Where the super schemas are written, if they are.
+    """
+
+    def __init__(self, uris: dict[Path, str], built: dict[Path, dict[str, Any]], super_dir: Path | None = None) -> None:
+        self._uris = uris
+        self._built = dict(built)
+        self._super_dir = super_dir
+
+    def __getitem__(self, path: Path) -> dict[str, Any]:
+        if path not in self._built:
+            if self._super_dir is None:
+                self._built[path] = super_schema(self._uris[path])
+            else:
+                # These are up to date, as any which are missing or modified are rebuilt
+                with (self._super_dir / path).open() as f:
+                    self._built[path] = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))  # noqa: S506
+
+        return self._built[path]
+
+    def __len__(self) -> int:
+        return len(self._uris)
+
+    def __iter__(self) -> Iterator[Path]:
+        yield from self._uris
+
+
+def _file_sha256(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+@cache
+def _code_sha256() -> str:
+    """
+    Hash everything, other than the resources, that the outputs depend on.
+    """
+    digest = hashlib.sha256(_environment())
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+
+def _inputs_sha256(output: ArchiveOutput) -> str:
+    """
+    Hash what the files holding the archive information of all the schemas are written from.
+    """
+    return hashlib.sha256(json.dumps([output["archive_schemas"], output["archive_data"]]).encode()).hexdigest()
+
+
+def _write_archive_file(path: Path, output: ArchiveOutput, table_format: str | None = None) -> None:
+    """
+    Write one of the files holding the archive information of all the schemas.
+        -> The archive table if a table format is given, otherwise by the suffix of the path
+    """
+    if table_format is not None:
+        write_archive_table(path, output["archive_schemas"], table_format)
+        return
+
+    with path.open("w") as f:
+        if path.suffix == ".json":
+            json.dump(output["archive_schemas"], f)
+        elif path.suffix == ".yaml":
+            yaml.dump(output["archive_schemas"], f, sort_keys=True)
+        else:
+            # The lines are written as they are read, rather than joined into one string
+            for index, line in enumerate(output["archive_data"]):
+                f.write(f"\n{line}" if index else line)
+
+
+def _load_manifest(path: Path) -> DumpManifest | None:
+    try:
+        with path.open() as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        manifest.get("format") != MANIFEST_FORMAT
+        or manifest.get("code") != _code_sha256()
+        or not isinstance(manifest.get("outputs"), dict)
+    ):
+        return None
+
+    return manifest
+
+
+def _rebuild_reason(dependencies: dict[str, str], record: DumpRecord, super_dir: Path | None) -> str | None:
+    """
+    Find why the outputs recorded for a schema need to be rebuilt, if they do.
+    """
+    previous = record["dependencies"]
+    if changed := sorted(uri for uri in dependencies.keys() | previous.keys() if dependencies.get(uri) != previous.get(uri)):
+        return f"changed: {', '.join(changed)}"
+
+    # The super schema may never have been written (the sha256 is None), e.g. by a dump without super schemas
+    if super_dir is not None and record["super_schema"] is not None:
+        written = record["super_schema_sha256"]
+        if written is None or _file_sha256(super_dir / record["super_schema"]) != written:
+            return "super schema missing or modified"
+
+    return None
+
+
+def _process(
+    verbose: bool = False,
+    workers: int | None = None,
+    super_dir: Path | None = None,
+    manifest: DumpManifest | None = None,
+    reason: str = "new",
+) -> tuple[ArchiveOutput, dict[str, DumpRecord]]:
+    """
+    Produce the outputs for all the latest schemas, only rebuilding those for which
+    the manifest does not hold up to date outputs.
+
+    Returns
+    -------
+    tuple[ArchiveOutput, dict[str, DumpRecord]]
+        The outputs and the new manifest records.
+    """
+    previous = {} if manifest is None else manifest["schemas"]
+
+    latest = {uri: dependencies(uri) for uri in _get_latest_uris()}
+    rebuilt = {}
+    for uri, uri_dependencies in latest.items():
+        if (record := previous.get(uri)) is None:
+            rebuilt[uri] = reason
+        elif (uri_reason := _rebuild_reason(uri_dependencies, record, super_dir)) is not None:
+            rebuilt[uri] = uri_reason
+
+    built = {uri: result for uri, *result in _records(verbose, workers, super_dir, rebuilt)}
+
     super_schemas: dict[Path, dict[str, Any]] = {}
+    super_uris: dict[Path, str] = {}
     archive_schemas: dict[str, dict[str, Any]] = {}
     archive_data: list[str] = []
+    records: dict[str, DumpRecord] = {}
+    for uri, uri_dependencies in latest.items():
+        if uri in built:
+            schema, path, archive, entries = built[uri]
+            if path is not None:
+                super_schemas[path] = schema
 
-    for uri in _get_latest_uris():
-        schema = super_schema(uri)
-        if verbose:
-            print(f"    processing {uri}")
-        if "datamodel_name" in schema:
-            if verbose:
-                print("        -> datamodel super_schema")
-            path = Path(uri.replace("asdf://stsci.edu/datamodels/roman/schemas/", "")).with_suffix(".yaml")
-            super_schemas[path] = schema
+            record = records[uri] = {
+                "dependencies": uri_dependencies,
+                "super_schema": None if path is None else path.as_posix(),
+                "super_schema_sha256": None if path is None or super_dir is None else _file_sha256(super_dir / path),
+                "archive_schema": archive,
+                "archive_entries": entries,
+            }
+        else:
+            record = records[uri] = previous[uri]
 
-        if "archive_meta" in schema:
-            if verbose:
-                print("        -> archive information")
-            archive_schemas[uri] = archive_schema(schema)
-            archive_data.extend(archive_entries(schema))
+        if record["super_schema"] is not None:
+            super_uris[Path(record["super_schema"])] = uri
+        if record["archive_schema"] is not None:
+            archive_schemas[uri] = record["archive_schema"]
+            archive_data.extend(record["archive_entries"])
+
+    for uri in previous.keys() - latest.keys():
+        rebuilt[uri] = "removed"
 
-    return {
-        "super_schemas": super_schemas,
+        # Remove the super schemas which are no longer produced
+        if (
+            super_dir is not None
+            and (path := previous[uri]["super_schema"]) is not None
+            and not any(record["super_schema"] == path for record in records.values())
+        ):
+            (super_dir / path).unlink(missing_ok=True)
+
+    output: ArchiveOutput = {
+        "super_schemas": _SuperSchemas(super_uris, super_schemas, super_dir),
+        "rebuilt_super_schemas": super_schemas,
         "archive_schemas": archive_schemas,
         "archive_data": archive_data,
+        "rebuilt": rebuilt,
     }
 
+    return output, records
+
 
 def dump(
     base_dir: Path,
@@ -83,30 +370,97 @@ def dump(
     archive_yaml: bool = True,
     archive_txt: bool = True,
     verbose: bool = False,
+    workers: int | None = None,
+    force: bool = False,
+    archive_table: str | None = None,
 ) -> ArchiveOutput:
-    output = _process(verbose=verbose)
+    """
+    Write the super schemas and the archive information for all the latest schemas.
+
+    A manifest recording the content hashes of the resources each output was
+    built from is kept in ``base_dir``, so that later dumps only rebuild the
+    outputs of the schemas affected by a change to the resources. It also records
+    what each of the files holding the archive information of all the schemas was
+    written from, along with its hash, so that each is rewritten whenever it is out
+    of date or has been modified.
+
+    Parameters
+    ----------
+    base_dir : Path
+        The directory to write into.
+    super_schema, archive_json, archive_yaml, archive_txt : bool, optional
+        Which outputs to write, by default all of them.
+    verbose : bool, optional
+        Report the progress and what was rebuilt, by default False.
+    workers : int, optional
+        The number of worker processes to spread the schemas over, by default (or
+        if 1) everything is done in this process. The output is identical either way.
+    force : bool, optional
+        Rebuild everything, ignoring the manifest, by default False.
+    archive_table : str, optional
+        Also write the archive information as a columnar table, ``archive_data`` in
+        one of the `TABLE_FORMATS` ("npy", "csv", "parquet" or "arrow"), by default
+        no table is written. See `write_archive_table`.
+
+    Returns
+    -------
+    ArchiveOutput
+        All the datamodel super schemas (those not rebuilt by this dump are built if
+        they are looked up), the super schemas rebuilt by this dump, all the archive
+        schemas and archive entries, and the schemas that were rebuilt along with why.
+    """
+    if archive_table is not None and archive_table not in TABLE_FORMATS:
+        raise ValueError(f"Unknown archive table format {archive_table}, must be one of {', '.join(TABLE_FORMATS)}")
 
     base_dir.mkdir(parents=True, exist_ok=True)
 
-    if super_schema:
-        super_dir = base_dir / "super_schemas"
-        for path, schema in output["super_schemas"].items():
-            save_path = super_dir / path
-            save_path.parent.mkdir(parents=True, exist_ok=True)
+    super_dir = base_dir / "super_schemas" if super_schema else None
+    manifest_path = base_dir / MANIFEST_FILENAME
 
-            with save_path.open("w") as f:
-                yaml.dump(schema, f, sort_keys=True)
+    # The manifest only describes what has been written, so without any outputs everything has to be built
+    tracked = super_schema or archive_json or archive_yaml or archive_txt or archive_table is not None
 
-    if archive_json:
-        with (base_dir / "archive_schemas.json").open("w") as f:
-            json.dump(output["archive_schemas"], f)
+    if force:
+        manifest, reason = None, "forced"
+    elif not tracked or (manifest := _load_manifest(manifest_path)) is None:
+        manifest, reason = None, "no valid manifest"
+    else:
+        reason = "new"
 
-    if archive_yaml:
-        with (base_dir / "archive_schemas.yaml").open("w") as f:
-            yaml.dump(output["archive_schemas"], f, sort_keys=True)
+    output, records = _process(verbose=verbose, workers=workers, super_dir=super_dir, manifest=manifest, reason=reason)
+
+    if verbose:
+        print(f"Rebuilt {len(output['rebuilt'])} of {len(records)} schemas")
+        for uri, uri_reason in output["rebuilt"].items():
+            print(f"    {uri}: {uri_reason}")
+
+    # Each file is only rewritten if it was written from other archive information, or has since been modified
+    #   -> A file which was not written by a dump is left as it was recorded, so that it is rewritten once it is asked for
+    inputs = _inputs_sha256(output)
+    outputs = {} if manifest is None else dict(manifest["outputs"])
+    for write, filename, table_format in (
+        (archive_json, "archive_schemas.json", None),
+        (archive_yaml, "archive_schemas.yaml", None),
+        (archive_txt, "archive_data.txt", None),
+        (archive_table is not None, f"archive_data{TABLE_FORMATS.get(archive_table, '')}", archive_table),
+    ):
+        if not write:
+            continue
+
+        path = base_dir / filename
+        if (
+            (recorded := outputs.get(filename)) is not None
+            and recorded["inputs"] == inputs
+            and recorded["sha256"] is not None
+            and _file_sha256(path) == recorded["sha256"]
+        ):
+            continue
+
+        _write_archive_file(path, output, table_format)
+        outputs[filename] = {"inputs": inputs, "sha256": _file_sha256(path)}
 
-    if archive_txt:
-        with (base_dir / "archive_data.txt").open("w") as f:
-            f.write("\n".join(output["archive_data"]))
+    if tracked:
+        with manifest_path.open("w") as f:
+            json.dump({"format": MANIFEST_FORMAT, "code": _code_sha256(), "schemas": records, "outputs": outputs}, f)
 
     return output
@@ -9,6 +9,8 @@ import asdf.resource
 import asdf.schema
 
 from rad import resources
+from rad._index import load_index
+from rad.integration import _indexed_mappings
 
 if TYPE_CHECKING:
     from collections.abc import Generator
@@ -16,17 +18,27 @@ if TYPE_CHECKING:
 
 __all__ = ["asdf_ssc_config"]
 
+_SSC_PREFIX = "asdf://stsci.edu/datamodels/roman/schemas/SSC/"
+
 
 @contextmanager
 def asdf_ssc_config() -> Generator[asdf.config.AsdfConfig, None, None]:
     """
     Fixture to load the SSC schemas into asdf for testing
+        -> if the configuration already serves SSC schemas (e.g. from another
+           source of the RAD resources), those are used as they are
     """
     with asdf.config_context() as config:
-        resource_mapping = asdf.resource.DirectoryResourceMapping(
-            files(resources) / "schemas" / "SSC", "asdf://stsci.edu/datamodels/roman/schemas/SSC/", recursive=True
-        )
-        config.add_resource_mapping(resource_mapping)
+        if not any(uri.startswith(_SSC_PREFIX) for uri in config.resource_manager):
+            resources_root = files(resources)
+
+            if (index := load_index(resources_root)) is not None:
+                (resource_mapping,) = _indexed_mappings(resources_root, index, "schemas/SSC")
+            else:
+                resource_mapping = asdf.resource.DirectoryResourceMapping(
+                    resources_root / "schemas" / "SSC", _SSC_PREFIX, recursive=True
+                )
+            config.add_resource_mapping(resource_mapping)
 
         yield config
 
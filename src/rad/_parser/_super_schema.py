@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import copy
 from collections import abc
 from typing import TYPE_CHECKING
 from urllib.parse import urldefrag
@@ -10,11 +9,47 @@ import asdf.schema
 import asdf.treeutil
 from asdf.generic_io import resolve_uri
 
+from rad._index import _parse
+
+from ._cache import SuperSchemaCache
+
 if TYPE_CHECKING:
     from typing import Any
 
+    from ._builder import SuperSchemaBuilder
+
+
+__all__ = ["super_schema", "super_schema_cache"]
+
+# The cache shared by all calls to super_schema
+super_schema_cache = SuperSchemaCache()
+
+
+def _load_schema(uri: str) -> dict[str, Any]:
+    """
+    Load a schema, without resolving references, from the content the ASDF
+    configuration currently serves for it.
+
+    ASDF caches the schemas it loads by URI alone, so it would keep serving the old
+    schemas after the resources in the configuration change (e.g. to those of an
+    earlier commit). Schemas not provided through the resource manager are loaded
+    by ASDF.
+
+    Parameters
+    ----------
+    uri : str
+        The URI of the schema.
+
+    Returns
+    -------
+    dict[str, Any]
+        The schema, which can be freely modified.
+    """
+    resource_manager = asdf.get_config().resource_manager
+    if uri not in resource_manager:
+        return asdf.schema.load_schema(uri, resolve_references=False)
 
-__all__ = ["super_schema"]
+    return _parse(resource_manager[uri])
 
 
 def _get_schema_from_uri(schema_uri: str) -> dict[str, Any]:
@@ -32,7 +67,7 @@ def _get_schema_from_uri(schema_uri: str) -> dict[str, Any]:
         The loaded schema as a dictionary.
     """
     # See Issue https://github.com/asdf-format/asdf/issues/1977
-    schema = asdf.schema.load_schema(schema_uri, resolve_references=False)
+    schema = _load_schema(schema_uri)
 
     def resolve_refs(node, json_id):
         if json_id is None:
@@ -54,30 +89,73 @@ def _get_schema_from_uri(schema_uri: str) -> dict[str, Any]:
     return asdf.treeutil.walk_and_modify(schema, resolve_refs)
 
 
-def _deep_merge(target: dict[str, Any], source: dict[str, Any]) -> dict[str, Any]:
+def _deep_merge(target: abc.Mapping[str, Any], source: abc.Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Merge the source into the target.
+        -> Neither input is modified, the result shares every subtree which the
+           merge leaves untouched with the inputs (copy-on-write).
+    """
+    result = dict(target)
     for key, value in source.items():
-        if key in target:
-            if isinstance(target[key], abc.Mapping):
+        if key in result:
+            if isinstance(result[key], abc.Mapping):
                 if not isinstance(value, abc.Mapping):
-                    raise ValueError(f"Cannot merge non-mapping value {value} into {target[key]}")
-                _deep_merge(target[key], value)
-            elif isinstance(target[key], list) and isinstance(value, list) and key == "required":
-                target[key] = list(set(target[key]) | set(value))
+                    raise ValueError(f"Cannot merge non-mapping value {value} into {result[key]}")
+                result[key] = _deep_merge(result[key], value)
+            elif isinstance(result[key], list) and isinstance(value, list) and key == "required":
+                result[key] = list(set(result[key]) | set(value))
             elif key in ("title", "description"):
-                target[key] += f"\n- {value}"
-            elif target[key] != value:
+                result[key] = result[key] + f"\n- {value}"
+            elif result[key] != value:
                 # special case for datamodel_name to allow CCSP derived products
                 if key != "datamodel_name":
-                    raise ValueError(f"{key} has conflicting values: {target[key]} and {value}")
+                    raise ValueError(f"{key} has conflicting values: {result[key]} and {value}")
         else:
-            target[key] = value
+            result[key] = value
 
-    return target
+    return result
 
 
-def super_schema(schema_uri: str) -> dict[str, Any]:
+def _merge_node(node: dict[str, Any]) -> dict[str, Any]:
     """
-    Find the "super schema" for a given schema URI.
+    Turn a node, whose children have already been turned, into its super schema form.
+        -> Remove the `$schema` and `id` keywords and merge any `allOf` combiner
+
+    Note
+    ----
+    Only the node itself is modified, its children may be shared with other trees.
+    """
+    if isinstance(node, abc.Mapping) and "$schema" in node:
+        del node["$schema"]
+    if isinstance(node, abc.Mapping) and "id" in node:
+        del node["id"]
+    if isinstance(node, abc.Mapping) and "allOf" in node:
+        # Special case for table columns, we want them to remain in the super schema
+        # for display purposes, but remove the allOf combiner as it cannot be merged
+        # easily. This is fine as the super schema is not used for validation. Only
+        # for informational reference.
+        if "not" in node["allOf"][0]:
+            node["all_of_columns"] = node["allOf"]
+            del node["allOf"]
+            return node
+
+        target = node["allOf"][0]
+        for item in node["allOf"][1:]:
+            if isinstance(item, abc.Mapping):
+                if "$schema" in item or "id" in item:
+                    item = {key: value for key, value in item.items() if key not in ("$schema", "id")}
+                target = _deep_merge(target, item)
+            else:
+                raise ValueError(f"Expected a mapping in allOf, got {item}")
+
+        del node["allOf"]
+        return _deep_merge(node, target)
+    return node
+
+
+def _build_super_schema(schema_uri: str) -> dict[str, Any]:
+    """
+    Build the "super schema" for a given schema URI.
         -> Parse the schema URI and resolve the `allOf` combiners
 
     Parameters
@@ -93,44 +171,41 @@ def super_schema(schema_uri: str) -> dict[str, Any]:
 
     schema = _get_schema_from_uri(schema_uri)
 
-    def callback(node: dict[str, Any]) -> dict[str, Any]:
-        if isinstance(node, abc.Mapping) and "$schema" in node:
-            del node["$schema"]
-        if isinstance(node, abc.Mapping) and "id" in node:
-            del node["id"]
-        if isinstance(node, abc.Mapping) and "allOf" in node:
-            # Special case for table columns, we want them to remain in the super schema
-            # for display purposes, but remove the allOf combiner as it cannot be merged
-            # easily. This is fine as the super schema is not used for validation. Only
-            # for informational reference.
-            if "not" in node["allOf"][0]:
-                node["all_of_columns"] = node["allOf"]
-                del node["allOf"]
-                return node
-
-            target = copy.deepcopy(node["allOf"][0])
-            for item in node["allOf"][1:]:
-                if isinstance(item, abc.Mapping):
-                    item = copy.deepcopy(item)
-                    if "$schema" in item:
-                        del item["$schema"]
-                    if "id" in item:
-                        del item["id"]
-                    target = _deep_merge(target, item)
-                else:
-                    raise ValueError(f"Expected a mapping in allOf, got {item}")
-
-            del node["allOf"]
-            return _deep_merge(node, target)
-        return node
-
     id_ = schema.get("id")
     meta_ = schema.get("$schema")
 
-    schema = asdf.treeutil.walk_and_modify(schema, callback)
+    schema = asdf.treeutil.walk_and_modify(schema, _merge_node)
     if id_:
         schema["id"] = id_
     if meta_:
         schema["$schema"] = meta_
 
     return schema
+
+
+def super_schema(
+    schema_uri: str, cache: SuperSchemaCache | None = None, builder: SuperSchemaBuilder | None = None
+) -> dict[str, Any]:
+    """
+    Find the "super schema" for a given schema URI.
+        -> The super schema is only built if it is not already cached for the
+           current content of the schema and everything it references.
+
+    Parameters
+    ----------
+    schema_uri : str
+        The URI of the schema to parse.
+    cache : SuperSchemaCache, optional
+        The cache to use, by default the shared ``super_schema_cache``.
+    builder : SuperSchemaBuilder, optional
+        The builder to share the super schema form of the referenced schemas with
+        when the super schema needs to be built, by default it is built on its own.
+
+    Returns
+    -------
+    dict[str, Any]
+        The parsed schema as a dictionary, which can be freely modified.
+    """
+    cache = super_schema_cache if cache is None else cache
+
+    return cache.get(schema_uri, _build_super_schema if builder is None else builder.build)
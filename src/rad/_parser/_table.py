@@ -0,0 +1,146 @@
+"""
+Columnar tables of the archive catalog mappings.
+
+The archive information is otherwise written as a nested document (the archive
+schemas) or as pipe-delimited strings (the archive data), both of which have to be
+parsed in full by the archive's ingest. As a table, with one row per destination of
+each archive column, it can instead be memory-mapped and filtered by destination
+table without parsing any text:
+    - ``npy``: a numpy structured array, ``numpy.load(path, mmap_mode="r")``
+    - ``csv``: comma-separated values, with a header row
+    - ``parquet``, ``arrow``: Parquet or (uncompressed) Arrow IPC files, which need
+      the optional ``pyarrow`` dependency
+"""
+
+from __future__ import annotations
+
+import csv
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from ._archive import _archive_columns, _is_string, _schema_path
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+    from typing import Any
+
+
+__all__ = ["TABLE_FORMATS", "archive_rows", "archive_table", "write_archive_table"]
+
+# The table format -> the suffix of its file
+TABLE_FORMATS = {
+    "npy": ".npy",
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+}
+
+# The columns of the table, the last is 1 for a string datatype, 0 for a numeric one,
+# and -1 if the datatype is not given
+_FIELDS = ("archive_meta", "path", "table", "column", "datatype", "string")
+
+
+def archive_rows(
+    archive_schemas: dict[str, dict[str, Any]],
+) -> Generator[tuple[str, str, str, str, str, int], None, None]:
+    """
+    Produce the rows of the archive table, in the same order as the archive data.
+
+    Parameters
+    ----------
+    archive_schemas : dict[str, dict[str, Any]]
+        URI -> archive schema.
+
+    Yields
+    ------
+    tuple[str, str, str, str, str, int]
+        The archive_meta, data path (in the same form as in the archive data, e.g.
+        ``meta.top.filename`` or ``meta.exposure.start_time``), destination table and
+        column, datatype (empty if not given), and whether the datatype holds strings,
+        of each destination.
+    """
+    for archive in archive_schemas.values():
+        archive_meta = archive.get("archive_meta", "")
+        for path, datatype, destination in _archive_columns(archive):
+            string = -1 if datatype is None else int(_is_string(datatype))
+            schema_path = _schema_path(path)
+            for dest in destination:
+                table, _, column = dest.partition(".")
+                yield archive_meta, schema_path, table, column, datatype or "", string
+
+
+def archive_table(archive_schemas: dict[str, dict[str, Any]]) -> np.ndarray:
+    """
+    Build the archive table as a numpy structured array.
+
+    Parameters
+    ----------
+    archive_schemas : dict[str, dict[str, Any]]
+        URI -> archive schema.
+
+    Returns
+    -------
+    np.ndarray
+        One record per row of `archive_rows`, the text fields are fixed width
+        unicode so that the array can be memory-mapped.
+    """
+    rows = list(archive_rows(archive_schemas))
+
+    widths = [max((len(row[index]) for row in rows), default=0) or 1 for index in range(len(_FIELDS) - 1)]
+    dtype = [*((field, f"U{width}") for field, width in zip(_FIELDS[:-1], widths, strict=True)), (_FIELDS[-1], "i1")]
+
+    return np.array(rows, dtype=dtype)
+
+
+def _arrow_table(table: np.ndarray) -> Any:
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required to write Arrow or Parquet tables. Please install it with `pip install pyarrow`."
+        ) from e
+
+    return pa.table({field: table[field] for field in _FIELDS})
+
+
+def write_archive_table(path: Path, archive_schemas: dict[str, dict[str, Any]], table_format: str = "npy") -> None:
+    """
+    Write the archive table.
+
+    Parameters
+    ----------
+    path : Path
+        The file to write.
+    archive_schemas : dict[str, dict[str, Any]]
+        URI -> archive schema.
+    table_format : str, optional
+        The format to write, one of `TABLE_FORMATS`, by default "npy".
+    """
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(f"Unknown archive table format {table_format}, must be one of {', '.join(TABLE_FORMATS)}")
+
+    if table_format == "csv":
+        # The rows are written as they are produced
+        with path.open("w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(_FIELDS)
+            writer.writerows(archive_rows(archive_schemas))
+        return
+
+    table = archive_table(archive_schemas)
+    if table_format == "npy":
+        np.save(path, table, allow_pickle=False)
+        return
+
+    arrow_table = _arrow_table(table)
+    if table_format == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(arrow_table, path)
+    else:
+        from pyarrow import feather
+
+        # Uncompressed, so that it can be memory-mapped
+        feather.write_feather(arrow_table, path, compression="uncompressed")
@@ -1,7 +1,13 @@
-import importlib.resources as importlib_resources
+import os
+from collections.abc import Mapping
 
 from asdf.resource import DirectoryResourceMapping
 
+from ._index import _resources_root, closure, latest_manifest_uris, load_index
+
+# Environment variable to opt into only registering the resources needed by the latest manifests
+LATEST_ONLY_ENV = "RAD_LATEST_ONLY"
+
 
 class RadDirectoryResourceMapping(DirectoryResourceMapping):
     """
@@ -20,21 +26,155 @@ class RadDirectoryResourceMapping(DirectoryResourceMapping):
                 yield file, components
 
 
+class RadIndexedResourceMapping(Mapping):
+    """
+    A resource mapping backed by the prebuilt resource index.
+
+    The URIs, and the files they correspond to, are answered directly from the
+    index so no directory walking is needed. A resource file is only opened when
+    its content is requested.
+
+    A mapping listing only some of the resources (see ``RAD_LATEST_ONLY``) can be
+    given the entries of all of them as a fallback, so that a resource it does not
+    list is still loaded when it is requested.
+
+    Parameters
+    ----------
+    root : importlib.resources.abc.Traversable
+        The resources directory the index paths are relative to.
+    entries : dict
+        The index entries (URI -> path, size, sha256) for this mapping.
+    fallback : dict, optional
+        The index entries to look up the URIs missing from entries in, by default none.
+    """
+
+    def __init__(self, root, entries, fallback=None):
+        self._root = root
+        self._entries = entries
+        self._fallback = {} if fallback is None else fallback
+
+    def __getitem__(self, uri):
+        return (self._root / self.entry(uri)["path"]).read_bytes()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        yield from self._entries
+
+    def __contains__(self, uri):
+        return uri in self._entries
+
+    def entry(self, uri):
+        """
+        Get the index entry (path, size, sha256 and references) for a URI.
+        """
+        if (entry := self._entries.get(uri)) is None:
+            return self._fallback[uri]
+
+        return entry
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._root!r}, <{len(self)} resources>)"
+
+
+def _latest_only():
+    """
+    Check if the latest-only registration mode has been selected via the environment.
+    """
+    return os.environ.get(LATEST_ONLY_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _indexed_mappings(root, index, *directories, exclude=(), uris=None):
+    """
+    Create an indexed resource mapping for the index entries within each directory.
+        -> if uris is given, only the entries for those URIs are included, the
+           entries for the rest of the directory are looked up on a miss
+    """
+    entries = [{} for _ in directories]
+    fallbacks = [{} for _ in directories]
+    for uri, entry in index["resources"].items():
+        path = entry["path"]
+        if any(path.startswith(f"{excluded}/") for excluded in exclude):
+            continue
+
+        for directory, mapping, fallback in zip(directories, entries, fallbacks, strict=True):
+            if path.startswith(f"{directory}/"):
+                if uris is None or uri in uris:
+                    mapping[uri] = entry
+                else:
+                    fallback[uri] = entry
+                break
+
+    return [RadIndexedResourceMapping(root, mapping, fallback) for mapping, fallback in zip(entries, fallbacks, strict=True)]
+
+
 def get_resource_mappings():
     """
     Get the resource mapping instances for the datamodel schemas
     and manifests.  This method is registered with the
     asdf.resource_mappings entry point.
 
+    Note:
+        The mappings are built from the index generated in the resources directory
+        when the package is built, falling back on walking the resources directory
+        if the index is missing (e.g. in a source checkout) or stale.
+
+        If the ``RAD_LATEST_ONLY`` environment variable is set (to ``1``, ``true``,
+        ``yes`` or ``on``), only the newest ``datamodels`` and ``static`` manifests and
+        the resources they (indirectly) reference are listed by the mappings. The
+        mappings still load the rest when asked for them, and they can be registered
+        with ASDF when needed using `register_all_resources`. This mode requires the
+        index, without it all resources are registered.
+
     Returns
     -------
     list of collections.abc.Mapping
     """
-    from . import resources
+    resources_root = _resources_root()
 
-    resources_root = importlib_resources.files(resources)
+    if (index := load_index(resources_root)) is not None:
+        uris = closure(index, latest_manifest_uris(index)) if _latest_only() else None
+        return _indexed_mappings(resources_root, index, "schemas", "manifests", exclude=("schemas/SSC",), uris=uris)
 
     return [
         RadDirectoryResourceMapping(resources_root / "schemas", "asdf://stsci.edu/datamodels/roman/schemas/", recursive=True),
         DirectoryResourceMapping(resources_root / "manifests", "asdf://stsci.edu/datamodels/roman/manifests/"),
     ]
+
+
+def register_all_resources(config=None):
+    """
+    Register any RAD resources left out of an ASDF configuration, for example
+    by the latest-only registration mode, so that files using older versions
+    of the RAD schemas can be opened.
+
+    Parameters
+    ----------
+    config : asdf.config.AsdfConfig, optional
+        The configuration to add the resources to, by default the current
+        ASDF configuration.
+
+    Returns
+    -------
+    int
+        The number of resources that were registered.
+    """
+    import asdf
+
+    config = asdf.get_config() if config is None else config
+    resources_root = _resources_root()
+
+    if (index := load_index(resources_root)) is None:
+        return 0
+
+    registered = config.resource_manager
+    remaining = {uri for uri in index["resources"] if uri not in registered}
+
+    count = 0
+    for mapping in _indexed_mappings(resources_root, index, "schemas", "manifests", exclude=("schemas/SSC",), uris=remaining):
+        if len(mapping):
+            config.add_resource_mapping(mapping)
+            count += len(mapping)
+
+    return count
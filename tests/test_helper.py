@@ -0,0 +1,609 @@
+"""
+Test the engine of the helper app used to manage the RAD resources (``scripts/helper``).
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from semantic_version import Version
+
+# The helper app is part of the repository's scripts, not of the package, and needs the
+# optional script dependencies
+pytest.importorskip("textual")
+pytest.importorskip("astropy")
+git = pytest.importorskip("git")
+
+sys.path.append(str(Path(__file__).parent.parent / "scripts"))
+
+from helper import _batch, _frozen
+from helper import _manager as _manager_module
+from helper._batch import BatchBump, _Change, _flush
+from helper._bump import BumpPlan, _Bump
+from helper._frozen import CACHE_FILENAME, frozen_uris
+from helper._manager import _REFERENCE_PATTERN, _Manager
+from helper._resource import rewrite_uris
+from helper._snapshot import SNAPSHOT_FILENAME
+
+_URI_PREFIX = "asdf://stsci.edu/datamodels/roman/schemas/"
+
+# Current URI -> new URI of the resources rewritten
+_REWRITES = {
+    f"{_URI_PREFIX}meta/common-1.1.0": f"{_URI_PREFIX}meta/common-1.2.0",
+    f"{_URI_PREFIX}meta/basic-1.0.0": f"{_URI_PREFIX}meta/basic-1.1.0",
+}
+
+_TAG_URI_PREFIX = "asdf://stsci.edu/datamodels/roman/tags/"
+_MANIFEST_URI = "asdf://stsci.edu/datamodels/roman/manifests/datamodels-1.0.0"
+
+# path in latest -> (URI, body) of the resources in the test repository
+# --> basic <- common <- wfi_image <- datamodels manifest, with exposure (which is not
+#     frozen) referencing basic and referenced by wfi_image
+_RESOURCES = {
+    "meta/basic.yaml": (f"{_URI_PREFIX}meta/basic-1.0.0", "title: Basic\n"),
+    "meta/common.yaml": (
+        f"{_URI_PREFIX}meta/common-1.0.0",
+        f"title: Common\nallOf:\n  - $ref: {_URI_PREFIX}meta/basic-1.0.0\n",
+    ),
+    "meta/exposure.yaml": (
+        f"{_URI_PREFIX}meta/exposure-1.0.0",
+        f"title: Exposure\ndescription: Same as {_URI_PREFIX}meta/basic-1.0.0.\n",
+    ),
+    "wfi_image.yaml": (
+        f"{_URI_PREFIX}wfi_image-1.0.0",
+        (
+            f"title: Image\nproperties:\n  meta:\n    allOf:\n"
+            f"      - $ref: {_URI_PREFIX}meta/common-1.0.0\n      - $ref: {_URI_PREFIX}meta/exposure-1.0.0\n"
+        ),
+    ),
+    "manifests/datamodels.yaml": (
+        _MANIFEST_URI,
+        (
+            f"extension_uri: asdf://stsci.edu/datamodels/roman/extensions/datamodels-1.0.0\ntags:\n"
+            f"  - tag_uri: {_TAG_URI_PREFIX}wfi_image-1.0.0\n    schema_uri: {_URI_PREFIX}wfi_image-1.0.0\n"
+        ),
+    ),
+}
+_FROZEN = frozenset(uri for uri, _ in _RESOURCES.values()) - {f"{_URI_PREFIX}meta/exposure-1.0.0"}
+
+
+def _make_repository(path):
+    """
+    Write a small RAD repository: the resources in latest, each with the symlink to it
+    from the installed resources.
+    """
+    for name, (uri, body) in _RESOURCES.items():
+        latest = path / "latest" / name
+        latest.parent.mkdir(parents=True, exist_ok=True)
+        latest.write_text(f"%YAML 1.1\n---\nid: {uri}\n{body}")
+
+        version = uri.split("-")[-1]
+        if name.startswith("manifests/"):
+            symlink = path / "src" / "rad" / "resources" / "manifests" / f"{Path(name).stem}-{version}.yaml"
+        else:
+            symlink = path / "src" / "rad" / "resources" / "schemas" / f"{name.removesuffix('.yaml')}-{version}.yaml"
+        symlink.parent.mkdir(parents=True, exist_ok=True)
+        symlink.symlink_to(os.path.relpath(latest, symlink.parent))
+
+    return path
+
+
+def _tree(path):
+    """
+    The content of every file, and the target of every symlink, under a path.
+    """
+    return {
+        entry.relative_to(path).as_posix(): ("symlink", os.readlink(entry)) if entry.is_symlink() else ("file", entry.read_text())
+        for entry in sorted(path.rglob("*"))
+        if entry.is_symlink() or entry.is_file()
+    }
+
+
+@pytest.fixture
+def repository(tmp_path):
+    return _make_repository(tmp_path / "rad")
+
+
+def _manager(repository):
+    return _Manager(repository, frozen=_FROZEN, snapshot=False)
+
+
+class TestRewriteUris:
+    def test_whole_uris(self):
+        """
+        Check that a URI is only rewritten as a whole, never as part of a longer URI.
+        """
+        body = "\n".join(
+            [
+                f"$ref: {_URI_PREFIX}meta/common-1.1.0",
+                f"$ref: {_URI_PREFIX}meta/common-1.10.0",
+                f"$ref: {_URI_PREFIX}meta/common-1.1.01",
+                f"$ref: {_URI_PREFIX}meta/common-1.1.0.1",
+                f"$ref: {_URI_PREFIX}meta/basic-1.0.0#/definitions/origin",
+                f"allOf: [{_URI_PREFIX}meta/basic-1.0.0, '{_URI_PREFIX}meta/common-1.1.0']",
+            ]
+        )
+
+        assert rewrite_uris(body, _REWRITES) == "\n".join(
+            [
+                f"$ref: {_URI_PREFIX}meta/common-1.2.0",
+                f"$ref: {_URI_PREFIX}meta/common-1.10.0",
+                f"$ref: {_URI_PREFIX}meta/common-1.1.01",
+                f"$ref: {_URI_PREFIX}meta/common-1.1.0.1",
+                f"$ref: {_URI_PREFIX}meta/basic-1.1.0#/definitions/origin",
+                f"allOf: [{_URI_PREFIX}meta/basic-1.1.0, '{_URI_PREFIX}meta/common-1.2.0']",
+            ]
+        )
+
+    def test_prose(self):
+        """
+        Check that a URI followed by punctuation in prose (e.g. a description) is rewritten.
+        """
+        body = (
+            f"description: Same as {_URI_PREFIX}meta/common-1.1.0. See also\n"
+            f"  ({_URI_PREFIX}meta/basic-1.0.0), or {_URI_PREFIX}meta/common-1.1.0: the old one;\n"
+            f"  # compare with {_URI_PREFIX}meta/basic-1.0.0!"
+        )
+
+        assert rewrite_uris(body, _REWRITES) == (
+            f"description: Same as {_URI_PREFIX}meta/common-1.2.0. See also\n"
+            f"  ({_URI_PREFIX}meta/basic-1.1.0), or {_URI_PREFIX}meta/common-1.2.0: the old one;\n"
+            f"  # compare with {_URI_PREFIX}meta/basic-1.1.0!"
+        )
+
+    def test_references(self):
+        """
+        Check that the references found in a body end where a rewrite would end them.
+        """
+        body = (
+            f"$ref: {_URI_PREFIX}meta/common-1.1.0#/definitions/origin\n"
+            f"description: Same as {_URI_PREFIX}meta/basic-1.0.0. See ({_URI_PREFIX}meta/common-1.1.0.1)."
+        )
+
+        assert _REFERENCE_PATTERN.findall(body) == [
+            f"{_URI_PREFIX}meta/common-1.1.0",
+            f"{_URI_PREFIX}meta/basic-1.0.0",
+            f"{_URI_PREFIX}meta/common-1.1.0.1",
+        ]
+
+    def test_unchanged(self):
+        """
+        Check that a body without any of the URIs, or with no URIs to change, is left alone.
+        """
+        body = f"$ref: {_URI_PREFIX}meta/common-1.1.0"
+
+        assert rewrite_uris(body, {}) is body
+        assert rewrite_uris(body, {f"{_URI_PREFIX}meta/common-1.1.0": f"{_URI_PREFIX}meta/common-1.1.0"}) is body
+        assert rewrite_uris("title: nothing to see", _REWRITES) == "title: nothing to see"
+
+
+class TestBatchBump:
+    def test_flush_failure(self, repository, monkeypatch):
+        """
+        Check that when a write fails part way through a flush, every file and symlink
+        is put back the way it was.
+        """
+        resources = repository / "src" / "rad" / "resources" / "schemas" / "meta"
+        changes = {
+            repository / "latest" / "meta" / "basic.yaml": _Change(text="title: Changed\n"),
+            resources / "basic-1.0.0.yaml": _Change(text="title: Frozen\n"),
+            resources / "basic-1.1.0.yaml": _Change(target="../../../../../latest/meta/basic.yaml"),
+            resources / "common-1.0.0.yaml": _Change(target="../../../../../latest/meta/basic.yaml"),
+            repository / "latest" / "meta" / "new.yaml": _Change(text="title: New\n"),
+        }
+        before = _tree(repository)
+
+        write = _batch._write
+        writes = []
+
+        def failing_write(path, change):
+            writes.append(path)
+            if len(writes) == 4:
+                raise OSError("disk full")
+            write(path, change)
+
+        monkeypatch.setattr(_batch, "_write", failing_write)
+
+        with pytest.raises(OSError, match="disk full"):
+            _flush(changes)
+
+        # The first three changes were written before the fourth failed
+        assert writes[:4] == list(changes)[:4]
+        assert _tree(repository) == before
+
+    def test_flush(self, repository):
+        """
+        Check that a flush writes every change.
+        """
+        symlink = repository / "src" / "rad" / "resources" / "schemas" / "meta" / "basic-1.1.0.yaml"
+        changes = {
+            repository / "latest" / "meta" / "basic.yaml": _Change(text="title: Changed\n"),
+            symlink: _Change(target="../../../../../latest/meta/basic.yaml"),
+        }
+
+        _flush(changes)
+
+        assert (repository / "latest" / "meta" / "basic.yaml").read_text() == "title: Changed\n"
+        assert os.readlink(symlink) == "../../../../../latest/meta/basic.yaml"
+        assert not list(repository.rglob("*.tmp"))
+
+    def test_sequential(self, tmp_path):
+        """
+        Check that a batch bump leaves the repository (and the manager) in the same state
+        as bumping the requested resources one at a time, as the app does.
+        """
+        batch_repository = _make_repository(tmp_path / "batch")
+        sequential_repository = _make_repository(tmp_path / "sequential")
+
+        requested = [(f"{_URI_PREFIX}meta/basic-1.0.0", "1.1.0"), (f"{_URI_PREFIX}meta/exposure-1.0.0", "1.0.1")]
+
+        batch_manager = _manager(batch_repository)
+        batch = BatchBump(batch_manager, requested)
+        assert batch.versions == {
+            f"{_URI_PREFIX}meta/basic-1.0.0": "1.1.0",
+            f"{_URI_PREFIX}meta/common-1.0.0": "1.1.0",
+            f"{_URI_PREFIX}meta/exposure-1.0.0": "1.0.1",
+            f"{_URI_PREFIX}wfi_image-1.0.0": "1.1.0",
+            _MANIFEST_URI: "1.1.0",
+        }
+        batch.apply()
+
+        # The batch freezes every resource as it was before the bump, which is what bumping
+        # the resources referencing the others first gives (exposure references basic)
+        sequential_manager = _manager(sequential_repository)
+        for uri, _ in requested[::-1]:
+            resource = sequential_manager[uri]
+            bump = _Bump(resource, BumpPlan(resource, sequential_manager._resources_to_update))
+            sequential_manager.bump(bump.bump({uri: batch.versions[uri] for uri in bump.resources}))
+
+        assert _tree(batch_repository) == _tree(sequential_repository)
+        assert {uri: resource.body for uri, resource in batch_manager._resources.items()} == {
+            uri: resource.body for uri, resource in sequential_manager._resources.items()
+        }
+        assert set(batch_manager._resources) == set(batch.uris.values())
+
+
+def _scanned_referrers(manager):
+    """
+    The referrers of each URI, found by scanning the body of every resource.
+    """
+    referrers = {}
+    for uri, resource in manager._resources.items():
+        for reference in _REFERENCE_PATTERN.findall(resource.body):
+            referrers.setdefault(reference, set()).add(uri)
+
+    return referrers
+
+
+class TestReferenceIndex:
+    def test_index(self, repository):
+        """
+        Check that the index holds the references found in the bodies of the resources.
+        """
+        manager = _manager(repository)
+
+        # The id of each resource is one of the references in its body
+        assert manager._referrers == _scanned_referrers(manager)
+        assert [resource.uri for resource in manager._referring_resources(f"{_URI_PREFIX}meta/basic-1.0.0")] == [
+            f"{_URI_PREFIX}meta/basic-1.0.0",
+            f"{_URI_PREFIX}meta/common-1.0.0",
+            f"{_URI_PREFIX}meta/exposure-1.0.0",
+        ]
+        assert [resource.uri for resource in manager._referring_resources(f"{_TAG_URI_PREFIX}wfi_image-1.0.0")] == [_MANIFEST_URI]
+        assert manager._referring_resources(f"{_URI_PREFIX}meta/unknown-1.0.0") == []
+
+    def test_bump(self, repository):
+        """
+        Check that the index follows the resources as they are bumped.
+        """
+        manager = _manager(repository)
+
+        resource = manager[f"{_URI_PREFIX}meta/basic-1.0.0"]
+        bump = _Bump(resource, BumpPlan(resource, manager._resources_to_update))
+        manager.bump(bump.bump(dict.fromkeys(bump.resources, "1.1.0")))
+
+        assert manager._referrers == _scanned_referrers(manager)
+        assert set(manager._references) == set(manager._resources)
+        assert manager._referring_resources(f"{_URI_PREFIX}meta/basic-1.0.0") == []
+        assert [resource.uri for resource in manager._referring_resources(f"{_URI_PREFIX}meta/basic-1.1.0")] == [
+            f"{_URI_PREFIX}meta/basic-1.1.0",
+            f"{_URI_PREFIX}meta/common-1.1.0",
+            f"{_URI_PREFIX}meta/exposure-1.0.0",
+        ]
+
+    def test_batch_bump(self, repository):
+        """
+        Check that the index follows the resources written by a batch bump.
+        """
+        manager = _manager(repository)
+
+        BatchBump(manager, [(f"{_URI_PREFIX}meta/basic-1.0.0", "1.1.0")]).apply()
+
+        assert manager._referrers == _scanned_referrers(manager)
+        assert set(manager._references) == set(manager._resources)
+        assert manager._referring_resources(f"{_TAG_URI_PREFIX}wfi_image-1.0.0") == []
+
+
+class TestBumpPlan:
+    def test_shared_dependents(self):
+        """
+        Check that a resource reached along several paths is only visited once.
+        """
+        # a <- b, a <- c, b <- d, c <- d
+        resources = {uri: SimpleNamespace(uri=uri) for uri in "abcd"}
+        dependents = {"a": "bc", "b": "d", "c": "d", "d": ""}
+        calls = []
+
+        def find(resource):
+            calls.append(resource.uri)
+            return [resources[uri] for uri in dependents[resource.uri]]
+
+        plan = BumpPlan(resources["a"], find)
+
+        assert sorted(calls) == ["a", "b", "c", "d"]
+        assert plan.graph == {"a": {"b", "c"}, "b": {"d"}, "c": {"d"}, "d": set()}
+        assert plan.resources == resources
+        assert plan.nodes == 4
+        assert plan.edges == 4
+
+        # Extending the plan only visits the resources not already in it
+        resources["e"] = SimpleNamespace(uri="e")
+        dependents["e"] = "d"
+        plan.extend([resources["e"], resources["b"]])
+
+        assert sorted(calls) == ["a", "b", "c", "d", "e"]
+        assert plan.graph["e"] == {"d"}
+        assert plan.nodes == 5
+        assert plan.edges == 5
+
+    def test_repository(self, repository):
+        """
+        Check the plan of a bump, which only follows the frozen resources referencing each resource.
+        """
+        manager = _manager(repository)
+        plan = BumpPlan(manager[f"{_URI_PREFIX}meta/basic-1.0.0"], manager._resources_to_update)
+
+        # exposure is not frozen, so it is updated in place rather than bumped
+        assert plan.graph == {
+            f"{_URI_PREFIX}meta/basic-1.0.0": {f"{_URI_PREFIX}meta/common-1.0.0"},
+            f"{_URI_PREFIX}meta/common-1.0.0": {f"{_URI_PREFIX}wfi_image-1.0.0"},
+            f"{_URI_PREFIX}wfi_image-1.0.0": {_MANIFEST_URI},
+            _MANIFEST_URI: set(),
+        }
+        assert repr(plan) == f"BumpPlan({_URI_PREFIX}meta/basic-1.0.0, nodes=4, edges=3)"
+
+        # The target is bumped last, after everything depending on it
+        bump = _Bump(plan.resource, plan)
+        assert bump._order == (
+            _MANIFEST_URI,
+            f"{_URI_PREFIX}wfi_image-1.0.0",
+            f"{_URI_PREFIX}meta/common-1.0.0",
+            plan.resource.uri,
+        )
+        with pytest.raises(RuntimeError, match="incomplete"):
+            next(bump.bump({plan.resource.uri: "1.1.0"}))
+
+
+class TestLoading:
+    def test_resources(self, repository):
+        """
+        Check that every resource in latest is loaded, with its URI found from its id line.
+        """
+        manager = _manager(repository)
+
+        assert set(manager._resources) == {uri for uri, _ in _RESOURCES.values()}
+        for name, (uri, _) in _RESOURCES.items():
+            path = repository / "latest" / name
+            resource = manager[path]
+
+            assert manager[uri] is resource
+            assert resource.path == path
+            assert resource.body == path.read_text()
+            assert resource.frozen == (uri in _FROZEN)
+            assert resource.yaml["id"] == uri
+
+    def test_unusual_id(self, repository):
+        """
+        Check that a resource whose id is not on a line of its own is still found.
+        """
+        path = repository / "latest" / "meta" / "basic.yaml"
+        path.write_text(f"%YAML 1.1\n---\n{{id: {_URI_PREFIX}meta/basic-1.0.0, title: Basic}}\n")
+
+        manager = _manager(repository)
+
+        assert manager[path].uri == f"{_URI_PREFIX}meta/basic-1.0.0"
+        assert manager[f"{_URI_PREFIX}meta/basic-1.0.0"].path == path
+
+
+@pytest.fixture
+def git_repository(repository, monkeypatch):
+    """
+    The test repository, committed to git.
+    """
+    for variable in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(variable, "rad")
+    for variable in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(variable, "rad@example.com")
+
+    repo = git.Repo.init(repository)
+    repo.git.add(A=True)
+    repo.git.commit(m="Add the resources")
+
+    return repo
+
+
+class TestFrozenUris:
+    @pytest.fixture
+    def releases(self, repository, git_repository, monkeypatch):
+        """
+        Tag a release of the repository, and record the releases read out of the history.
+        """
+        # The RAD remote is this repository itself, so fetching it does not need the network
+        url = _frozen._RAD_URLS[0]
+        git_repository.create_remote("upstream", url)
+        git_repository.git.config(f"url.{repository}.insteadOf", url)
+        git_repository.create_tag("1.0.0")
+
+        releases = []
+        read = _frozen._frozen_resource_uris
+
+        def frozen_resource_uris(reader, release, blobs):
+            releases.append(release.hexsha)
+            return read(reader, release, blobs)
+
+        monkeypatch.setattr(_frozen, "_frozen_resource_uris", frozen_resource_uris)
+
+        return releases
+
+    def test_cache(self, repository, git_repository, releases):
+        """
+        Check that each release is only read out of the history once.
+        """
+        uris = frozenset(uri for uri, _ in _RESOURCES.values())
+        assert frozen_uris(repository, Version("1.0.0")) == uris
+        assert releases == [git_repository.head.commit.hexsha]
+
+        cache = json.loads((Path(git_repository.git_dir) / CACHE_FILENAME).read_text())
+        assert cache["releases"] == {"1.0.0": {"commit": git_repository.head.commit.hexsha, "uris": sorted(uris)}}
+
+        assert frozen_uris(repository, Version("1.0.0")) == uris
+        assert len(releases) == 1
+
+        # Only the new release is read
+        path = repository / "latest" / "meta" / "basic.yaml"
+        path.write_text(path.read_text().replace("basic-1.0.0", "basic-1.1.0"))
+        git_repository.git.commit(a=True, m="Bump basic")
+        git_repository.create_tag("1.1.0")
+
+        assert frozen_uris(repository, Version("1.0.0")) == uris | {f"{_URI_PREFIX}meta/basic-1.1.0"}
+        assert releases[1:] == [git_repository.head.commit.hexsha]
+
+        # Releases before the base release are not read
+        assert frozen_uris(repository, Version("1.1.0")) == (uris - {f"{_URI_PREFIX}meta/basic-1.0.0"}) | {
+            f"{_URI_PREFIX}meta/basic-1.1.0"
+        }
+        assert len(releases) == 2
+
+    def test_moved_tag(self, repository, git_repository, releases):
+        """
+        Check that a release is read again if its tag is moved to another commit.
+        """
+        frozen_uris(repository, Version("1.0.0"))
+
+        path = repository / "latest" / "meta" / "basic.yaml"
+        path.write_text(path.read_text().replace("basic-1.0.0", "basic-1.1.0"))
+        git_repository.git.commit(a=True, m="Bump basic")
+        git_repository.create_tag("1.0.0", force=True)
+
+        assert f"{_URI_PREFIX}meta/basic-1.1.0" in frozen_uris(repository, Version("1.0.0"))
+        assert len(releases) == 2
+
+    def test_no_cache(self, repository, git_repository, releases):
+        """
+        Check that the releases are all read again without the cache, or if it is unreadable.
+        """
+        frozen_uris(repository, Version("1.0.0"))
+        frozen_uris(repository, Version("1.0.0"), cache=False)
+        assert len(releases) == 2
+
+        (Path(git_repository.git_dir) / CACHE_FILENAME).write_text("{")
+        frozen_uris(repository, Version("1.0.0"))
+        assert len(releases) == 3
+
+
+class TestSnapshot:
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        """
+        Record the searches of the git history for the frozen URIs and the scans of the bodies.
+        """
+        calls = {"frozen": 0, "scanned": []}
+
+        def frozen_uris(path):
+            calls["frozen"] += 1
+            return _FROZEN
+
+        scan_body = _Manager._scan_body
+
+        def scan(body):
+            calls["scanned"].append(body)
+            return scan_body(body)
+
+        monkeypatch.setattr(_manager_module, "frozen_uris", frozen_uris)
+        monkeypatch.setattr(_Manager, "_scan_body", staticmethod(scan))
+
+        return calls
+
+    def test_restore(self, repository, git_repository, calls):
+        """
+        Check that a relaunch restores the manager from the snapshot without searching
+        the history or rescanning the files.
+        """
+        manager = _Manager(repository)
+        assert calls["frozen"] == 1
+        assert len(calls["scanned"]) == len(_RESOURCES)
+        assert (Path(git_repository.git_dir) / SNAPSHOT_FILENAME).exists()
+
+        calls["scanned"].clear()
+        restored = _Manager(repository)
+        assert calls["frozen"] == 1
+        assert calls["scanned"] == []
+
+        assert restored._frozen == manager._frozen == _FROZEN
+        assert {uri: resource.body for uri, resource in restored._resources.items()} == {
+            uri: resource.body for uri, resource in manager._resources.items()
+        }
+        assert restored._referrers == manager._referrers
+
+    def test_changed_file(self, repository, git_repository, calls):
+        """
+        Check that only a changed file is scanned again.
+        """
+        _Manager(repository)
+
+        path = repository / "latest" / "meta" / "exposure.yaml"
+        path.write_text(f"%YAML 1.1\n---\nid: {_URI_PREFIX}meta/exposure-1.0.0\ntitle: Exposure\n")
+
+        calls["scanned"].clear()
+        manager = _Manager(repository)
+
+        assert calls["frozen"] == 1
+        assert calls["scanned"] == [path.read_text()]
+        assert manager[path].body == path.read_text()
+        assert [resource.uri for resource in manager._referring_resources(f"{_URI_PREFIX}meta/basic-1.0.0")] == [
+            f"{_URI_PREFIX}meta/basic-1.0.0",
+            f"{_URI_PREFIX}meta/common-1.0.0",
+        ]
+
+    def test_new_tag(self, repository, git_repository, calls):
+        """
+        Check that the frozen URIs are found again once there is a new release.
+        """
+        _Manager(repository)
+
+        git_repository.create_tag("1.0.0")
+        _Manager(repository)
+
+        assert calls["frozen"] == 2
+
+    def test_inconsistent(self, repository, git_repository, calls):
+        """
+        Check that a snapshot which does not match the repository is rebuilt.
+        """
+        _Manager(repository)
+
+        # Record the unchanged common file as holding basic, so basic is found in two files
+        path = Path(git_repository.git_dir) / SNAPSHOT_FILENAME
+        snapshot = json.loads(path.read_text())
+        snapshot["resources"]["latest/meta/common.yaml"]["uri"] = f"{_URI_PREFIX}meta/basic-1.0.0"
+        path.write_text(json.dumps(snapshot))
+
+        calls["scanned"].clear()
+        manager = _Manager(repository)
+
+        assert len(calls["scanned"]) == len(_RESOURCES)
+        assert set(manager._resources) == {uri for uri, _ in _RESOURCES.values()}
+        assert json.loads(path.read_text())["resources"]["latest/meta/common.yaml"]["uri"] == f"{_URI_PREFIX}meta/common-1.0.0"
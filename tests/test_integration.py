@@ -3,12 +3,23 @@ Test that the asdf library integration is working properly.
 """
 
 import importlib.resources as importlib_resources
+import shutil
 
 import asdf
 import pytest
 import yaml
+from asdf.resource import DirectoryResourceMapping
 
-from rad import resources
+from rad import integration, resources
+from rad._fingerprint import FINGERPRINTS_FILENAME, build_fingerprints, load_fingerprints, read_fingerprints, write_fingerprints
+from rad._index import INDEX_FILENAME, build_index, closure, latest_manifest_uris, load_index, write_index
+from rad.integration import (
+    LATEST_ONLY_ENV,
+    RadDirectoryResourceMapping,
+    RadIndexedResourceMapping,
+    get_resource_mappings,
+    register_all_resources,
+)
 
 
 def test_manifest_integration(manifest_path, manifest_uris):
@@ -49,3 +60,183 @@ def test_schema_filename(schema_path):
     schema = yaml.safe_load(schema_path.read_bytes())
     id_suffix = str(schema_path.with_suffix("")).split(str(importlib_resources.files(resources)))[-1]
     assert schema["id"].endswith(id_suffix)
+
+
+@pytest.fixture(scope="module")
+def built_resources(tmp_path_factory):
+    """
+    The resources directory as it is built into the package, with its index and fingerprints.
+        -> the resources are copied (in place of the symlinks), then indexed and fingerprinted as setup.py does
+    """
+    root = tmp_path_factory.mktemp("build") / "resources"
+    shutil.copytree(importlib_resources.files(resources), root, ignore=shutil.ignore_patterns("*.json", "__pycache__"))
+    write_fingerprints(root, write_index(root))
+
+    return root
+
+
+def test_resource_index_installed():
+    """
+    Check that the index generated when the package was built describes the resources installed with it.
+    """
+    if not (importlib_resources.files(resources) / INDEX_FILENAME).is_file():
+        pytest.skip("The resource index is only generated when the package is built")
+
+    assert load_index() == build_index()
+
+
+def test_fingerprints_installed():
+    """
+    Check that the fingerprints generated when the package was built are those of the resources installed with it.
+    """
+    if not (importlib_resources.files(resources) / FINGERPRINTS_FILENAME).is_file():
+        pytest.skip("The fingerprints are only generated when the package is built")
+
+    assert load_fingerprints() == build_fingerprints()
+
+
+def test_built_resources(built_resources):
+    """
+    Check that the index and fingerprints generated when the package is built describe its resources.
+    """
+    index = load_index(built_resources)
+    assert index == build_index(built_resources)
+    assert load_fingerprints(built_resources) == build_fingerprints(built_resources, index)
+    assert set(load_fingerprints(built_resources)["fingerprints"]) == set(index["resources"])
+
+
+def test_fingerprints_fallback(tmp_path):
+    """
+    Check that fingerprints computed differently from the current ones are not used.
+    """
+    shutil.copytree(importlib_resources.files(resources) / "schemas" / "meta", tmp_path / "schemas" / "meta")
+    shutil.copytree(importlib_resources.files(resources) / "manifests", tmp_path / "manifests")
+
+    assert load_fingerprints(tmp_path) is None
+
+    manifest = write_fingerprints(tmp_path)
+    assert load_fingerprints(tmp_path) == manifest
+    assert set(manifest["fingerprints"]) == set(build_index(tmp_path)["resources"])
+
+    content = (tmp_path / FINGERPRINTS_FILENAME).read_text()
+    assert read_fingerprints(content.replace('"propertyOrder"', '"other"').encode()) is None
+    assert read_fingerprints(content.replace('"format": 1', '"format": 0').encode()) is None
+    assert read_fingerprints(b"not json") is None
+
+
+def test_resource_index_mappings(built_resources, monkeypatch):
+    """
+    Check that the index-backed resource mappings match walking the resources directory.
+    """
+    monkeypatch.setattr(integration, "_resources_root", lambda: built_resources)
+    walked = [
+        RadDirectoryResourceMapping(built_resources / "schemas", "asdf://stsci.edu/datamodels/roman/schemas/", recursive=True),
+        DirectoryResourceMapping(built_resources / "manifests", "asdf://stsci.edu/datamodels/roman/manifests/"),
+    ]
+
+    for indexed, mapping in zip(get_resource_mappings(), walked, strict=True):
+        assert isinstance(indexed, RadIndexedResourceMapping)
+        assert len(indexed) == len(mapping)
+        assert set(indexed) == set(mapping)
+
+        for uri in mapping:
+            assert indexed[uri] == mapping[uri]
+
+
+def test_resource_index_fallback(tmp_path):
+    """
+    Check that a missing or stale index is not used.
+    """
+    shutil.copytree(importlib_resources.files(resources) / "manifests", tmp_path / "manifests")
+    shutil.copytree(importlib_resources.files(resources) / "schemas" / "meta", tmp_path / "schemas" / "meta")
+
+    # Missing
+    assert load_index(tmp_path) is None
+
+    index = write_index(tmp_path)
+    assert load_index(tmp_path) == index
+
+    # Content changes which keep the size of the file do not make the index stale
+    path = tmp_path / "schemas" / "meta" / "basic-1.0.0.yaml"
+    content = path.read_text()
+    path.write_text(content.replace("title:", "TITLE:", 1))
+    assert load_index(tmp_path) == index
+
+    # Content changes which change the size of the file do
+    path.write_text(content + "\n")
+    assert load_index(tmp_path) is None
+
+    write_index(tmp_path)
+    assert load_index(tmp_path) is not None
+
+    # New file
+    shutil.copy(path, tmp_path / "schemas" / "meta" / "basic-100.0.0.yaml")
+    assert load_index(tmp_path) is None
+
+    write_index(tmp_path)
+    assert load_index(tmp_path) is not None
+
+    # New directory
+    (tmp_path / "schemas" / "new").mkdir()
+    assert load_index(tmp_path) is None
+
+    # Removed file
+    write_index(tmp_path)
+    path.unlink()
+    assert load_index(tmp_path) is None
+
+
+def test_latest_only_mappings(built_resources, monkeypatch):
+    """
+    Check that the latest-only mode registers only the closure of the latest manifests.
+    """
+    monkeypatch.setenv(LATEST_ONLY_ENV, "1")
+    monkeypatch.setattr(integration, "_resources_root", lambda: built_resources)
+
+    index = load_index(built_resources)
+    mappings = get_resource_mappings()
+    uris = set().union(*mappings)
+
+    assert set(latest_manifest_uris(index)) <= uris
+    assert uris == closure(index, latest_manifest_uris(index))
+
+    # Everything referenced by a registered resource is registered
+    for uri in uris:
+        assert set(index["resources"][uri]["references"]) <= uris
+
+    # Older manifests are not registered
+    assert "asdf://stsci.edu/datamodels/roman/manifests/datamodels-1.0" not in uris
+
+    # but the mappings still load them when asked for them
+    schemas, manifests = mappings
+    uri = "asdf://stsci.edu/datamodels/roman/manifests/datamodels-1.0"
+    assert uri not in manifests
+    assert manifests[uri] == (built_resources / index["resources"][uri]["path"]).read_bytes()
+    assert manifests.entry(uri) == index["resources"][uri]
+    for uri, entry in index["resources"].items():
+        if entry["path"].startswith("schemas/") and not entry["path"].startswith("schemas/SSC/"):
+            assert schemas[uri] == (built_resources / entry["path"]).read_bytes()
+
+    # Only the resources of the mapping's own directory, outside of the excluded ones
+    for uri in (
+        "asdf://stsci.edu/datamodels/roman/schemas/meta/basic-1.0.0",
+        "asdf://stsci.edu/datamodels/roman/manifests/unknown-1.0.0",
+    ):
+        with pytest.raises(KeyError):
+            manifests[uri]
+    with pytest.raises(KeyError):
+        schemas[next(uri for uri, entry in index["resources"].items() if entry["path"].startswith("schemas/SSC/"))]
+
+    # Registering the remaining resources makes everything available
+    with asdf.config_context() as config:
+        config.remove_resource_mapping(package="rad")
+        for mapping in mappings:
+            config.add_resource_mapping(mapping)
+
+        assert "asdf://stsci.edu/datamodels/roman/manifests/datamodels-1.0" not in config.resource_manager
+        assert register_all_resources(config) > 0
+        for uri, entry in index["resources"].items():
+            if not entry["path"].startswith("schemas/SSC/"):
+                assert uri in config.resource_manager
+
+        assert register_all_resources(config) == 0
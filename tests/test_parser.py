@@ -0,0 +1,614 @@
+"""
+Test the internals of the schema parser used to build the archive catalog.
+"""
+
+import copy
+import csv
+from contextlib import contextmanager
+
+import asdf
+import asdf.schema
+import numpy as np
+import pytest
+
+from rad._parser import (
+    SuperSchemaBuilder,
+    SuperSchemaCache,
+    archive_entries,
+    archive_schema,
+    asdf_ssc_config,
+    column_changes,
+    diff,
+    dump,
+    super_schema,
+    write_archive_table,
+)
+from rad._parser._cache import dependencies
+from rad._parser._process import _get_latest_uris
+from rad._parser._super_schema import _build_super_schema, _deep_merge, _load_schema, _merge_node
+from rad._parser._table import archive_rows
+
+_COMMON_URI = "asdf://stsci.edu/datamodels/roman/schemas/meta/common-1.4.0"
+_BASIC_URI = "asdf://stsci.edu/datamodels/roman/schemas/meta/basic-1.1.0"
+_EXPOSURE_URI = "asdf://stsci.edu/datamodels/roman/schemas/meta/exposure-1.2.0"
+
+
+@contextmanager
+def _modified(uri, old, new):
+    """
+    Serve a modified version of a schema in place of the shipped one.
+    """
+    resource_manager = asdf.get_config().resource_manager
+    resources = {dependency: resource_manager[dependency] for dependency in dependencies(uri)}
+    resources[uri] = resources[uri].replace(old, new)
+
+    # ASDF caches the schemas it loads by URI alone
+    asdf.schema._load_schema_cached.cache_clear()
+    with asdf.config_context() as config:
+        config.add_resource_mapping(resources)
+        yield
+    asdf.schema._load_schema_cached.cache_clear()
+
+
+def _modified_basic():
+    """
+    Serve a modified version of the basic meta schema in place of the shipped one.
+    """
+    return _modified(_BASIC_URI, b"title: Basic Information", b"title: Modified Information")
+
+
+def test_load_schema(schema_uris):
+    """
+    Check that schemas are loaded as ASDF loads them, from the content currently served.
+    """
+    for uri in schema_uris:
+        assert _load_schema(uri) == asdf.schema.load_schema(uri)
+
+    # ASDF has already cached the shipped schema
+    content = asdf.get_config().resource_manager[_BASIC_URI].replace(b"title: Basic Information", b"title: Modified Information")
+    with asdf.config_context() as config:
+        config.add_resource_mapping({_BASIC_URI: content})
+        assert _load_schema(_BASIC_URI)["title"] == "Modified Information"
+
+
+class TestSuperSchemaCache:
+    def test_dependencies(self):
+        """
+        Check that the dependencies include the meta schemas referenced indirectly.
+        """
+        hashes = dependencies(_COMMON_URI)
+
+        assert _COMMON_URI in hashes
+        assert _BASIC_URI in hashes
+        assert "asdf://stsci.edu/datamodels/roman/schemas/meta/telescope-1.1.0" in hashes
+
+    def test_memoized(self):
+        """
+        Check that the super schema is only built once and copies are returned.
+        """
+        cache = SuperSchemaCache()
+
+        schema = super_schema(_COMMON_URI, cache)
+        assert cache.info()[:3] == (0, 0, 1)
+        assert schema == _build_super_schema(_COMMON_URI)
+
+        schema["title"] = "changed"
+        assert super_schema(_COMMON_URI, cache) == _build_super_schema(_COMMON_URI)
+        assert cache.info()[:3] == (1, 0, 1)
+
+        cache.clear()
+        assert cache.info() == (0, 0, 0, 0, cache.maxsize, 0)
+
+    def test_evictions(self):
+        """
+        Check that the least recently used super schema is evicted.
+        """
+        cache = SuperSchemaCache(maxsize=1)
+
+        super_schema(_COMMON_URI, cache)
+        super_schema(_BASIC_URI, cache)
+        assert cache.info().evictions == 1
+        assert cache.info().currsize == 1
+
+        super_schema(_COMMON_URI, cache)
+        assert cache.info().misses == 3
+
+    def test_directory(self, tmp_path):
+        """
+        Check that super schemas are persisted and reused by another cache.
+        """
+        super_schema(_COMMON_URI, SuperSchemaCache(directory=tmp_path))
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+        cache = SuperSchemaCache(directory=tmp_path)
+        assert super_schema(_COMMON_URI, cache) == _build_super_schema(_COMMON_URI)
+        assert cache.info()[:3] == (0, 1, 0)
+
+    def test_damaged_entry(self, tmp_path):
+        """
+        Check that a persisted entry which cannot be read is rebuilt.
+        """
+        cache = SuperSchemaCache(directory=tmp_path)
+        (tmp_path / f"{cache.key(_COMMON_URI)}.json").write_bytes(b"\x80not json")
+
+        assert super_schema(_COMMON_URI, cache) == _build_super_schema(_COMMON_URI)
+        assert cache.info()[:3] == (0, 0, 1)
+        assert super_schema(_COMMON_URI, SuperSchemaCache(directory=tmp_path)) == _build_super_schema(_COMMON_URI)
+
+    def test_invalidation(self, tmp_path):
+        """
+        Check that changing a referenced meta schema invalidates the cached super schema.
+        """
+        cache = SuperSchemaCache(directory=tmp_path)
+        original = super_schema(_COMMON_URI, cache)
+        key = cache.key(_COMMON_URI)
+
+        with _modified_basic():
+            assert cache.key(_COMMON_URI) != key
+
+            modified = super_schema(_COMMON_URI, cache)
+            assert modified != original
+            assert modified == _build_super_schema(_COMMON_URI)
+            assert cache.info().misses == 2
+
+        assert cache.key(_COMMON_URI) == key
+        assert super_schema(_COMMON_URI, cache) == original
+        assert cache.info().hits == 1
+
+
+class TestSuperSchemaBuilder:
+    def test_build_all(self):
+        """
+        Check that building all the latest super schemas at once does not change them.
+        """
+        with asdf_ssc_config():
+            uris = list(_get_latest_uris())
+
+            builder = SuperSchemaBuilder()
+            schemas = builder.build_all(uris)
+
+            assert schemas.keys() == set(uris)
+            for uri in uris:
+                assert schemas[uri] == _build_super_schema(uri)
+
+        assert (_BASIC_URI, "") in builder.timings
+        assert all(timing >= 0 for timing in builder.timings.values())
+
+    def test_reuse(self):
+        """
+        Check that the referenced schemas are only processed once and copies are returned.
+        """
+        builder = SuperSchemaBuilder()
+
+        basic = builder.build(_BASIC_URI)
+        timings = dict(builder.timings)
+
+        common = builder.build(_COMMON_URI)
+        assert timings.keys() < builder.timings.keys()
+        assert all(builder.timings[key] == timing for key, timing in timings.items())
+        assert common == _build_super_schema(_COMMON_URI)
+
+        basic["title"] = "changed"
+        assert builder.build(_BASIC_URI) == _build_super_schema(_BASIC_URI)
+        assert super_schema(_COMMON_URI, SuperSchemaCache(), builder) == common
+
+
+class TestMerge:
+    def test_deep_merge(self):
+        """
+        Check the merge semantics and that the inputs are not modified.
+        """
+        target = {
+            "title": "Target",
+            "properties": {"a": {"type": "string"}, "b": {"type": "number"}},
+            "required": ["a"],
+            "datamodel_name": "Target",
+        }
+        source = {
+            "title": "Source",
+            "properties": {"a": {"description": "A"}, "c": {"type": "object"}},
+            "required": ["c"],
+            "datamodel_name": "Source",
+        }
+        inputs = copy.deepcopy((target, source))
+
+        merged = _deep_merge(target, source)
+        assert (target, source) == inputs
+        assert merged == {
+            "title": "Target\n- Source",
+            "properties": {"a": {"type": "string", "description": "A"}, "b": {"type": "number"}, "c": {"type": "object"}},
+            "required": merged["required"],
+            "datamodel_name": "Target",
+        }
+        assert sorted(merged["required"]) == ["a", "c"]
+
+        # Untouched subtrees are shared rather than copied
+        assert merged["properties"]["b"] is target["properties"]["b"]
+        assert merged["properties"]["c"] is source["properties"]["c"]
+
+    @pytest.mark.parametrize(
+        ("source", "message"),
+        [({"properties": "a"}, "Cannot merge non-mapping"), ({"type": "number"}, "type has conflicting values")],
+    )
+    def test_deep_merge_conflict(self, source, message):
+        """
+        Check that conflicting values cannot be merged.
+        """
+        with pytest.raises(ValueError, match=message):
+            _deep_merge({"type": "string", "properties": {}}, source)
+
+    def test_merge_node(self):
+        """
+        Check that the allOf items are merged into the node without modifying them.
+        """
+        items = [{"properties": {"a": {"type": "string"}}}, {"id": "item", "properties": {"b": {"type": "number"}}}]
+        node = {"id": "node", "type": "object", "allOf": items}
+        inputs = copy.deepcopy(items)
+
+        assert _merge_node(node) == {"type": "object", "properties": {"a": {"type": "string"}, "b": {"type": "number"}}}
+        assert items == inputs
+
+
+def test_archive_schema():
+    """
+    Check that the archive schema only keeps the archive information, and that it
+    does not share any of it with the schema it was made from.
+    """
+    catalog = {"datatype": "nvarchar(120)", "destination": ["A.filename"]}
+    schema = {
+        "title": "Example",
+        "archive_meta": "Example",
+        "properties": {
+            "meta": {
+                "type": "object",
+                "properties": {
+                    "filename": {"type": "string", "archive_catalog": catalog},
+                    "other": {"type": "string"},
+                    "empty": {"properties": {"nested": {"type": "number"}}},
+                },
+            },
+            "data": {"tag": "tag:stsci.edu:asdf/core/ndarray-1.*"},
+        },
+    }
+    original = copy.deepcopy(schema)
+
+    archive = archive_schema(schema)
+
+    assert archive == {
+        "archive_meta": "Example",
+        "properties": {"meta": {"properties": {"filename": {"archive_catalog": catalog}}}},
+    }
+    assert schema == original
+
+    archive["properties"]["meta"]["properties"]["filename"]["archive_catalog"]["destination"].append("B.filename")
+    assert catalog == {"datatype": "nvarchar(120)", "destination": ["A.filename"]}
+
+    assert archive_entries(schema) == ["Example|filename|top|A|filename|1||meta.top.filename|"]
+
+
+def test_dump_workers(tmp_path):
+    """
+    Check that dumping with worker processes produces exactly the same files.
+    """
+    serial = dump(tmp_path / "serial")
+    parallel = dump(tmp_path / "parallel", workers=2)
+
+    assert parallel == serial
+
+    files = sorted(path.relative_to(tmp_path / "serial") for path in (tmp_path / "serial").rglob("*") if path.is_file())
+    assert files
+    for path in files:
+        assert (tmp_path / "parallel" / path).read_bytes() == (tmp_path / "serial" / path).read_bytes()
+
+
+def test_dump_incremental(tmp_path):
+    """
+    Check that a dump only rebuilds the outputs affected by a change, and that
+    the result is the same as rebuilding everything.
+    """
+    output = dump(tmp_path / "incremental")
+    assert set(output["rebuilt"].values()) == {"no valid manifest"}
+    full_super_schemas = dict(output["super_schemas"])
+
+    output = dump(tmp_path / "incremental")
+    assert output["rebuilt"] == {}
+    assert output["rebuilt_super_schemas"] == {}
+    assert output["super_schemas"] == full_super_schemas
+
+    with _modified_basic():
+        output = dump(tmp_path / "incremental")
+        full = dump(tmp_path / "full", force=True)
+
+    assert output["rebuilt"]
+    assert len(output["rebuilt"]) < len(full["rebuilt"])
+    assert all(reason.startswith("changed: ") and _BASIC_URI in reason for reason in output["rebuilt"].values())
+    assert output["archive_schemas"] == full["archive_schemas"]
+    assert output["archive_data"] == full["archive_data"]
+
+    files = sorted(path.relative_to(tmp_path / "full") for path in (tmp_path / "full").rglob("*") if path.is_file())
+    for path in files:
+        if path.name != "dump_manifest.json":
+            assert (tmp_path / "incremental" / path).read_bytes() == (tmp_path / "full" / path).read_bytes()
+
+
+def test_dump_unwritten_super_schemas(tmp_path):
+    """
+    Check that the super schemas skipped by an earlier dump are written by a later one.
+    """
+    full = dump(tmp_path / "full")
+    dump(tmp_path / "incremental", super_schema=False)
+
+    # The super schemas which were neither rebuilt nor written are still all returned
+    unwritten = dump(tmp_path / "incremental", super_schema=False)
+    assert unwritten["rebuilt"] == {}
+    assert unwritten["super_schemas"] == full["super_schemas"]
+
+    output = dump(tmp_path / "incremental")
+
+    assert set(output["rebuilt"].values()) == {"super schema missing or modified"}
+    files = sorted(path.relative_to(tmp_path / "full") for path in (tmp_path / "full" / "super_schemas").rglob("*.yaml"))
+    assert len(files) == len(full["super_schemas"])
+    for path in files:
+        assert (tmp_path / "incremental" / path).read_bytes() == (tmp_path / "full" / path).read_bytes()
+
+
+def test_dump_skipped_outputs(tmp_path):
+    """
+    Check that an archive file skipped by a dump which changed the archive information
+    is rewritten by the next dump asking for it, as is a modified file.
+    """
+    dump(tmp_path / "incremental", archive_table="csv")
+    with _modified(_EXPOSURE_URI, b"datatype: nvarchar(25)", b"datatype: nvarchar(99)"):
+        dump(tmp_path / "incremental", archive_yaml=False)
+        output = dump(tmp_path / "incremental", archive_table="csv")
+        dump(tmp_path / "full", archive_table="csv")
+
+    assert output["rebuilt"] == {}
+    (tmp_path / "incremental" / "archive_data.txt").write_text("modified")
+    with _modified(_EXPOSURE_URI, b"datatype: nvarchar(25)", b"datatype: nvarchar(99)"):
+        dump(tmp_path / "incremental", archive_table="csv")
+
+    for filename in ("archive_schemas.json", "archive_schemas.yaml", "archive_data.txt", "archive_data.csv"):
+        assert (tmp_path / "incremental" / filename).read_bytes() == (tmp_path / "full" / filename).read_bytes()
+    assert b"nvarchar(99)" in (tmp_path / "incremental" / "archive_schemas.yaml").read_bytes()
+
+
+class TestDiff:
+    _URI = "asdf://stsci.edu/datamodels/roman/schemas/example-1.0.0"
+
+    @classmethod
+    def _schemas(cls, **entry):
+        return {cls._URI: {"meta.filename": {"title": "File name", "destination": ["A.filename", "B.filename"], **entry}}}
+
+    def test_identical(self):
+        """
+        Check that neither the order of the keys nor of the list items is a difference.
+        """
+        schemas = self._schemas(required=["a", "b"])
+        reordered = {
+            self._URI: {
+                "meta.filename": {"required": ["b", "a"], "destination": ["B.filename", "A.filename"], "title": "File name"}
+            }
+        }
+
+        assert not diff(reordered, schemas)
+        assert diff(reordered, schemas).by_uri() == {}
+
+    def test_changes(self):
+        """
+        Check that the changes are reported in the same categories as DeepDiff reports them.
+        """
+        main = self._schemas(datatype="nvarchar(120)", unit="s")
+        current = self._schemas(datatype="nvarchar(240)", unit=1, unique=True)
+        current[self._URI]["meta.filename"]["destination"] = ["B.filename", "C.filename"]
+        path = f"root[{self._URI!r}]['meta.filename']"
+
+        result = diff(current, main)
+
+        assert result == {
+            "dictionary_item_added": [f"{path}['unique']"],
+            "values_changed": {f"{path}['datatype']": {"new_value": "nvarchar(240)", "old_value": "nvarchar(120)"}},
+            "type_changes": {
+                f"{path}['unit']": {"old_type": str, "new_type": int, "old_value": "s", "new_value": 1},
+            },
+            "iterable_item_removed": {f"{path}['destination'][0]": "A.filename"},
+            "iterable_item_added": {f"{path}['destination'][1]": "C.filename"},
+        }
+        assert result.by_uri() == {
+            self._URI: {
+                "added": [f"{path}['unique']", f"{path}['destination'][1]"],
+                "removed": [f"{path}['destination'][0]"],
+                "changed": [f"{path}['datatype']", f"{path}['unit']"],
+            }
+        }
+
+    def test_changed_items(self):
+        """
+        Check that, as for DeepDiff, the changed items of a list are paired up with the
+        items they have the most in common with.
+        """
+        main = self._schemas(items=[{"k": 1}, {"k": 2}, {"a": 1}])
+        current = self._schemas(items=[{"k": 6}, {"k": 5, "j": 2}, {"b": 1}])
+        path = f"root[{self._URI!r}]['meta.filename']['items']"
+
+        assert diff(current, main) == {
+            "values_changed": {
+                f"{path}[0]['k']": {"new_value": 6, "old_value": 1},
+                f"{path}[1]['k']": {"new_value": 5, "old_value": 2},
+            },
+            "dictionary_item_added": [f"{path}[1]['j']"],
+            "iterable_item_removed": {f"{path}[2]": {"a": 1}},
+            "iterable_item_added": {f"{path}[2]": {"b": 1}},
+        }
+
+    def test_schemas_added_removed(self):
+        """
+        Check that a schema added or removed as a whole is a single difference.
+        """
+        other = "asdf://stsci.edu/datamodels/roman/schemas/other-1.0.0"
+        main = self._schemas()
+        current = {other: main[self._URI]}
+
+        result = diff(current, main)
+
+        assert result == {
+            "dictionary_item_removed": [f"root[{self._URI!r}]"],
+            "dictionary_item_added": [f"root[{other!r}]"],
+        }
+        assert result.by_uri() == {
+            self._URI: {"added": [], "removed": [f"root[{self._URI!r}]"], "changed": []},
+            other: {"added": [f"root[{other!r}]"], "removed": [], "changed": []},
+        }
+
+    @staticmethod
+    def _archive(archive_meta, **columns):
+        return {
+            "archive_meta": archive_meta,
+            "properties": {
+                "meta": {
+                    "properties": {
+                        name: {"archive_catalog": {"datatype": datatype, "destination": destination}}
+                        for name, (datatype, destination) in columns.items()
+                    }
+                }
+            },
+        }
+
+    def test_column_changes(self):
+        """
+        Check that the changed archive columns cover exactly the changed lines of the archive data.
+        """
+        other = "asdf://stsci.edu/datamodels/roman/schemas/other-1.0.0"
+        main = {
+            self._URI: self._archive(
+                "Example",
+                filename=("nvarchar(120)", ["A.filename", "B.filename"]),
+                exposure=("int", ["A.exposure"]),
+                origin=("nvarchar(20)", ["A.origin"]),
+                removed=("float", ["A.removed"]),
+            ),
+            other: self._archive("Other", origin=("nvarchar(20)", ["C.origin"])),
+        }
+        current = {
+            self._URI: self._archive(
+                "Example",
+                filename=("nvarchar(120)", ["B.filename", "A.filename"]),
+                exposure=("int", ["A.exposure", "B.exposure"]),
+                origin=("nvarchar(40)", ["A.origin"]),
+                added=("float", ["A.added"]),
+            ),
+            other: self._archive("Renamed", origin=("nvarchar(20)", ["C.origin"])),
+        }
+
+        changes = list(column_changes(current, main))
+
+        assert [(change["uri"], change["path"]) for change in changes] == [
+            (self._URI, "meta.top.exposure"),
+            (self._URI, "meta.top.origin"),
+            (self._URI, "meta.top.removed"),
+            (self._URI, "meta.top.added"),
+            (other, "meta.top.origin"),
+        ]
+        assert changes[1] == {
+            "uri": self._URI,
+            "path": "meta.top.origin",
+            "old_archive_meta": "Example",
+            "new_archive_meta": "Example",
+            "old_datatype": "nvarchar(20)",
+            "new_datatype": "nvarchar(40)",
+            "old_destination": ["A.origin"],
+            "new_destination": ["A.origin"],
+        }
+        assert changes[2]["new_datatype"] is None
+        assert changes[2]["new_destination"] is None
+        assert changes[3]["old_archive_meta"] is None
+
+        def lines(schemas):
+            return {line for schema in schemas.values() for line in archive_entries(schema)}
+
+        # The archive_meta and data path of a line are its first and last fields
+        changed = {(line.split("|")[0], line.split("|")[-2]) for line in lines(main) ^ lines(current)}
+        records = {
+            (change[f"{side}_archive_meta"], change["path"])
+            for change in changes
+            for side in ("old", "new")
+            if change[f"{side}_destination"] is not None
+        }
+        assert changed
+        assert changed <= records
+        assert list(column_changes(main, main)) == []
+
+
+class TestArchiveTable:
+    _ROWS = (
+        ("Example", "meta.top.filename", "A", "filename", "nvarchar(120)", 1),
+        ("Example", "meta.top.filename", "B", "filename", "nvarchar(120)", 1),
+        ("Example", "meta.top.exposure", "A", "exposure", "int", 0),
+        ("Other", "meta.top.origin", "C", "origin", "nvarchar(20)", 1),
+    )
+
+    @staticmethod
+    def _schemas():
+        return {
+            "asdf://stsci.edu/datamodels/roman/schemas/example-1.0.0": TestDiff._archive(
+                "Example",
+                filename=("nvarchar(120)", ["A.filename", "B.filename"]),
+                exposure=("int", ["A.exposure"]),
+            ),
+            "asdf://stsci.edu/datamodels/roman/schemas/other-1.0.0": TestDiff._archive(
+                "Other",
+                origin=("nvarchar(20)", ["C.origin"]),
+            ),
+        }
+
+    def test_npy(self, tmp_path):
+        """
+        Check that the table can be memory-mapped and filtered by destination table.
+        """
+        write_archive_table(tmp_path / "archive_data.npy", self._schemas(), "npy")
+
+        table = np.load(tmp_path / "archive_data.npy", mmap_mode="r")
+
+        assert table.tolist() == list(self._ROWS)
+        assert table[table["table"] == "A"]["column"].tolist() == ["filename", "exposure"]
+
+    def test_archive_data(self):
+        """
+        Check that the rows follow the archive data, and use the same form of the data paths.
+        """
+        schemas = self._schemas()
+        schemas["asdf://stsci.edu/datamodels/roman/schemas/example-1.0.0"]["properties"]["exposure"] = {
+            "properties": {"start_time": {"archive_catalog": {"datatype": "datetime2", "destination": ["A.start_time"]}}}
+        }
+
+        rows = list(archive_rows(schemas))
+        lines = [line for schema in schemas.values() for line in archive_entries(schema)]
+
+        assert [(row[0], row[1], row[2], row[3]) for row in rows] == [
+            (line.split("|")[0], line.split("|")[-2], *line.split("|")[3:5]) for line in lines
+        ]
+        assert rows[-2][1] == "meta.exposure.start_time"
+
+    def test_csv(self, tmp_path):
+        write_archive_table(tmp_path / "archive_data.csv", self._schemas(), "csv")
+
+        with (tmp_path / "archive_data.csv").open(newline="") as f:
+            rows = list(csv.reader(f))
+
+        assert rows[0] == ["archive_meta", "path", "table", "column", "datatype", "string"]
+        assert rows[1:] == [[str(value) for value in row] for row in self._ROWS]
+
+    @pytest.mark.parametrize("table_format", ["parquet", "arrow"])
+    def test_arrow(self, tmp_path, table_format):
+        pytest.importorskip("pyarrow")
+        from pyarrow import feather, parquet
+
+        path = tmp_path / f"archive_data.{table_format}"
+        write_archive_table(path, self._schemas(), table_format)
+
+        table = parquet.read_table(path) if table_format == "parquet" else feather.read_table(path, memory_map=True)
+        assert [tuple(row.values()) for row in table.to_pylist()] == list(self._ROWS)
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError, match=r"Unknown archive table format"):
+            dump(tmp_path, archive_table="xlsx")
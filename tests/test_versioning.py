@@ -20,9 +20,10 @@ which marks the start of schema versioning.
 The comparison of two different versions of a schema is done using the data read
 out of the schema file by the yaml library. This is done so that basic formatting,
 comments, and other non-ordered things do not give a false positive for a change.
-The yaml dictionary is then filtered to remove the keys that we clain don't matter
-for the purposes of schema versioning. This dictionary is then what we use to check
-for equality among the different versions of the schemas.
+The yaml dictionary is then fingerprinted (see `rad._fingerprint`), leaving out the
+keys that we clain don't matter for the purposes of schema versioning. This structural
+hash is then what we use to check for equality among the different versions of the
+schemas, and the hashes of its subtrees to report where a schema has changed.
 
 Note that the filtering and comparison of the schemas may not capture things perfectly,
 and so the exact mechanism for comparing schema version may change in the future.
@@ -31,22 +32,30 @@ indicate that a version bump is needed. If necessary, there is a builtin mechani
 for x-failing given comparisons, so we can ignore potential false positives.
 """
 
+import hashlib
+import sys
 from collections.abc import Mapping
 from contextlib import suppress
-from io import BytesIO
 from pathlib import Path
 from re import findall
 from tomllib import load
 
 import pytest
 import yaml
-from asdf.treeutil import walk_and_modify
 from git import Repo
 from semantic_version import Version
 
+from rad._fingerprint import IGNORED_KEYWORDS, Fingerprint, fingerprint
+
 # Using a python library load the actual RAD repository data into python
 # object which can be interacted with.
 REPO_PATH = Path(__file__).parent.parent
+
+# The git reader is part of the repository's scripts, not of the package
+sys.path.append(str(REPO_PATH / "scripts"))
+
+from git_reader import GitReader, resource_id
+
 RAD_URLS = (
     "https://github.com/spacetelescope/rad",
     "https://github.com/spacetelescope/rad.git",
@@ -55,6 +64,7 @@ RAD_URLS = (
 
 # The oldest version of RAD that is under schema versioning
 REPO = Repo(REPO_PATH)
+
 with (REPO_PATH / "pyproject.toml").open("rb") as f:
     BASE_RELEASE = Version(load(f)["tool"]["rad-versioning"]["base_release"])
 
@@ -67,15 +77,8 @@ EXPECTED_XFAILS = (
     ("0.27.0", "asdf://stsci.edu/datamodels/roman/schemas/fps-1.0.0"),
 )
 
-# The keywords in the schemas that we claim don't matter for schema versioning
-IGNORED_KEYWORDS = (
-    "archive_meta",
-    "archive_catalog",
-    "sdf",
-    "title",
-    "description",
-    "propertyOrder",
-)
+# The (much faster) libyaml version of the safe loader, when it is available
+_SAFE_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 def _update_tags():
@@ -109,12 +112,6 @@ def _get_versions():
     is followed, and that these tags exactly correspond to the released version of
     the RAD on PyPi.
 
-    Returns
-    -------
-    tuple[str]
-        A tuple of all the release versions for RAD that are under schema versioning
-        in order of the version number.
-
     Returns
     -------
     tuple[str]
@@ -173,51 +170,16 @@ def rad_version(request):
     return request.param
 
 
-def filter_ignored_keys(tree):
-    """
-    Filter out the ignored keys from the dictionary.
-
-    Parameters
-    ----------
-    tree :
-        The tree to filter
-
-    Returns
-    -------
-    The filtered tree
-    """
-
-    def filter_ignored_keys(node):
-        """
-        Filter out the ignored keys from the dictionary.
-
-        Parameters
-        ----------
-        node : Any
-            node to filter
-
-        Returns
-        -------
-        dict
-            The filtered dictionary
-        """
-        if isinstance(node, Mapping):
-            return {key: value for key, value in node.items() if key not in IGNORED_KEYWORDS}
-        return node
-
-    return walk_and_modify(tree, callback=filter_ignored_keys)
-
-
-# Get the current resources read through the conftest file and flatten them
+# Get the current resources read through the conftest file and fingerprint them
 @pytest.fixture(scope="module")
-def filtered_current_resources(current_resources):
+def current_fingerprints(current_resources):
     """
-    Fixture to get the current resources for the tests.
+    Fixture to get the fingerprints of the current resources for the tests.
     """
-    return {uri: filter_ignored_keys(schema) for uri, schema in current_resources.items()}
+    return {uri: fingerprint(schema) for uri, schema in current_resources.items()}
 
 
-def _get_frozen_schemas(version):
+def _get_frozen_schemas(version, reader, parsed):
     """
     Returns the frozen schemas for a given version.
 
@@ -230,63 +192,37 @@ def _get_frozen_schemas(version):
     ----------
     version : str
         The version of RAD to get the frozen schemas for.
+    reader : GitReader
+        The reader streaming the files out of the RAD repository's git history.
+    parsed : dict
+        Blob sha -> (URI, fingerprint of the schema), or
+        None for files which are not schemas, for the blobs which have already been
+        read. Most files are unchanged between releases, so this is shared between
+        the versions so that each blob is only read and parsed once.
 
     Returns
     -------
     dict
-        URI -> flattened (filtered) schema dictionary representation.
+        URI -> fingerprint of the schema.
     """
-    # Get the commit for the version in question
-    release = REPO.commit(version)
-
-    def predicate(i, d):
-        """
-        Determines if a file should be included in the traversal output or not.
-
-        Note
-        ----
-        GitPython can be used to traverse the files in a repository at any given
-        commit. The "predicate" function is a function that is used to determine
-        if the file should be included in the traversal or not. Note that this
-        does not stop the traversal at a given level, but rather just filters
-        the files that are returned by the traversal.
-
-        Parameters
-        ----------
-        i : git.Blob
-            The blob object for the file
-        d : git.Tree
-            The tree object for the directory
-
-        Returns
-        -------
-        bool
-            True if the file should be included in the traversal output, False otherwise
-        """
-        # Use regex to pull out the files that are yaml files
-        pattern = r".*\.yaml"
-        if findall(pattern, i.path):
-            return True
-        return False
-
-    # Iterate over the traversal of the git repository at the given commit
-    # searching for the yaml files
-    schemas = {}
-    for blob in release.tree.traverse(predicate=predicate):
-        # Read the file blob directly from the git history corresponding to the
-        # to the release version's commit
-        data = BytesIO(blob.data_stream.read()).read().decode("utf-8")
-
+    # Find the yaml files in the release version's commit. Git stores symlinks as
+    # blobs holding the relative path of the file linked to, and we have a bunch of
+    # symlinks in the RAD repository that point to .yaml files, so these are skipped
+    # using the file mode git records for them.
+    files = reader.files(version, suffix=".yaml")
+
+    # Read the file blobs directly from the git history corresponding to the
+    # release version's commit, all through one git process
+    for sha, data in reader.blobs(dict.fromkeys(entry.sha for entry in files if entry.sha not in parsed)):
         # Check that the file has the %YAML 1.1 header, which is required for
-        # (and tested for) the RAD schemas.
-        # This is a bit of a hack, to side step the fact that we have a bunch
-        # of symlinks in the RAD repository that point to .yaml files. Git stores
-        # the symlink data as text that is a relateive path to the file linked to
-        # meaning that GitPython will simply return a string containing that relative
-        # path. These do not have the %YAML 1.1 header, so we can use that to filter
-        if data.startswith("%YAML 1.1"):
-            schema = yaml.safe_load(data)
-            schemas[schema["id"]] = filter_ignored_keys(schema)
+        # (and tested for) the RAD schemas, to filter out any other yaml files.
+        if data.startswith(b"%YAML 1.1"):
+            schema = yaml.load(data, Loader=_SAFE_LOADER)  # noqa: S506
+            parsed[sha] = (schema["id"], fingerprint(schema))
+        else:
+            parsed[sha] = None
+
+    schemas = dict(parsed[entry.sha] for entry in files if parsed[entry.sha] is not None)
 
     # Sort the schemas by their URI
     # This is done so that the tests are always in the same order
@@ -300,23 +236,24 @@ def _get_frozen_schemas_for_all_versions():
     Returns
     -------
     dict
-        Version -> URI -> flattened (filtered) schema dictionary representation
-        dictionary representation of the frozen schemas.
+        Version -> URI -> fingerprint of the frozen schemas.
     tuple
         A tuple of unique URIs from all frozen schemas.
     """
     schemas = {}
     uris = []
-    for version in _VERSIONS:
-        version_schemas = _get_frozen_schemas(version)
-        schemas[version] = version_schemas
-        for uri in version_schemas:
-            if "SSC" in uri:
-                # SSC schemas are not under versioning
-                continue
-
-            if uri not in uris:
-                uris.append(uri)
+    parsed = {}
+    with GitReader(REPO_PATH) as reader:
+        for version in _VERSIONS:
+            version_schemas = _get_frozen_schemas(version, reader, parsed)
+            schemas[version] = version_schemas
+            for uri in version_schemas:
+                if "SSC" in uri:
+                    # SSC schemas are not under versioning
+                    continue
+
+                if uri not in uris:
+                    uris.append(uri)
 
     return schemas, tuple(uris)
 
@@ -365,7 +302,7 @@ class TestVersioning:
         """
         assert frozen_uri in current_resources, f"Schema {frozen_uri} is not present in the current version"
 
-    def test_resource_changes(self, rad_version, frozen_resources, frozen_uri, filtered_current_resources, request):
+    def test_resource_changes(self, rad_version, frozen_resources, frozen_uri, current_fingerprints, request):
         """
         Test that frozen schemas have not been changed between version including the
         current state of the repository
@@ -383,13 +320,14 @@ class TestVersioning:
         # version, than the one we are checking against. This is not a problem, so the
         # test should simply pass by default.
         if frozen_uri in frozen_resources:
-            # Get the flattened dictionary representation of both schemas
+            # Get the fingerprints of both schemas
             frozen_resource = frozen_resources[frozen_uri]
-            current_resource = filtered_current_resources[frozen_uri]
+            current_resource = current_fingerprints[frozen_uri]
 
             # Check that the frozen resource is the same as the current resource
             assert frozen_resource == current_resource, (
-                f"Resource {frozen_uri} has changed between versions {rad_version} and the current changes"
+                f"Resource {frozen_uri} has changed between versions {rad_version} and the current changes, at: "
+                f"{', '.join(path or '/' for path in frozen_resource.changed_paths(current_resource))}"
             )
 
     @pytest.mark.parametrize(("version", "uri"), EXPECTED_XFAILS)
@@ -403,3 +341,107 @@ class TestVersioning:
 
         assert version in rad_versions, f"Version {version} is not a valid version of RAD for versioning"
         assert uri in frozen_uris, f"URI {uri} is not a valid frozen URI"
+
+
+class TestGitReader:
+    """
+    Test the reader used to stream the files out of the git history
+    """
+
+    def test_blobs(self):
+        """
+        Test that the blobs streamed are exactly the blobs requested, even after a
+        stream is abandoned part way through
+        """
+        with GitReader(REPO_PATH) as reader:
+            files = reader.files("HEAD", suffix=".yaml")
+            shas = [entry.sha for entry in files]
+
+            stream = reader.blobs(shas)
+            next(stream)
+            stream.close()
+
+            for sha, content in reader.blobs(shas):
+                assert hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest() == sha  # noqa: S324
+
+    def test_resource_id(self):
+        """
+        Test that the fast id extraction finds the same URIs as parsing the files
+        """
+        with GitReader(REPO_PATH) as reader:
+            files = reader.files("HEAD", suffix=".yaml")
+            assert files
+            assert not any(entry.is_symlink for entry in files)
+
+            for _, content in reader.blobs(entry.sha for entry in files):
+                expected = yaml.load(content, Loader=_SAFE_LOADER)["id"] if content.startswith(b"%YAML 1.1") else None  # noqa: S506
+                assert resource_id(content) == expected
+
+
+class TestFingerprint:
+    """
+    Test the structural fingerprints used to compare the schemas
+    """
+
+    def test_matches_filtered_comparison(self, current_resources):
+        """
+        Test that fingerprints are equal exactly when the filtered schemas are
+        """
+
+        def filtered(node):
+            if isinstance(node, Mapping):
+                return {key: filtered(value) for key, value in node.items() if key not in IGNORED_KEYWORDS}
+            if isinstance(node, list):
+                return [filtered(item) for item in node]
+            return node
+
+        schemas = list(current_resources.values())
+        for schema, other in zip(schemas, schemas[1:] + schemas[:1], strict=True):
+            assert (fingerprint(schema) == fingerprint(other)) == (filtered(schema) == filtered(other))
+
+    def test_key_order(self):
+        """
+        Test that the order of the keys does not matter, but the order of the items does
+        """
+        schema = {"type": "object", "properties": {"a": {"type": "string"}, "b": {"type": "number"}}, "required": ["a", "b"]}
+        reordered = {"required": ["a", "b"], "properties": {"b": {"type": "number"}, "a": {"type": "string"}}, "type": "object"}
+
+        assert fingerprint(schema) == fingerprint(reordered)
+        assert fingerprint(schema) != fingerprint({**schema, "required": ["b", "a"]})
+        assert isinstance(fingerprint(schema), Fingerprint)
+
+    def test_ignored_keywords(self):
+        """
+        Test that the ignored keywords are left out at any depth
+        """
+        schema = {"type": "object", "properties": {"a": {"type": "string"}}}
+        documented = {
+            "title": "A",
+            "type": "object",
+            "properties": {"a": {"type": "string", "description": "B", "archive_catalog": {"datatype": "nvarchar(10)"}}},
+        }
+
+        assert fingerprint(schema) == fingerprint(documented)
+        assert fingerprint(schema) != fingerprint(documented, ignored=())
+
+    def test_changed_paths(self):
+        """
+        Test that the paths which differ are reported, and only those
+        """
+        schema = {
+            "properties": {"a/b": {"type": "string"}, "c": {"enum": [1, 2]}, "d": {"type": "number"}},
+            "required": ["c"],
+        }
+        changed = {
+            "properties": {"a/b": {"type": "number"}, "c": {"enum": [1, 3]}, "e": {"type": "number"}},
+            "required": ["c"],
+        }
+
+        assert list(fingerprint(schema).changed_paths(fingerprint(schema))) == []
+        assert sorted(fingerprint(schema).changed_paths(fingerprint(changed))) == [
+            "/properties/a~1b/type",
+            "/properties/c/enum/1",
+            "/properties/d",
+            "/properties/e",
+        ]
+        assert list(fingerprint(schema).changed_paths(fingerprint([]))) == [""]